@@ -0,0 +1,5 @@
+# app/__main__.py
+"""`python -m app`: tuned uvicorn launcher (see app/server.py)."""
+from app.server import main
+
+main()
@@ -0,0 +1,210 @@
+# app/cache_policy.py
+import hashlib
+import time
+from dataclasses import dataclass
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.docs_cache import if_none_match_hits
+from app.middleware import merge_headers
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    """
+    How responses for a route may be cached.
+
+    cache_control: value sent in the Cache-Control header.
+    conditional:   memoize the first 200 response (body, ETag, Last-Modified)
+                   and answer later GET/HEADs from memory, with 304 for
+                   matching If-None-Match / If-Modified-Since. The handler and
+                   body serialization are skipped entirely once memoized.
+    """
+
+    cache_control: str
+    conditional: bool = False
+
+
+NO_STORE = CachePolicy("no-store")
+REVALIDATE = CachePolicy("no-cache")
+STATIC = CachePolicy("public, max-age=300", conditional=True)
+
+# Declarative per-route policy. Exact paths, or prefixes ending in "*".
+# Exact paths win over prefixes; the longest prefix wins among prefixes.
+CACHE_POLICY_TABLE: Mapping[str, CachePolicy] = {
+    "/api/*": NO_STORE,
+    "/health": NO_STORE,
+    "/ready": NO_STORE,
+    "/openapi.json": REVALIDATE,
+    "/docs": REVALIDATE,
+    "/redoc": REVALIDATE,
+    "/sitemap.xml": STATIC,
+    "/": STATIC,
+}
+
+# Anything not in the table (404s included) stays out of shared caches.
+DEFAULT_POLICY = NO_STORE
+
+
+class PolicyTable:
+    """Compiled lookup over a CACHE_POLICY_TABLE-style mapping."""
+
+    def __init__(self, table: Mapping[str, CachePolicy] = CACHE_POLICY_TABLE, default: CachePolicy = DEFAULT_POLICY) -> None:
+        self.exact: Dict[str, CachePolicy] = {p: pol for p, pol in table.items() if not p.endswith("*")}
+        self.prefixes: List[Tuple[str, CachePolicy]] = sorted(
+            ((p[:-1], pol) for p, pol in table.items() if p.endswith("*")),
+            key=lambda item: len(item[0]),
+            reverse=True,
+        )
+        self.default = default
+
+    def policy_for(self, path: str) -> CachePolicy:
+        policy = self.exact.get(path)
+        if policy is not None:
+            return policy
+        for prefix, policy in self.prefixes:
+            if path.startswith(prefix):
+                return policy
+        return self.default
+
+
+default_table = PolicyTable()
+
+
+def policy_for(path: str) -> CachePolicy:
+    """Policy for `path` according to the default CACHE_POLICY_TABLE."""
+    return default_table.policy_for(path)
+
+
+class MemoizedResponse:
+    __slots__ = ("status", "headers", "body", "etag", "last_modified", "modified_ts")
+
+    def __init__(self, status: int, headers: List[Tuple[bytes, bytes]], body: bytes) -> None:
+        self.status = status
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+        self.modified_ts = int(time.time())
+        self.last_modified = formatdate(self.modified_ts, usegmt=True)
+        self.headers = [
+            (name, value)
+            for name, value in headers
+            if name not in (b"etag", b"last-modified", b"content-length")
+        ] + [
+            (b"etag", self.etag.encode("latin-1")),
+            (b"last-modified", self.last_modified.encode("latin-1")),
+        ]
+
+    def not_modified(self, if_none_match: str, if_modified_since: str) -> bool:
+        # If-None-Match takes precedence over If-Modified-Since (RFC 9110 13.2.2).
+        if if_none_match:
+            return if_none_match_hits(if_none_match, [self.etag])
+        if if_modified_since:
+            try:
+                return int(parsedate_to_datetime(if_modified_since).timestamp()) >= self.modified_ts
+            except (TypeError, ValueError):
+                return False
+        return False
+
+
+class CachePolicyMiddleware:
+    """
+    Applies the per-route CachePolicy to every HTTP response.
+
+    Non-conditional policies only set Cache-Control (setdefault semantics).
+    Conditional policies memoize the first full 200 GET response for a path
+    without a query string and serve every later GET/HEAD from memory.
+    """
+
+    def __init__(self, app: ASGIApp, table: Optional[PolicyTable] = None) -> None:
+        self.app = app
+        self.table = table or default_table
+        self.memo: Dict[str, MemoizedResponse] = {}
+        self._encoded: Dict[str, List[Tuple[bytes, bytes]]] = {}
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Drop memoized responses (one path, or all of them)."""
+        if path is None:
+            self.memo.clear()
+        else:
+            self.memo.pop(path, None)
+
+    def _cache_control(self, policy: CachePolicy) -> List[Tuple[bytes, bytes]]:
+        encoded = self._encoded.get(policy.cache_control)
+        if encoded is None:
+            encoded = self._encoded[policy.cache_control] = [
+                (b"cache-control", policy.cache_control.encode("latin-1"))
+            ]
+        return encoded
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        policy = self.table.policy_for(path)
+        cache_control = self._cache_control(policy)
+        method = scope["method"]
+
+        if policy.conditional and method in ("GET", "HEAD") and not scope.get("query_string"):
+            memo = self.memo.get(path)
+            if memo is not None:
+                await self._serve_memo(scope, send, memo, cache_control)
+                return
+            if method == "GET":
+                await self._capture(scope, receive, send, path, cache_control)
+                return
+
+        async def send_with_policy(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = merge_headers(message.get("headers", ()), cache_control)
+            await send(message)
+
+        await self.app(scope, receive, send_with_policy)
+
+    async def _serve_memo(self, scope: Scope, send: Send, memo: MemoizedResponse, cache_control) -> None:
+        if_none_match = if_modified_since = ""
+        for name, value in scope["headers"]:
+            if name == b"if-none-match":
+                if_none_match = value.decode("latin-1")
+            elif name == b"if-modified-since":
+                if_modified_since = value.decode("latin-1")
+
+        headers = merge_headers(memo.headers, cache_control)
+        if memo.not_modified(if_none_match, if_modified_since):
+            headers = [(n, v) for n, v in headers if n != b"content-type"]
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        headers.append((b"content-length", str(len(memo.body)).encode("latin-1")))
+        await send({"type": "http.response.start", "status": memo.status, "headers": headers})
+        await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else memo.body})
+
+    async def _capture(self, scope: Scope, receive: Receive, send: Send, path: str, cache_control) -> None:
+        """Run the handler once, buffer its response and memoize it if it is a 200."""
+        start: Optional[Message] = None
+        chunks: List[bytes] = []
+
+        async def buffer(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, buffer)
+        if start is None:
+            return
+
+        body = b"".join(chunks)
+        if start["status"] == 200:
+            memo = MemoizedResponse(200, list(start.get("headers", ())), body)
+            self.memo[path] = memo
+            await self._serve_memo(scope, send, memo, cache_control)
+            return
+
+        await send({**start, "headers": merge_headers(start.get("headers", ()), cache_control)})
+        await send({"type": "http.response.body", "body": body})
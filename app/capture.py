@@ -0,0 +1,289 @@
+# app/capture.py
+import base64
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from typing import Any, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.fast_json import dumps_bytes
+from app.settings import Settings
+
+log = logging.getLogger(__name__)
+
+# Replaces redacted header values, JSON fields and query/form parameters.
+REDACTED = "[redacted]"
+
+# (ts, method, path, query string, raw headers, body, truncated, status, duration_ms)
+Pending = Tuple[float, str, str, bytes, List[Tuple[bytes, bytes]], bytes, bool, int, float]
+
+
+def _names(value: str) -> frozenset:
+    return frozenset(part.strip().lower() for part in value.split(",") if part.strip())
+
+
+def _redact_json(value: Any, fields: frozenset) -> Any:
+    if isinstance(value, dict):
+        return {k: REDACTED if k.lower() in fields else _redact_json(v, fields) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_redact_json(v, fields) for v in value]
+    return value
+
+
+def _redact_pairs(text: str, fields: frozenset) -> str:
+    pairs = parse_qsl(text, keep_blank_values=True)
+    return urlencode([(k, REDACTED if k.lower() in fields else v) for k, v in pairs])
+
+
+class TrafficCapture:
+    """
+    Sampled request capture for tests/perf/replay.py.
+
+    The middleware only enqueues the raw request (bounded queue, never
+    blocks; full = not recorded, counted). A writer thread redacts headers,
+    JSON / NDJSON / form fields and query parameters named in the settings,
+    encodes one JSON line per request and appends them in batches to
+    `capture_file`. Bodies the app did not read to the end (shed, 4xx before
+    parsing) or longer than `capture_max_body_bytes` are flagged `truncated`
+    and, like bodies that are neither JSON nor a form, not written.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self.path = settings.capture_file
+        self.sample_rate = settings.capture_sample_rate
+        self.batch_size = settings.capture_batch_size
+        self.max_body_bytes = settings.capture_max_body_bytes
+        self.redact_fields = _names(settings.capture_redact_fields)
+        self.redact_headers = _names(settings.capture_redact_headers)
+        self.exclude = tuple(p.strip() for p in settings.capture_exclude.split(",") if p.strip())
+        self.queue: "queue.Queue[Optional[Pending]]" = queue.Queue(maxsize=settings.capture_queue_size)
+        self._random = random.random
+        self._thread: Optional[threading.Thread] = None
+        self._out = None
+        # Counters
+        self.enqueued = 0
+        self.dropped = 0
+        self.sampled_out = 0
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+
+    # ---------- request side ----------
+    def wanted(self, path: str) -> bool:
+        if path.startswith(self.exclude):
+            return False
+        if self.sample_rate < 1.0 and self._random() >= self.sample_rate:
+            self.sampled_out += 1
+            return False
+        return True
+
+    def record(self, pending: Pending) -> None:
+        try:
+            self.queue.put_nowait(pending)
+        except queue.Full:
+            self.dropped += 1
+            return
+        self.enqueued += 1
+
+    # ---------- writer thread ----------
+    def encode(self, pending: Pending) -> bytes:
+        ts, method, path, query, raw_headers, body, truncated, status, duration_ms = pending
+        headers = {}
+        content_type = ""
+        for name, value in raw_headers:
+            key = name.decode("latin-1").lower()
+            text = REDACTED if key in self.redact_headers else value.decode("latin-1")
+            headers[key] = f"{headers[key]}, {text}" if key in headers else text
+            if key == "content-type":
+                content_type = text.split(";")[0].strip().lower()
+            elif key == "content-length" and text.isdigit() and int(text) > len(body):
+                truncated = True  # the app answered without reading it all (e.g. shed)
+        entry = {"ts": round(ts, 6), "method": method, "path": path}
+        if query:
+            entry["query"] = _redact_pairs(query.decode("latin-1"), self.redact_fields)
+        entry["headers"] = headers
+        if body:
+            entry.update(self.redact_body(body, content_type, truncated))
+        if truncated:
+            entry["truncated"] = True
+        entry["status"] = status
+        entry["duration_ms"] = duration_ms
+        return dumps_bytes(entry) + b"\n"
+
+    def redact_body(self, body: bytes, content_type: str, truncated: bool) -> dict:
+        """
+        {"body": text} with the redact fields replaced. Parsed as the declared
+        type first, then as JSON and as a form (clients may send no or a wrong
+        content-type). A body that is partial or parses as neither is withheld:
+        {"body": "[redacted]", "body_bytes": n}.
+        """
+        if not self.redact_fields:
+            try:
+                return {"body": body.decode("utf-8")}
+            except UnicodeDecodeError:
+                return {"body_b64": base64.b64encode(body).decode("ascii")}
+        withheld = {"body": REDACTED, "body_bytes": len(body)}
+        if truncated:
+            return withheld
+        try:
+            text = body.decode("utf-8")
+        except UnicodeDecodeError:
+            return withheld
+        if content_type == "application/x-ndjson":
+            parsers = (self._ndjson, self._json, self._form)
+        elif content_type == "application/x-www-form-urlencoded":
+            parsers = (self._form, self._json)
+        else:
+            parsers = (self._json, self._form)
+        for parse in parsers:
+            redacted = parse(text)
+            if redacted is not None:
+                return {"body": redacted}
+        return withheld
+
+    def _json(self, text: str) -> Optional[str]:
+        try:
+            return json.dumps(_redact_json(json.loads(text), self.redact_fields), separators=(",", ":"))
+        except ValueError:
+            return None
+
+    def _ndjson(self, text: str) -> Optional[str]:
+        lines = []
+        for line in text.split("\n"):
+            if not line.strip():
+                lines.append(line)
+                continue
+            redacted = self._json(line)
+            if redacted is None:
+                return None
+            lines.append(redacted)
+        return "\n".join(lines)
+
+    def _form(self, text: str) -> Optional[str]:
+        try:
+            pairs = parse_qsl(text, keep_blank_values=True, strict_parsing=True)
+        except ValueError:
+            return None
+        if not pairs:
+            return None
+        return urlencode([(k, REDACTED if k.lower() in self.redact_fields else v) for k, v in pairs])
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            batch = [self.queue.get()]
+            while batch[-1] is not None and len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if batch[-1] is None:
+                batch.pop()
+                stop = True
+            lines = []
+            for pending in batch:
+                try:
+                    lines.append(self.encode(pending))
+                except Exception:
+                    self.errors += 1
+                    log.exception("capture: could not encode %s %s", pending[1], pending[2])
+            if not lines:
+                continue
+            try:
+                self._out.write(b"".join(lines))
+                self._out.flush()
+            except OSError:
+                self.errors += len(lines)
+                log.exception("capture: write to %s failed", self.path)
+                continue
+            self.written += len(lines)
+            self.batches += 1
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._out = open(self.path, "ab")
+        self._thread = threading.Thread(target=self._run, name="qa-capture", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Write whatever is still queued, then close the file."""
+        if self._thread is None:
+            return
+        # The queue may be full; wait for room rather than raising.
+        self.queue.put(None, timeout=5)
+        self._thread.join(timeout=10)
+        self._thread = None
+        self._out.close()
+
+    def stats(self) -> dict:
+        return {
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "sampled_out": self.sampled_out,
+            "written": self.written,
+            "batches": self.batches,
+            "errors": self.errors,
+            "queue_depth": self.queue.qsize(),
+        }
+
+
+class TrafficCaptureMiddleware:
+    """
+    Pure ASGI: copies the request body as the app reads it (up to
+    `capture_max_body_bytes`) and hands the request, status and duration to
+    TrafficCapture once the response is done.
+    """
+
+    def __init__(self, app: ASGIApp, capture: TrafficCapture) -> None:
+        self.app = app
+        self.capture = capture
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.capture.wanted(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.capture.max_body_bytes
+        chunks: List[bytes] = []
+        size = 0
+        more = False  # a chunk said more_body and the app stopped reading
+        cut = False
+        status = 500
+
+        async def receive_copy() -> Message:
+            nonlocal size, more, cut
+            message = await receive()
+            if message["type"] == "http.request":
+                body = message.get("body", b"")
+                if body and not cut:
+                    if size + len(body) > limit:
+                        body, cut = body[: limit - size], True
+                    chunks.append(body)
+                    size += len(body)
+                more = message.get("more_body", False)
+            return message
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        ts = time.time()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive_copy, send_with_status)
+        finally:
+            self.capture.record((
+                ts, scope["method"], scope["path"], scope.get("query_string", b""), scope["headers"],
+                b"".join(chunks), cut or more, status,
+                round((time.perf_counter() - started) * 1000, 3),
+            ))
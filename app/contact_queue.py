@@ -0,0 +1,244 @@
+# app/contact_queue.py
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from app.settings import Settings
+
+log = logging.getLogger(__name__)
+
+# (name, email, message, created_at) -- already in executemany() order.
+ContactRecord = Tuple[str, str, str, float]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS contacts (
+    id         INTEGER PRIMARY KEY,
+    name       TEXT NOT NULL,
+    email      TEXT NOT NULL,
+    message    TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+-- Admin search (app.contact_search): newest-first keyset pages overall or
+-- per email, plus full-text search on the message.
+CREATE INDEX IF NOT EXISTS contacts_created_at ON contacts (created_at);
+CREATE INDEX IF NOT EXISTS contacts_email ON contacts (email COLLATE NOCASE, created_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS contacts_fts USING fts5 (
+    message, content='contacts', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS contacts_fts_insert AFTER INSERT ON contacts BEGIN
+    INSERT INTO contacts_fts (rowid, message) VALUES (new.id, new.message);
+END;
+CREATE TRIGGER IF NOT EXISTS contacts_fts_delete AFTER DELETE ON contacts BEGIN
+    INSERT INTO contacts_fts (contacts_fts, rowid, message) VALUES ('delete', old.id, old.message);
+END;
+-- Transactional outbox (app.outbox): while it is enabled, every new contact
+-- gets a pending e-mail row in the same transaction (OUTBOX_TRIGGER).
+-- Contacts stored before the outbox existed, or while it was off, are not
+-- e-mailed.
+CREATE TABLE IF NOT EXISTS contact_outbox (
+    contact_id      INTEGER PRIMARY KEY,
+    status          TEXT NOT NULL DEFAULT 'pending',  -- pending | sent | dead
+    attempts        INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error      TEXT
+);
+CREATE INDEX IF NOT EXISTS contact_outbox_due ON contact_outbox (next_attempt_at) WHERE status = 'pending';
+CREATE TRIGGER IF NOT EXISTS contacts_fts_update AFTER UPDATE OF message ON contacts BEGIN
+    INSERT INTO contacts_fts (contacts_fts, rowid, message) VALUES ('delete', old.id, old.message);
+    INSERT INTO contacts_fts (rowid, message) VALUES (new.id, new.message);
+END;
+"""
+
+# Installed by whoever opens the database with the outbox on, dropped with it
+# off, so a disabled outbox never collects rows that nobody sends.
+OUTBOX_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS contacts_outbox_insert AFTER INSERT ON contacts BEGIN
+    INSERT INTO contact_outbox (contact_id, next_attempt_at) VALUES (new.id, new.created_at);
+END;
+"""
+DROP_OUTBOX_TRIGGER = "DROP TRIGGER IF EXISTS contacts_outbox_insert"
+
+INSERT_SQL = "INSERT INTO contacts (name, email, message, created_at) VALUES (?, ?, ?, ?)"
+
+
+def open_db(path: str, outbox: Optional[bool] = None) -> sqlite3.Connection:
+    """
+    Open (and create if needed) the contacts database in WAL mode.
+    outbox=True/False installs/drops the outbox trigger; None leaves it as is.
+    """
+    if path != ":memory:":
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    fts_existed = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'contacts_fts'").fetchone()
+    conn.executescript(SCHEMA)
+    if not fts_existed:
+        # Databases from before the search index: index the existing rows once.
+        conn.execute("INSERT INTO contacts_fts (contacts_fts) VALUES ('rebuild')")
+        conn.commit()
+    if outbox is not None:
+        conn.executescript(OUTBOX_TRIGGER if outbox else DROP_OUTBOX_TRIGGER)
+    return conn
+
+
+class ContactPipeline:
+    """
+    Bounded in-process queue between the /api/contact handlers and SQLite.
+
+    - submit() never blocks: it returns False when the queue is full so the
+      handler can answer 503 + Retry-After.
+    - A background task flushes batches with executemany(), either when
+      `batch_size` records are pending or `flush_interval` seconds after the
+      first record of a batch arrived. SQLite I/O runs on a dedicated
+      single-thread executor, never on the event loop.
+    - stop() refuses new work while it drains whatever is still queued.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self.db_path = settings.contact_db_path
+        self.outbox_enabled = settings.outbox_enabled
+        self.batch_size = settings.contact_batch_size
+        self.flush_interval = settings.contact_flush_interval
+        self.drain_timeout = settings.contact_drain_timeout
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=settings.contact_queue_size)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        # Counters
+        self.accepted = 0
+        self.rejected = 0
+        self.written = 0
+        self.batches = 0
+        self.flush_seconds_total = 0.0
+        self.flush_seconds_max = 0.0
+        self.last_flush_seconds = 0.0
+
+    # ---------- Request path ----------
+    def submit(self, name: str, email: str, message: str) -> bool:
+        """Hand a contact off to the writer. False means "queue full / closing"."""
+        if self._closing:
+            self.rejected += 1
+            return False
+        try:
+            self.queue.put_nowait((name, email, message, time.time()))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+        self.accepted += 1
+        return True
+
+    async def submit_wait(self, name: str, email: str, message: str, timeout: float) -> bool:
+        """Like submit(), but waits up to `timeout` seconds for room (bulk uploads)."""
+        if self.submit(name, email, message):
+            return True
+        if self._closing or timeout <= 0:
+            return False
+        try:
+            await asyncio.wait_for(self.queue.put((name, email, message, time.time())), timeout)
+        except asyncio.TimeoutError:
+            return False
+        # submit() counted the first attempt as rejected; it made it after all.
+        self.rejected -= 1
+        self.accepted += 1
+        return True
+
+    # ---------- Lifecycle ----------
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._closing = False
+        # asyncio queues bind to the first loop that waits on them; start on a
+        # fresh one (keeping anything submitted before startup).
+        old, self.queue = self.queue, asyncio.Queue(maxsize=self.queue.maxsize)
+        while not old.empty():
+            self.queue.put_nowait(old.get_nowait())
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="contact-writer")
+        loop = asyncio.get_running_loop()
+        self._conn = await loop.run_in_executor(self._executor, open_db, self.db_path, self.outbox_enabled)
+        self._task = asyncio.create_task(self._run(), name="contact-writer")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._closing = True
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout=self.drain_timeout)
+        except asyncio.TimeoutError:
+            log.warning("contact queue drain timed out with %d records pending", self.queue.qsize())
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._conn.close)
+        self._executor.shutdown(wait=True)
+        self._executor = self._conn = None
+        # Stopped pipelines accept (and hold) records again until next start().
+        self._closing = False
+
+    # ---------- Writer ----------
+    async def _next_batch(self) -> List[ContactRecord]:
+        queue = self.queue
+        batch = [await queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0 or self._closing:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._next_batch()
+            started = time.perf_counter()
+            try:
+                await loop.run_in_executor(self._executor, self._write, batch)
+            except sqlite3.Error:
+                log.exception("failed to persist %d contact records", len(batch))
+            else:
+                self.written += len(batch)
+                self.batches += 1
+            finally:
+                elapsed = time.perf_counter() - started
+                self.last_flush_seconds = elapsed
+                self.flush_seconds_total += elapsed
+                self.flush_seconds_max = max(self.flush_seconds_max, elapsed)
+                for _ in batch:
+                    self.queue.task_done()
+
+    def _write(self, batch: List[ContactRecord]) -> None:
+        with self._conn:
+            self._conn.executemany(INSERT_SQL, batch)
+
+    # ---------- Introspection ----------
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "written": self.written,
+            "batches": self.batches,
+            "flush_seconds_total": self.flush_seconds_total,
+            "flush_seconds_max": self.flush_seconds_max,
+            "last_flush_seconds": self.last_flush_seconds,
+        }
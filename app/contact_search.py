@@ -0,0 +1,213 @@
+# app/contact_search.py
+import asyncio
+import base64
+import binascii
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import AsyncIterator, List, Optional, Tuple
+
+from app.contact_queue import open_db
+
+# (id, name, email, message, created_at) -- column order of SELECT_SQL.
+ContactRow = Tuple[int, str, str, str, float]
+
+SELECT_SQL = "SELECT id, name, email, message, created_at FROM contacts"
+# Newest first. (created_at, id) is unique, so it doubles as the page cursor.
+ORDER_SQL = " ORDER BY created_at DESC, id DESC LIMIT ?"
+# Text search walks the full-text index newest (highest rowid) first and
+# stops after one page, however common the words are.
+FTS_SELECT_SQL = (
+    "SELECT c.id, c.name, c.email, c.message, c.created_at"
+    " FROM contacts_fts f JOIN contacts c ON c.id = f.rowid WHERE contacts_fts MATCH ?"
+)
+FTS_ORDER_SQL = " ORDER BY f.rowid DESC LIMIT ?"
+# With an email the address narrows things down most: probe the
+# full-text index for that address's few rows only.
+FTS_PROBE_SQL = "EXISTS (SELECT 1 FROM contacts_fts WHERE contacts_fts MATCH ? AND rowid = contacts.id)"
+
+_WORD = re.compile(r"\w+")
+
+
+class InvalidQuery(ValueError):
+    """Malformed cursor or search text (the API answers 400)."""
+
+
+@dataclass(frozen=True)
+class ContactFilter:
+    email: Optional[str] = None    # exact match, case-insensitive
+    since: Optional[float] = None  # created_at >= since (epoch seconds)
+    until: Optional[float] = None  # created_at < until
+    text: Optional[str] = None     # every word must appear in the message
+
+
+# ---------- Helpers ----------
+def to_epoch(value: datetime) -> float:
+    """Query parameter datetime -> epoch seconds (naive values are UTC)."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def to_iso(created_at: float) -> str:
+    return datetime.fromtimestamp(created_at, timezone.utc).isoformat()
+
+
+def encode_cursor(row: ContactRow) -> str:
+    raw = f"{row[4]!r}:{row[0]}".encode("ascii")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode("ascii")
+        created_at, row_id = raw.split(":")
+        return float(created_at), int(row_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidQuery("Invalid cursor") from None
+
+
+def fts_query(text: str) -> str:
+    """
+    Free text -> FTS5 MATCH expression: every word quoted (so user input is
+    never parsed as FTS syntax) and all of them required.
+    """
+    words = _WORD.findall(text)
+    if not words:
+        raise InvalidQuery("Search text has no words")
+    return " ".join(f'"{word}"' for word in words)
+
+
+def build_query(flt: ContactFilter, after: Optional[Tuple[float, int]], limit: int) -> Tuple[str, list]:
+    """
+    One keyset page; `after` is the (created_at, id) of the last row of the
+    previous page. Every shape is driven by an index: contacts_email,
+    contacts_created_at or contacts_fts. Text-only searches are ordered by
+    id (insertion order), the rest by (created_at, id); both are "newest
+    first" and a cursor is only ever reused with the same filters.
+    """
+    where, params = [], []
+    text_driven = flt.text is not None and flt.email is None
+    prefix = "c." if text_driven else ""
+    if text_driven:
+        params.append(fts_query(flt.text))
+    if flt.email is not None:
+        where.append("email = ? COLLATE NOCASE")
+        params.append(flt.email)
+    if flt.since is not None:
+        where.append(f"{prefix}created_at >= ?")
+        params.append(flt.since)
+    if flt.until is not None:
+        where.append(f"{prefix}created_at < ?")
+        params.append(flt.until)
+    if flt.text is not None and not text_driven:
+        where.append(FTS_PROBE_SQL)
+        params.append(fts_query(flt.text))
+    if text_driven:
+        if after is not None:
+            where.append("f.rowid < ?")
+            params.append(after[1])
+        sql = FTS_SELECT_SQL + "".join(" AND " + w for w in where) + FTS_ORDER_SQL
+    else:
+        if after is not None:
+            where.append("(created_at, id) < (?, ?)")
+            params.extend(after)
+        sql = SELECT_SQL + (" WHERE " + " AND ".join(where) if where else "") + ORDER_SQL
+    params.append(limit)
+    return sql, params
+
+
+# ---------- Search ----------
+class ContactSearch:
+    """
+    Read side of the contacts database (admin search and export).
+
+    Queries run on a small thread pool; each pool thread keeps its own
+    read-only connection (WAL: readers never block the contact writer).
+    Pages are keyset-based, so page N costs the same as page 1, and an export
+    is a sequence of short page queries rather than one long-lived read
+    transaction.
+    """
+
+    def __init__(self, path: str, pool_size: int = 2) -> None:
+        self.path = path
+        self.pool_size = pool_size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._conns: List[sqlite3.Connection] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Counters
+        self.queries = 0
+        self.rows = 0
+        self.query_seconds_total = 0.0
+        self.query_seconds_max = 0.0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = open_db(self.path)  # creates the schema if the writer hasn't yet
+            conn.execute("PRAGMA query_only=ON")
+            self._local.conn = conn
+            with self._lock:
+                self._conns.append(conn)
+        return conn
+
+    def _fetch(self, sql: str, params: list) -> List[ContactRow]:
+        return self._conn().execute(sql, params).fetchall()
+
+    async def _query(self, flt: ContactFilter, after: Optional[Tuple[float, int]], limit: int) -> List[ContactRow]:
+        sql, params = build_query(flt, after, limit)
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="contact-search")
+        started = time.perf_counter()
+        rows = await asyncio.get_running_loop().run_in_executor(self._executor, self._fetch, sql, params)
+        elapsed = time.perf_counter() - started
+        self.queries += 1
+        self.rows += len(rows)
+        self.query_seconds_total += elapsed
+        self.query_seconds_max = max(self.query_seconds_max, elapsed)
+        return rows
+
+    async def page(
+        self, flt: ContactFilter, limit: int, cursor: Optional[str] = None
+    ) -> Tuple[List[ContactRow], Optional[str]]:
+        """Up to `limit` rows after `cursor`, and the cursor of the next page (None on the last)."""
+        after = decode_cursor(cursor) if cursor else None
+        rows = await self._query(flt, after, limit + 1)
+        if len(rows) > limit:
+            rows = rows[:limit]
+            return rows, encode_cursor(rows[-1])
+        return rows, None
+
+    async def iter_pages(self, flt: ContactFilter, page_size: int) -> AsyncIterator[List[ContactRow]]:
+        """Every matching row, `page_size` at a time; memory stays at one page."""
+        after = None
+        while True:
+            rows = await self._query(flt, after, page_size)
+            if rows:
+                yield rows
+            if len(rows) < page_size:
+                return
+            after = (rows[-1][4], rows[-1][0])
+
+    def stats(self) -> dict:
+        return {
+            "queries": self.queries,
+            "rows": self.rows,
+            "query_seconds_total": self.query_seconds_total,
+            "query_seconds_max": self.query_seconds_max,
+        }
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        with self._lock:
+            for conn in self._conns:
+                conn.close()
+            self._conns.clear()
+        self._local = threading.local()
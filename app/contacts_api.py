@@ -0,0 +1,174 @@
+# app/contacts_api.py
+import csv
+import io
+import secrets
+from datetime import datetime, timezone
+from typing import AsyncIterator, Callable, List, Literal, Optional, Type
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.routing import APIRoute
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+from app.contact_search import ContactFilter, ContactRow, ContactSearch, InvalidQuery, fts_query, to_epoch, to_iso
+from app.fast_json import dumps_bytes
+from app.settings import Settings
+
+CSV_COLUMNS = ("id", "name", "email", "message", "created_at")
+# Spreadsheet apps treat cells starting with these as formulas.
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+# ---------- Models ----------
+class ContactRecordOut(BaseModel):
+    id: int
+    name: str
+    email: str
+    message: str
+    created_at: datetime
+
+
+class ContactPage(BaseModel):
+    items: List[ContactRecordOut]
+    # Pass back as `cursor` for the next page; null on the last one
+    next_cursor: Optional[str] = None
+
+
+class AdminError(BaseModel):
+    detail: str = "Invalid admin token"
+
+
+# ---------- Export encoders ----------
+def _ndjson_page(rows: List[ContactRow]) -> bytes:
+    items = [
+        {"id": r[0], "name": r[1], "email": r[2], "message": r[3], "created_at": to_iso(r[4])} for r in rows
+    ]
+    return b"".join(dumps_bytes(item) + b"\n" for item in items)
+
+
+def _csv_cell(value: str) -> str:
+    return "'" + value if value.startswith(_FORMULA_PREFIXES) else value
+
+
+def _csv_page(rows: List[ContactRow]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for r in rows:
+        writer.writerow((r[0], _csv_cell(r[1]), _csv_cell(r[2]), _csv_cell(r[3]), to_iso(r[4])))
+    return buffer.getvalue().encode("utf-8")
+
+
+EXPORT_FORMATS = {
+    "ndjson": ("application/x-ndjson", _ndjson_page),
+    "csv": ("text/csv; charset=utf-8", _csv_page),
+}
+
+
+# ---------- Router ----------
+def contacts_router(search: ContactSearch, settings: Settings, route_class: Type[APIRoute] = APIRoute) -> APIRouter:
+    """
+    Admin endpoints over the persisted contacts, shared by app.main and
+    backend.app. They need `Authorization: Bearer <QA_ADMIN_TOKEN>` and
+    answer 403 while no token is configured.
+    """
+    router = APIRouter(route_class=route_class, tags=["Admin"])
+    bearer = HTTPBearer(auto_error=False)
+
+    def require_admin(credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer)) -> None:
+        if not settings.admin_token:
+            raise HTTPException(status_code=403, detail="Admin API disabled (set QA_ADMIN_TOKEN)")
+        if credentials is None or not secrets.compare_digest(
+            credentials.credentials.encode("utf-8"), settings.admin_token.encode("utf-8")
+        ):
+            raise HTTPException(status_code=401, detail=AdminError().detail, headers={"WWW-Authenticate": "Bearer"})
+
+    def contact_filter(
+        email: Optional[str] = Query(None, max_length=320, description="Exact address, case-insensitive"),
+        since: Optional[datetime] = Query(None, description="Created at or after (ISO 8601, UTC if no offset)"),
+        until: Optional[datetime] = Query(None, description="Created before (ISO 8601, UTC if no offset)"),
+        q: Optional[str] = Query(None, max_length=200, description="Words that must all appear in the message"),
+    ) -> ContactFilter:
+        if q is not None:
+            try:
+                fts_query(q)
+            except InvalidQuery as exc:
+                raise HTTPException(status_code=400, detail=str(exc))
+        return ContactFilter(
+            email=email,
+            since=to_epoch(since) if since is not None else None,
+            until=to_epoch(until) if until is not None else None,
+            text=q,
+        )
+
+    responses = {
+        400: {"description": "Bad Request - malformed cursor or search text"},
+        401: {"description": "Unauthorized - missing or wrong admin token", "model": AdminError},
+        403: {"description": "Forbidden - admin API disabled"},
+    }
+
+    @router.get(
+        "/api/contacts",
+        response_model=ContactPage,
+        summary="Search contacts",
+        responses=responses,
+        dependencies=[Depends(require_admin)],
+    )
+    async def list_contacts(
+        flt: ContactFilter = Depends(contact_filter),
+        limit: int = Query(50, ge=1, le=settings.contact_search_max_limit),
+        cursor: Optional[str] = Query(None, max_length=128, description="next_cursor of the previous page"),
+    ) -> ContactPage:
+        """
+        Newest contacts first, filtered by email, date range and message text.
+        Keyset pagination: follow `next_cursor` until it is null.
+        """
+        try:
+            rows, next_cursor = await search.page(flt, limit, cursor)
+        except InvalidQuery as exc:
+            raise HTTPException(status_code=400, detail=str(exc))
+        items = [
+            ContactRecordOut(
+                id=r[0], name=r[1], email=r[2], message=r[3], created_at=datetime.fromtimestamp(r[4], timezone.utc)
+            )
+            for r in rows
+        ]
+        return ContactPage(items=items, next_cursor=next_cursor)
+
+    @router.get(
+        "/api/contacts/export",
+        summary="Export contacts",
+        responses={
+            **responses,
+            200: {
+                "description": "Every matching contact, newest first",
+                "content": {"application/x-ndjson": {}, "text/csv": {}},
+            },
+        },
+        dependencies=[Depends(require_admin)],
+    )
+    async def export_contacts(
+        flt: ContactFilter = Depends(contact_filter),
+        format: Literal["ndjson", "csv"] = Query("ndjson"),
+    ) -> StreamingResponse:
+        """
+        Same filters as the search, streamed: rows are read and encoded one
+        page (QA_CONTACT_EXPORT_PAGE_SIZE) at a time, so memory stays flat
+        whatever the size of the result.
+        """
+        media_type, encode = EXPORT_FORMATS[format]
+        return StreamingResponse(
+            _export(flt, encode, header=format == "csv"),
+            media_type=media_type,
+            headers={"Content-Disposition": f'attachment; filename="contacts.{format}"'},
+        )
+
+    async def _export(
+        flt: ContactFilter, encode: Callable[[List[ContactRow]], bytes], header: bool
+    ) -> AsyncIterator[bytes]:
+        if header:
+            yield (",".join(CSV_COLUMNS) + "\r\n").encode("utf-8")
+        async for rows in search.iter_pages(flt, settings.contact_export_page_size):
+            yield encode(rows)
+
+    return router
@@ -0,0 +1,178 @@
+# app/docs_cache.py
+import gzip
+import hashlib
+import json
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import FastAPI
+from fastapi.openapi.docs import get_redoc_html, get_swagger_ui_html
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+try:  # Brotli is pinned in requirements.txt, but keep the cache usable without it
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+
+class CachedAsset:
+    """One rendered document: identity bytes plus pre-compressed variants."""
+
+    __slots__ = ("media_type", "etag", "variants")
+
+    def __init__(self, body: bytes, media_type: str) -> None:
+        self.media_type = media_type
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        # Strong ETags must differ per representation, hence one per encoding.
+        self.etag = f'"{digest}"'
+        self.variants: Dict[str, Tuple[bytes, str]] = {"identity": (body, self.etag)}
+        self.variants["gzip"] = (gzip.compress(body, compresslevel=9, mtime=0), f'"{digest}-gz"')
+        if brotli is not None:
+            self.variants["br"] = (brotli.compress(body, quality=11), f'"{digest}-br"')
+
+    def etags(self) -> List[str]:
+        return [etag for _, etag in self.variants.values()]
+
+    def pick(self, accept_encoding: str) -> str:
+        """Best encoding this asset has for the given Accept-Encoding header."""
+        accepted = parse_accept_encoding(accept_encoding)
+        for encoding in ("br", "gzip"):
+            if encoding in accepted and encoding in self.variants:
+                return encoding
+        return "identity"
+
+
+def parse_accept_encoding(value: str) -> set:
+    """Encodings accepted by the client (q=0 means "not acceptable")."""
+    accepted = set()
+    for part in value.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        q = params.strip().lower()
+        if q.startswith("q=") and q[2:].strip() in ("0", "0.0", "0.00", "0.000"):
+            continue
+        accepted.add(token)
+    if "*" in accepted:
+        accepted.update(("br", "gzip"))
+    return accepted
+
+
+def if_none_match_hits(header: str, etags: List[str]) -> bool:
+    """Weak comparison, as RFC 9110 requires for If-None-Match."""
+    if header.strip() == "*":
+        return True
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return any(etag in candidates for etag in etags)
+
+
+class DocsCache:
+    """
+    Renders /openapi.json, /docs and /redoc once and keeps them as bytes.
+
+    The cache is keyed on the identity of the app's routes, so adding or
+    removing a route invalidates it and the next docs request re-renders.
+    Other paths are turned away before the routes are looked at.
+    """
+
+    def __init__(self, app: FastAPI) -> None:
+        self.app = app
+        self.paths = self._doc_paths()
+        self.assets: Dict[str, CachedAsset] = {}
+        self.fingerprint: Optional[tuple] = None
+        self.builds = 0
+
+    def _doc_paths(self) -> frozenset:
+        app = self.app
+        if not app.openapi_url:
+            return frozenset()
+        return frozenset(url for url in (app.openapi_url, app.docs_url, app.redoc_url) if url)
+
+    def _routes_fingerprint(self) -> tuple:
+        return tuple(map(id, self.app.router.routes))
+
+    def build(self) -> None:
+        app = self.app
+        fingerprint = self._routes_fingerprint()
+        assets: Dict[str, CachedAsset] = {}
+        if app.openapi_url:
+            app.openapi_schema = None  # FastAPI memoizes the schema; force a fresh one
+            body = json.dumps(
+                app.openapi(), ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+            ).encode("utf-8")
+            assets[app.openapi_url] = CachedAsset(body, "application/json")
+            if app.docs_url:
+                html = get_swagger_ui_html(
+                    openapi_url=app.openapi_url,
+                    title=f"{app.title} - Swagger UI",
+                    oauth2_redirect_url=app.swagger_ui_oauth2_redirect_url,
+                    init_oauth=app.swagger_ui_init_oauth,
+                    swagger_ui_parameters=app.swagger_ui_parameters,
+                )
+                assets[app.docs_url] = CachedAsset(html.body, "text/html; charset=utf-8")
+            if app.redoc_url:
+                html = get_redoc_html(openapi_url=app.openapi_url, title=f"{app.title} - ReDoc")
+                assets[app.redoc_url] = CachedAsset(html.body, "text/html; charset=utf-8")
+        self.assets = assets
+        self.paths = self._doc_paths()
+        self.fingerprint = fingerprint
+        self.builds += 1
+
+    def get(self, path: str) -> Optional[CachedAsset]:
+        if path not in self.paths:
+            return None
+        if self.fingerprint != self._routes_fingerprint():
+            self.build()
+        return self.assets.get(path)
+
+
+class DocsCacheMiddleware:
+    """
+    Serves the DocsCache assets straight from memory for GET/HEAD, with
+    gzip/br negotiation and If-None-Match -> 304. Cache-Control comes from
+    the route's CachePolicy. Everything else (and any request behind a
+    root_path) falls through to FastAPI's own routes.
+    """
+
+    def __init__(self, app: ASGIApp, cache: DocsCache) -> None:
+        self.app = app
+        self.cache = cache
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] not in ("GET", "HEAD")
+            or scope.get("root_path")
+        ):
+            await self.app(scope, receive, send)
+            return
+        asset = self.cache.get(scope["path"])
+        if asset is None:
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = if_none_match = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+            elif name == b"if-none-match":
+                if_none_match = value.decode("latin-1")
+
+        encoding = asset.pick(accept_encoding)
+        body, etag = asset.variants[encoding]
+        headers = [
+            (b"etag", etag.encode("latin-1")),
+            (b"vary", b"Accept-Encoding"),
+        ]
+
+        if if_none_match and if_none_match_hits(if_none_match, asset.etags()):
+            await send({"type": "http.response.start", "status": 304, "headers": headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        headers.append((b"content-type", asset.media_type.encode("latin-1")))
+        headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        if encoding != "identity":
+            headers.append((b"content-encoding", encoding.encode("latin-1")))
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": b"" if scope["method"] == "HEAD" else body})
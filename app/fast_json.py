@@ -0,0 +1,49 @@
+# app/fast_json.py
+import json
+from typing import Any, Callable, Optional, Type
+
+from fastapi.responses import JSONResponse
+from starlette.responses import Response
+
+# Optional encoders: use whichever is installed, orjson first.
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # pragma: no cover - depends on the environment
+    msgspec = None
+
+
+def dumps_bytes(obj: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    """Compact UTF-8 JSON: orjson if installed, else the stdlib with the same output."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=default)
+    return json.dumps(obj, default=default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class OrjsonResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+
+class MsgspecResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return msgspec.json.encode(content)
+
+
+class RawJSONResponse(Response):
+    """Body is already-encoded JSON bytes; nothing is validated or re-encoded."""
+
+    media_type = "application/json"
+
+
+def fast_response_class() -> Type[JSONResponse]:
+    """Fastest JSON response class available (falls back to the stdlib one)."""
+    if orjson is not None:
+        return OrjsonResponse
+    if msgspec is not None:
+        return MsgspecResponse
+    return JSONResponse
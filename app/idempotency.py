@@ -0,0 +1,447 @@
+# app/idempotency.py
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.middleware import read_body, replay_body, send_response
+from app.settings import Settings
+
+HEADER = b"idempotency-key"
+MAX_KEY_LENGTH = 255
+# Transient answers a retry should be allowed to turn into a success.
+NOT_STORED = frozenset({408, 409, 425, 429})
+
+
+class StoredResponse:
+    """
+    A complete response as the handler produced it, plus the request
+    fingerprint (sha256 of the body). body is None when it was too large
+    to keep a copy of.
+    """
+
+    __slots__ = ("fingerprint", "status", "headers", "body")
+
+    def __init__(
+        self, fingerprint: str, status: int, headers: List[Tuple[bytes, bytes]], body: Optional[bytes]
+    ) -> None:
+        self.fingerprint = fingerprint
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+
+# ---------- Stores ----------
+class IdempotencyStore(ABC):
+    """
+    Where first responses live, keyed by "<METHOD> <path> <Idempotency-Key>".
+
+    claim() reserves a key for execution across processes: False means
+    another worker is running (or has finished) that request. Stores that
+    only serve one process can always return True -- the middleware
+    coalesces duplicates within a process itself. get() and put() are
+    abstract: a store without them cannot be instantiated.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[StoredResponse]:
+        ...
+
+    async def claim(self, key: str) -> bool:
+        return True
+
+    @abstractmethod
+    async def put(self, key: str, response: StoredResponse) -> None:
+        ...
+
+    async def release(self, key: str) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def entries(self) -> int:
+        return 0
+
+
+class InMemoryIdempotencyStore(IdempotencyStore):
+    """Per-process LRU with TTL; at most `max_entries` responses."""
+
+    def __init__(self, ttl: float, max_entries: int) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, StoredResponse]]" = OrderedDict()
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[StoredResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, response = entry
+        if expires <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return response
+
+    async def put(self, key: str, response: StoredResponse) -> None:
+        entries = self._entries
+        entries[key] = (time.monotonic() + self.ttl, response)
+        entries.move_to_end(key)
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def entries(self) -> int:
+        return len(self._entries)
+
+
+IDEMPOTENCY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS idempotency (
+    key         TEXT PRIMARY KEY,
+    state       TEXT NOT NULL,      -- 'pending' while running, then 'done'
+    fingerprint TEXT,
+    status      INTEGER,
+    headers     TEXT,
+    body        BLOB,
+    expires_at  REAL NOT NULL
+)
+"""
+
+
+class SQLiteIdempotencyStore(IdempotencyStore):
+    """
+    Shared by every worker on the host (WAL database). A worker claims a key
+    with a 'pending' row before running the handler, so a duplicate landing
+    on another worker waits for the stored response instead of re-running.
+    Pending claims expire after `claim_ttl` in case their worker died. All
+    I/O runs on one dedicated thread with its own connection; entries() (for
+    /metrics) reads a count kept by that thread, never the database.
+    """
+
+    def __init__(self, path: str, ttl: float, max_entries: int, claim_ttl: float = 30.0) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.claim_ttl = claim_ttl
+        self._conn: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._writes = 0
+        # Stored responses: this worker's puts and expiries, re-counted from
+        # the table (other workers' rows included) whenever it is trimmed.
+        self._count = 0
+
+    async def _run(self, fn, *args):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="idempotency-db")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(IDEMPOTENCY_SCHEMA)
+            self._conn = conn
+            self._count = self._entries()
+        return self._conn
+
+    def _get(self, key: str) -> Optional[StoredResponse]:
+        row = self._db().execute(
+            "SELECT fingerprint, status, headers, body FROM idempotency "
+            "WHERE key = ? AND state = 'done' AND expires_at > ?",
+            (key, time.time()),
+        ).fetchone()
+        if row is None:
+            return None
+        fingerprint, status, headers, body = row
+        raw = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in json.loads(headers)]
+        return StoredResponse(fingerprint, status, raw, body)
+
+    def _claim(self, key: str) -> bool:
+        now = time.time()
+        with self._db() as conn:
+            expired = conn.execute(
+                "DELETE FROM idempotency WHERE key = ? AND expires_at <= ? RETURNING state", (key, now)
+            ).fetchall()
+            self._count -= expired.count(("done",))
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO idempotency (key, state, expires_at) VALUES (?, 'pending', ?)",
+                (key, now + self.claim_ttl),
+            )
+        return cur.rowcount == 1
+
+    def _put(self, key: str, response: StoredResponse) -> None:
+        headers = json.dumps([[n.decode("latin-1"), v.decode("latin-1")] for n, v in response.headers])
+        now = time.time()
+        with self._db() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO idempotency "
+                "(key, state, fingerprint, status, headers, body, expires_at) VALUES (?, 'done', ?, ?, ?, ?, ?)",
+                (key, response.fingerprint, response.status, headers, response.body, now + self.ttl),
+            )
+            self._writes += 1
+            self._count += 1  # replaces our own pending claim
+            if self._writes % 256 == 0:  # keep the table bounded: expired first, then oldest
+                conn.execute("DELETE FROM idempotency WHERE expires_at <= ?", (now,))
+                conn.execute(
+                    "DELETE FROM idempotency WHERE key IN (SELECT key FROM idempotency "
+                    "ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                self._count = self._entries()
+
+    def _release(self, key: str) -> None:
+        with self._db() as conn:
+            conn.execute("DELETE FROM idempotency WHERE key = ? AND state = 'pending'", (key,))
+
+    def _entries(self) -> int:
+        return self._db().execute("SELECT COUNT(*) FROM idempotency WHERE state = 'done'").fetchone()[0]
+
+    async def get(self, key: str) -> Optional[StoredResponse]:
+        return await self._run(self._get, key)
+
+    async def claim(self, key: str) -> bool:
+        return await self._run(self._claim, key)
+
+    async def put(self, key: str, response: StoredResponse) -> None:
+        await self._run(self._put, key, response)
+
+    async def release(self, key: str) -> None:
+        await self._run(self._release, key)
+
+    def entries(self) -> int:
+        return self._count
+
+    def close(self) -> None:
+        if self._executor is not None:
+            if self._conn is not None:
+                self._executor.submit(self._conn.close).result()
+            self._executor.shutdown(wait=True)
+        self._executor = self._conn = None
+
+
+def build_idempotency_store(settings: Settings) -> IdempotencyStore:
+    """The store selected by QA_IDEMPOTENCY_STORE ("memory" or "sqlite")."""
+    if settings.idempotency_store == "memory":
+        return InMemoryIdempotencyStore(settings.idempotency_ttl, settings.idempotency_max_entries)
+    if settings.idempotency_store == "sqlite":
+        return SQLiteIdempotencyStore(
+            settings.idempotency_db_path, settings.idempotency_ttl, settings.idempotency_max_entries
+        )
+    raise ValueError(
+        f"unknown QA_IDEMPOTENCY_STORE {settings.idempotency_store!r} (expected memory or sqlite)"
+    )
+
+
+# ---------- Middleware ----------
+MISMATCH_BODY = b'{"detail":"Idempotency-Key was already used with a different request body"}'
+IN_PROGRESS_BODY = b'{"detail":"A request with this Idempotency-Key is still being processed"}'
+BAD_KEY_BODY = b'{"detail":"Idempotency-Key must be 1-255 visible ASCII characters"}'
+REPLAYED = (b"idempotent-replayed", b"true")
+
+
+class Idempotency:
+    """
+    Shared state behind IdempotencyMiddleware: the store, the requests
+    currently running per key and the hit/miss counters for /metrics.
+    """
+
+    def __init__(self, store: IdempotencyStore, max_body: int = 64 * 1024, wait_timeout: float = 5.0) -> None:
+        self.store = store
+        self.max_body = max_body
+        self.wait_timeout = wait_timeout
+        self.inflight: Dict[str, asyncio.Future] = {}
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.conflicts = 0
+        self.mismatches = 0
+        self.stored = 0
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "Idempotency":
+        return cls(
+            build_idempotency_store(settings),
+            max_body=settings.idempotency_max_body,
+            wait_timeout=settings.idempotency_wait_timeout,
+        )
+
+    def close(self) -> None:
+        self.store.close()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.coalesced + self.misses
+        return {
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+            "conflicts": self.conflicts,
+            "mismatches": self.mismatches,
+            "stored": self.stored,
+            "entries": self.store.entries(),
+            "inflight": len(self.inflight),
+        }
+
+
+class IdempotencyMiddleware:
+    """
+    Idempotency-Key handling for POST on selected paths (pure ASGI).
+
+    - The first response for a key (anything but 5xx and transient 4xx such
+      as 429) is stored; a repeat gets it back, with `Idempotent-Replayed:
+      true`, without running the handler.
+    - Duplicates that arrive while the first is still running wait for it
+      and share its response. Across workers (SQLite store) they poll the
+      store for up to `wait_timeout`, then get 409.
+    - A key reused with a different body is answered 422.
+    - Requests without the header are untouched.
+
+    Add it inside the header/caching middlewares: stored responses hold only
+    what the handler sent, and replays go back out through the same stack.
+    """
+
+    def __init__(
+        self, app: ASGIApp, idempotency: Idempotency, paths: Sequence[str] = ("/api/contact", "/api/login")
+    ) -> None:
+        self.app = app
+        self.state = idempotency
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        raw_key = next((value for name, value in scope["headers"] if name == HEADER), None)
+        if raw_key is None:
+            await self.app(scope, receive, send)
+            return
+        if not 0 < len(raw_key) <= MAX_KEY_LENGTH or not all(0x21 <= c <= 0x7E for c in raw_key):
+            await send_response(send, 400, BAD_KEY_BODY)
+            return
+
+        state = self.state
+        body = await read_body(receive)
+        if body is None:
+            return
+        fingerprint = hashlib.sha256(body).hexdigest()
+        key = f"POST {scope['path']} {raw_key.decode('ascii')}"
+
+        inflight = state.inflight.get(key)
+        if inflight is not None:
+            state.coalesced += 1
+            # shield: a waiter that disconnects must not cancel the original.
+            await self._replay(send, await asyncio.shield(inflight), fingerprint)
+            return
+
+        # Registered before the first await so later duplicates queue behind it.
+        future = asyncio.get_running_loop().create_future()
+        state.inflight[key] = future
+        claimed = False
+        try:
+            stored = await state.store.get(key)
+            if stored is not None:
+                state.hits += 1
+                future.set_result(stored)
+                await self._replay(send, stored, fingerprint)
+                return
+            claimed = await state.store.claim(key)
+            if not claimed:
+                stored, claimed = await self._wait_elsewhere(key)
+                if not claimed:
+                    if stored is not None:
+                        state.hits += 1
+                    future.set_result(stored)
+                    await self._replay(send, stored, fingerprint)
+                    return
+            state.misses += 1
+            response = await self._execute(scope, replay_body(body, receive), send, fingerprint)
+            if self._storable(response):
+                await state.store.put(key, response)
+                state.stored += 1
+            else:
+                await state.store.release(key)
+            future.set_result(response)
+        except BaseException as exc:
+            if claimed:
+                await state.store.release(key)
+            if not future.done():
+                future.set_exception(exc)
+                future.exception()  # mark retrieved when nobody else is waiting
+            raise
+        finally:
+            del state.inflight[key]
+
+    async def _execute(self, scope: Scope, receive: Receive, send: Send, fingerprint: str) -> StoredResponse:
+        """Run the app, streaming to the client while keeping a copy."""
+        max_body = self.state.max_body
+        response = StoredResponse(fingerprint, 500, [], b"")
+        chunks: List[bytes] = []
+        size = 0
+
+        async def capture(message: Message) -> None:
+            nonlocal size
+            if message["type"] == "http.response.start":
+                response.status = message["status"]
+                response.headers = list(message.get("headers", ()))
+            elif message["type"] == "http.response.body" and size <= max_body:
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                chunks.append(chunk)
+            await send(message)
+
+        await self.app(scope, receive, capture)
+        response.body = b"".join(chunks) if size <= max_body else None
+        return response
+
+    def _storable(self, response: StoredResponse) -> bool:
+        return response.body is not None and response.status < 500 and response.status not in NOT_STORED
+
+    async def _wait_elsewhere(self, key: str) -> Tuple[Optional[StoredResponse], bool]:
+        """
+        Another worker holds the claim: poll for its stored response.
+        Returns (stored, False), (None, False) on timeout, or (None, True)
+        if the other worker gave up without storing and we now hold the claim.
+        """
+        store = self.state.store
+        deadline = time.monotonic() + self.state.wait_timeout
+        delay = 0.01
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            stored = await store.get(key)
+            if stored is not None:
+                return stored, False
+            if await store.claim(key):
+                return None, True
+            delay = min(delay * 2, 0.2)
+        return None, False
+
+    async def _replay(self, send: Send, response: Optional[StoredResponse], fingerprint: str) -> None:
+        state = self.state
+        if response is None:
+            state.conflicts += 1
+            await send_response(send, 409, IN_PROGRESS_BODY)
+            return
+        if response.fingerprint != fingerprint:
+            state.mismatches += 1
+            await send_response(send, 422, MISMATCH_BODY)
+            return
+        if response.body is None:  # too large to keep a copy of
+            state.conflicts += 1
+            await send_response(send, 409, IN_PROGRESS_BODY)
+            return
+        await send({"type": "http.response.start", "status": response.status, "headers": response.headers + [REPLAYED]})
+        await send({"type": "http.response.body", "body": response.body})
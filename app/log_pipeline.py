@@ -0,0 +1,274 @@
+# app/log_pipeline.py
+import logging
+import os
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import List, Sequence
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.fast_json import dumps_bytes
+from app.settings import Settings
+
+ACCESS_LOGGER = "qa.access"
+# Loggers routed through the pipeline (records stop propagating to root).
+PIPELINE_LOGGERS = ("app", "backend", ACCESS_LOGGER)
+
+# LogRecord attributes that are not user "extra" fields.
+_RESERVED = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+_exc_formatter = logging.Formatter()
+
+
+def _dumps(payload: dict) -> str:
+    return dumps_bytes(payload, default=str).decode("utf-8")
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, msg, extra fields, exc."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_text:
+            payload["exc"] = record.exc_text
+        return _dumps(payload)
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Producer side: never blocks the caller.
+
+    Records below WARNING are kept with probability `sample_rate`; anything
+    that does not fit in the bounded queue is dropped. Both are counted.
+    prepare() only resolves the message and traceback text, in place (the
+    pipeline loggers do not propagate, so no other handler sees the record);
+    JSON encoding and I/O happen on the listener thread. No handler lock is
+    taken: the queue is already thread-safe.
+    """
+
+    def __init__(self, q: "queue.Queue", sample_rate: float = 1.0) -> None:
+        super().__init__(q)
+        self.sample_rate = sample_rate
+        self._random = random.random
+        # Counters
+        self.enqueued = 0
+        self.dropped = 0
+        self.sampled_out = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.args:
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = _exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        rv = self.filter(record)
+        if not rv:
+            return False
+        self.emit(rv if isinstance(rv, logging.LogRecord) else record)
+        return True
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.levelno < logging.WARNING and self.sample_rate < 1.0 and self._random() >= self.sample_rate:
+            self.sampled_out += 1
+            return
+        try:
+            self.queue.put_nowait(self.prepare(record))
+        except queue.Full:
+            self.dropped += 1
+            return
+        except Exception:
+            self.handleError(record)
+            return
+        self.enqueued += 1
+
+
+class BatchStreamHandler(logging.StreamHandler):
+    """Listener side: formats a batch of records and writes it in one call."""
+
+    def __init__(self, stream=None) -> None:
+        super().__init__(stream if stream is not None else sys.stdout)
+        self.setFormatter(JsonFormatter())
+        # Counters
+        self.written = 0
+        self.batches = 0
+
+    def handle_batch(self, records: Sequence[logging.LogRecord]) -> None:
+        lines = [self.format(r) for r in records if r.levelno >= self.level]
+        if not lines:
+            return
+        self.acquire()
+        try:
+            self.stream.write("\n".join(lines) + "\n")
+            self.flush()
+        except Exception:
+            self.handleError(records[-1])
+        finally:
+            self.release()
+        self.written += len(lines)
+        self.batches += 1
+
+
+class BatchFileHandler(BatchStreamHandler, logging.FileHandler):
+    """BatchStreamHandler appending to a file (one write per batch, O_APPEND)."""
+
+    def __init__(self, path: str) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        logging.FileHandler.__init__(self, path, mode="a", encoding="utf-8")
+        self.setFormatter(JsonFormatter())
+        self.written = 0
+        self.batches = 0
+
+
+class BatchingQueueListener(QueueListener):
+    """
+    QueueListener that drains up to `batch_size` records per wake-up and
+    hands them to handlers as one batch (handle_batch() when available).
+    """
+
+    def __init__(self, q: "queue.Queue", *handlers: logging.Handler, batch_size: int = 256) -> None:
+        super().__init__(q, *handlers, respect_handler_level=True)
+        self.batch_size = batch_size
+        self._stop_next = False
+
+    def dequeue(self, block: bool):
+        if self._stop_next:
+            self._stop_next = False
+            return self._sentinel
+        first = self.queue.get(block)
+        if first is self._sentinel:
+            return first
+        batch = [first]
+        while len(batch) < self.batch_size:
+            try:
+                record = self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if record is self._sentinel:
+                self._stop_next = True
+                break
+            batch.append(record)
+        return batch
+
+    def handle(self, batch: List[logging.LogRecord]) -> None:
+        for handler in self.handlers:
+            if hasattr(handler, "handle_batch"):
+                handler.handle_batch(batch)
+            else:
+                for record in batch:
+                    if record.levelno >= handler.level:
+                        handler.handle(record)
+
+    def enqueue_sentinel(self) -> None:
+        # The queue may be full; wait for room rather than raising.
+        self.queue.put(self._sentinel, timeout=5)
+
+
+class LogPipeline:
+    """
+    Non-blocking logging for the app, backend and access loggers.
+
+    Callers only enqueue (BoundedQueueHandler); a QueueListener thread
+    JSON-encodes records and writes them in batches to `log_file` (or
+    stdout). start() attaches the handler to PIPELINE_LOGGERS, stop()
+    detaches it and flushes whatever is still queued.
+    """
+
+    def __init__(self, settings: Settings, stream=None) -> None:
+        self.level = logging.getLevelName(settings.log_level.upper())
+        self.queue: "queue.Queue" = queue.Queue(maxsize=settings.log_queue_size)
+        self.handler = BoundedQueueHandler(self.queue, sample_rate=settings.log_sample_rate)
+        self.sink = BatchFileHandler(settings.log_file) if settings.log_file else BatchStreamHandler(stream)
+        self.listener = BatchingQueueListener(self.queue, self.sink, batch_size=settings.log_batch_size)
+        self._saved: List[tuple] = []
+
+    def start(self) -> None:
+        if self._saved:
+            return
+        self.listener.start()
+        for name in PIPELINE_LOGGERS:
+            logger = logging.getLogger(name)
+            self._saved.append((logger, logger.level, logger.propagate))
+            logger.addHandler(self.handler)
+            logger.setLevel(self.level)
+            logger.propagate = False
+
+    def stop(self) -> None:
+        if not self._saved:
+            return
+        for logger, level, propagate in self._saved:
+            logger.removeHandler(self.handler)
+            logger.setLevel(level)
+            logger.propagate = propagate
+        self._saved = []
+        self.listener.stop()
+        self.sink.close()
+
+    def stats(self) -> dict:
+        return {
+            "enqueued": self.handler.enqueued,
+            "dropped": self.handler.dropped,
+            "sampled_out": self.handler.sampled_out,
+            "written": self.sink.written,
+            "batches": self.sink.batches,
+            "queue_depth": self.queue.qsize(),
+        }
+
+
+class AccessLogMiddleware:
+    """
+    Pure ASGI access log: one `qa.access` record per request (sampled by
+    `sample_rate` before anything is built), sent through the LogPipeline.
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float = 1.0) -> None:
+        self.app = app
+        self.sample_rate = sample_rate
+        self.log = logging.getLogger(ACCESS_LOGGER)
+        self._random = random.random
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or (self.sample_rate < 1.0 and self._random() >= self.sample_rate):
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            client = scope.get("client")
+            self.log.info(
+                "%s %s %d",
+                scope["method"],
+                scope["path"],
+                status,
+                extra={
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 3),
+                    "client": client[0] if client else None,
+                },
+            )
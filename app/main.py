@@ -1,11 +1,29 @@
 # app/main.py
-from typing import Literal
+from contextlib import asynccontextmanager
+from typing import List, Literal, Optional
 
-from fastapi import FastAPI, Request, Response
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, EmailStr
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel, EmailStr, ValidationError
 
-app = FastAPI(title="QA Automation API", version="0.1.0", redirect_slashes=False)
+from app.cache_policy import CachePolicyMiddleware
+from app.capture import TrafficCapture, TrafficCaptureMiddleware
+from app.contact_queue import ContactPipeline
+from app.contact_search import ContactSearch
+from app.contacts_api import contacts_router
+from app.docs_cache import DocsCache, DocsCacheMiddleware
+from app.fast_json import RawJSONResponse, fast_response_class
+from app.idempotency import Idempotency, IdempotencyMiddleware
+from app.log_pipeline import AccessLogMiddleware, LogPipeline
+from app.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Metrics, MetricsMiddleware
+from app.middleware import SecurityHeadersMiddleware
+from app.ndjson import iter_ndjson_lines
+from app.outbox import OutboxWorker
+from app.profiler import LoopLagMonitor, SlowRequestProfiler, SlowRequestProfilerMiddleware
+from app.readiness import Readiness
+from app.settings import Settings
+from app.shedding import LoadShedder, LoadSheddingMiddleware
+from app.timing import ServerTiming, ServerTimingMiddleware, TimedRoute
 
 
 # ---------- Models ----------
@@ -34,78 +52,329 @@ class ContactOut(BaseModel):
     ok: bool = True
 
 
-# ---------- Security headers middleware ----------
-@app.middleware("http")
-async def security_headers(request: Request, call_next):
-    """
-    Add a minimal set of security headers.
-    - X-Content-Type-Options: prevent MIME sniffing
-    - COOP/COEP/CORP: useful for Spectre isolation; keep strict in dev
-    - Cache-Control: no-store to silence ZAP "storable content" in dev
-      (tweak for prod as needed, e.g., static assets can be cached).
-    """
-    resp: Response = await call_next(request)
-    resp.headers.setdefault("X-Content-Type-Options", "nosniff")
-    resp.headers.setdefault("Cross-Origin-Opener-Policy", "same-origin")
-    resp.headers.setdefault("Cross-Origin-Embedder-Policy", "require-corp")
-    resp.headers.setdefault("Cross-Origin-Resource-Policy", "same-origin")
-    resp.headers.setdefault("Cache-Control", "no-store")
-    return resp
-
-
-# ---------- API endpoints ----------
-@app.post(
-    "/api/login",
-    response_model=LoginOut,
-    tags=["API"],
-    summary="Login",
-    # Document 401 so Schemathesis doesn't fail on unauthorized cases
-    responses={
-        401: {
-            "description": "Unauthorized - Invalid credentials",
-            "model": ErrorMessage,
-        }
-    },
-)
-async def login(payload: LoginIn) -> LoginOut:
-    """
-    Dummy login: returns a static bearer token for testing purposes.
-    In real implementations you may return 401 when credentials are invalid.
-    """
-    return LoginOut(access_token="fake-token-for-tests")
+class ServiceBusy(BaseModel):
+    detail: str = "Contact queue is full, retry later"
 
 
-@app.post("/api/contact", response_model=ContactOut, tags=["API"], summary="Contact")
-async def contact(payload: ContactIn) -> ContactOut:
-    """
-    Accept a contact message and return a simple OK response.
-    """
-    # In real life, enqueue/send email, persist, etc.
-    return ContactOut(ok=True)
+class LineError(BaseModel):
+    line: int
+    error: str
+
+
+class ContactBatchOut(BaseModel):
+    accepted: int = 0
+    rejected: int = 0
+    # At most QA_CONTACT_BATCH_MAX_ERRORS entries; `rejected` has the full count
+    errors: List[LineError] = []
+    errors_truncated: bool = False
 
 
-# ---------- Utility endpoints (out of schema or simple) ----------
-@app.get("/health", tags=["Utility"], summary="Health check")
-async def health() -> dict:
-    """Simple liveness probe for monitors & CI."""
-    return {"status": "ok"}
+FAKE_TOKEN = "fake-token-for-tests"
 
+# Constant responses, encoded once. In fast mode handlers return these bytes
+# directly and response_model is only used for the docs.
+LOGIN_OK_BODY = LoginOut(access_token=FAKE_TOKEN).model_dump_json().encode("utf-8")
+CONTACT_OK_BODY = ContactOut(ok=True).model_dump_json().encode("utf-8")
 
-@app.get("/sitemap.xml", include_in_schema=False)
-async def sitemap() -> Response:
+
+NDJSON = "application/x-ndjson"
+
+
+def _line_error(exc: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, e['loc'])) or 'body'}: {e['msg']}" for e in exc.errors(include_url=False)
+    )
+
+
+# ---------- Application factory ----------
+def create_app(
+    settings: Optional[Settings] = None, *, contact_pipeline: Optional[ContactPipeline] = None
+) -> FastAPI:
     """
-    Minimal sitemap to avoid 404s in scanners.
-    Served with no-store to keep ZAP happy in dev.
+    Build a fully wired app. `settings` defaults to Settings.from_env();
+    `contact_pipeline` can be injected (tests, benchmarks).
+    Per-app components are also exposed on `app.state`.
     """
-    xml = """<?xml version="1.0" encoding="UTF-8"?>
+    settings = settings or Settings.from_env()
+    contact_pipeline = contact_pipeline or ContactPipeline(settings)
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        if log_pipeline is not None:
+            log_pipeline.start()
+        if capture is not None:
+            capture.start()
+        # Docs/schema are rendered on first use unless asked for up front.
+        if settings.docs_prebuild:
+            docs_cache.build()
+        await contact_pipeline.start()
+        if outbox is not None:
+            await outbox.start()
+        if loop_monitor is not None:
+            loop_monitor.start()
+        await readiness.start()  # first snapshot before the first probe
+        yield
+        # /ready answers 503 from here on; then drain pending contacts.
+        await readiness.stop()
+        await contact_pipeline.stop()
+        if outbox is not None:
+            await outbox.stop()
+        contact_search.close()
+        idempotency.close()
+        if loop_monitor is not None:
+            await loop_monitor.stop()
+        if profiler is not None:
+            profiler.close()
+        if capture is not None:
+            capture.stop()  # writes what is still queued
+        if log_pipeline is not None:
+            log_pipeline.stop()  # flushes queued records
+
+    app = FastAPI(
+        title="QA Automation API",
+        version="0.1.0",
+        redirect_slashes=False,
+        lifespan=lifespan,
+        # Fast mode: orjson/msgspec when installed. Does not change the OpenAPI output.
+        default_response_class=fast_response_class() if settings.fast_mode else JSONResponse,
+    )
+    if settings.timing_enabled:
+        # Per-stage timestamps; must be set before the routes are declared.
+        app.router.route_class = TimedRoute
+    docs_cache = DocsCache(app)
+    metrics = Metrics(multiproc_dir=settings.metrics_multiproc_dir)
+    idempotency = Idempotency.from_settings(settings)
+    shedder = LoadShedder(settings)
+    contact_search = ContactSearch(settings.contact_db_path, settings.contact_search_pool_size)
+    outbox = OutboxWorker(settings) if settings.outbox_enabled else None
+    readiness = Readiness(settings, contact_pipeline, outbox_enabled=outbox is not None)
+    loop_monitor = LoopLagMonitor(settings.loop_monitor_interval) if settings.loop_monitor_enabled else None
+    profiler = SlowRequestProfiler(settings) if settings.profile_enabled else None
+    log_pipeline = LogPipeline(settings) if settings.log_enabled else None
+    capture = TrafficCapture(settings) if settings.capture_enabled else None
+    metrics.add_collector("qa_contact", contact_pipeline.stats)
+    metrics.add_collector("qa_contact_search", contact_search.stats)
+    metrics.add_collector("qa_idempotency", idempotency.stats)
+    metrics.add_exposition(shedder.render)
+    if outbox is not None:
+        metrics.add_collector("qa_outbox", outbox.stats)
+    metrics.add_collector("qa_readiness", readiness.stats)
+    if loop_monitor is not None:
+        metrics.add_collector("qa_event_loop", loop_monitor.stats)
+        metrics.add_exposition(loop_monitor.render)
+    if profiler is not None:
+        metrics.add_collector("qa_profiler", profiler.stats)
+    if log_pipeline is not None:
+        metrics.add_collector("qa_logging", log_pipeline.stats)
+    if capture is not None:
+        metrics.add_collector("qa_capture", capture.stats)
+
+    app.state.settings = settings
+    app.state.contact_pipeline = contact_pipeline
+    app.state.contact_search = contact_search
+    app.state.outbox = outbox
+    app.state.readiness = readiness
+    app.state.docs_cache = docs_cache
+    app.state.metrics = metrics
+    app.state.idempotency = idempotency
+    app.state.shedder = shedder
+    app.state.loop_monitor = loop_monitor
+    app.state.profiler = profiler
+    app.state.log_pipeline = log_pipeline
+    app.state.capture = capture
+
+    # ---------- Middleware (last added = outermost) ----------
+    # Idempotency-Key on POST /api/contact and /api/login: replay the first response.
+    app.add_middleware(IdempotencyMiddleware, idempotency=idempotency)
+    # Docs/schema served from memory (gzip/br + ETag/304), rebuilt on route changes.
+    app.add_middleware(DocsCacheMiddleware, cache=docs_cache)
+    # In-flight cap per route class; fast 503 + Retry-After once queue time
+    # stays above target. Probes and /metrics are never queued or shed.
+    app.add_middleware(LoadSheddingMiddleware, shedder=shedder)
+    # Cache-Control per route (see CACHE_POLICY_TABLE); static GETs get ETag/304.
+    app.add_middleware(CachePolicyMiddleware)
+
+    # Pure ASGI: headers are encoded once at startup and injected into the
+    # `http.response.start` message (setdefault semantics, streaming-safe).
+    app.add_middleware(SecurityHeadersMiddleware)
+    if settings.timing_enabled:
+        # Server-Timing + X-Request-ID; sampled JSON log lines for slow requests.
+        server_timing = ServerTiming(settings)
+        metrics.add_collector("qa_timing", server_timing.stats)
+        app.state.server_timing = server_timing
+        app.add_middleware(ServerTimingMiddleware, timing=server_timing)
+    if profiler is not None:
+        # Stack samples of requests slower than QA_PROFILE_SLOW_MS -> .folded files.
+        app.add_middleware(SlowRequestProfilerMiddleware, profiler=profiler)
+    if settings.access_log:
+        # One JSON access record per request, through the log pipeline.
+        app.add_middleware(AccessLogMiddleware, sample_rate=settings.access_log_sample_rate)
+    if capture is not None:
+        # Sampled, redacted request log (JSONL) for tests/perf/replay.py.
+        app.add_middleware(TrafficCaptureMiddleware, capture=capture)
+    # Per-route counts / in-flight / latency histograms; outermost to time everything.
+    app.add_middleware(MetricsMiddleware, metrics=metrics, routes=app.router.routes)
+
+    # ---------- API endpoints ----------
+    @app.post(
+        "/api/login",
+        response_model=LoginOut,
+        tags=["API"],
+        summary="Login",
+        # Document 401 so Schemathesis doesn't fail on unauthorized cases
+        responses={
+            401: {
+                "description": "Unauthorized - Invalid credentials",
+                "model": ErrorMessage,
+            },
+        },
+    )
+    async def login(payload: LoginIn) -> LoginOut:
+        """
+        Dummy login: returns a static bearer token for testing purposes.
+        In real implementations you may return 401 when credentials are invalid.
+        Nothing fails here, so there is no failed-login throttle either
+        (backend.app, which checks passwords, has one).
+        """
+        if settings.fast_mode:
+            return RawJSONResponse(LOGIN_OK_BODY)
+        return LoginOut(access_token=FAKE_TOKEN)
+
+    @app.post(
+        "/api/contact",
+        response_model=ContactOut,
+        tags=["API"],
+        summary="Contact",
+        responses={
+            503: {
+                "description": "Service Unavailable - contact queue full (see Retry-After)",
+                "model": ServiceBusy,
+            }
+        },
+    )
+    async def contact(payload: ContactIn) -> ContactOut:
+        """
+        Accept a contact message and return a simple OK response.
+        The message is handed to the batched SQLite writer; nothing blocks here.
+        E-mail delivery (QA_OUTBOX_ENABLED) happens later, from the outbox.
+        """
+        if not contact_pipeline.submit(payload.name, str(payload.email), payload.message):
+            raise HTTPException(
+                status_code=503,
+                detail=ServiceBusy().detail,
+                headers={"Retry-After": str(settings.contact_retry_after)},
+            )
+        if settings.fast_mode:
+            return RawJSONResponse(CONTACT_OK_BODY)
+        return ContactOut(ok=True)
+
+    @app.post(
+        "/api/contact/batch",
+        response_model=ContactBatchOut,
+        tags=["API"],
+        summary="Contact (bulk NDJSON)",
+        openapi_extra={
+            "requestBody": {
+                "required": True,
+                "description": "One ContactIn JSON object per line.",
+                "content": {NDJSON: {"schema": {"type": "string"}}},
+            }
+        },
+        responses={415: {"description": "Unsupported Media Type - send application/x-ndjson"}},
+    )
+    async def contact_batch(request: Request) -> ContactBatchOut:
+        """
+        Bulk version of /api/contact for the form aggregator.
+        The body is parsed and validated line by line as it streams in and every
+        valid record goes to the same pipeline as the single-item endpoint.
+        """
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        if content_type != NDJSON:
+            raise HTTPException(status_code=415, detail=f"Expected {NDJSON}")
+
+        summary = ContactBatchOut()
+        max_errors = settings.contact_batch_max_errors
+
+        def reject(lineno: int, error: str) -> None:
+            summary.rejected += 1
+            if len(summary.errors) < max_errors:
+                summary.errors.append(LineError(line=lineno, error=error))
+            else:
+                summary.errors_truncated = True
+
+        lines = iter_ndjson_lines(request.stream(), settings.contact_batch_max_line_bytes)
+        async for lineno, line in lines:
+            if line is None:
+                reject(lineno, f"line longer than {settings.contact_batch_max_line_bytes} bytes")
+                continue
+            try:
+                item = ContactIn.model_validate_json(line)
+            except ValidationError as exc:
+                reject(lineno, _line_error(exc))
+                continue
+            if await contact_pipeline.submit_wait(
+                item.name, str(item.email), item.message, settings.contact_batch_enqueue_timeout
+            ):
+                summary.accepted += 1
+            else:
+                reject(lineno, ServiceBusy().detail)
+        return summary
+
+    # Admin search / export over the persisted contacts (QA_ADMIN_TOKEN).
+    app.include_router(contacts_router(contact_search, settings, route_class=app.router.route_class))
+
+    # ---------- Utility endpoints (out of schema or simple) ----------
+    @app.get("/health", tags=["Utility"], summary="Health check")
+    async def health() -> dict:
+        """Simple liveness probe for monitors & CI."""
+        return {"status": "ok"}
+
+    @app.get(
+        "/ready",
+        tags=["Utility"],
+        summary="Readiness check",
+        responses={503: {"description": "Not ready (see `checks`), starting or stopping"}},
+    )
+    async def ready() -> Response:
+        """
+        Dependency snapshot (SQLite writable, contact queue depth, event-loop
+        lag, outbox backlog) refreshed in the background every
+        QA_READY_INTERVAL seconds; 200 when every check passes, else 503.
+        """
+        status, body = readiness.response()
+        return RawJSONResponse(body, status_code=status)
+
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics_endpoint() -> PlainTextResponse:
+        """Prometheus text exposition of the in-process metrics."""
+        return PlainTextResponse(metrics.render(), media_type=METRICS_CONTENT_TYPE)
+
+    @app.get("/sitemap.xml", include_in_schema=False)
+    async def sitemap() -> Response:
+        """
+        Minimal sitemap to avoid 404s in scanners.
+        Cache headers (public + ETag/Last-Modified) come from CACHE_POLICY_TABLE.
+        """
+        xml = """<?xml version="1.0" encoding="UTF-8"?>
 <urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
   <url><loc>http://localhost:8000/</loc></url>
   <url><loc>http://localhost:8000/docs</loc></url>
 </urlset>"""
-    return Response(content=xml, media_type="application/xml", headers={"Cache-Control": "no-store"})
+        return Response(content=xml, media_type="application/xml")
+
+    # Optional root for friendliness (not required)
+    @app.get("/", include_in_schema=False)
+    async def root() -> JSONResponse:
+        return JSONResponse({"message": "QA Automation API is up"})
+
+    return app
 
 
-# Optional root for friendliness (not required)
-@app.get("/", include_in_schema=False)
-async def root() -> JSONResponse:
-    return JSONResponse({"message": "QA Automation API is up"})
+# Module-level app for `uvicorn app.main:app`, the Schemathesis job and the tests.
+# Built on first access so `python -m app` (factory mode) and plain imports
+# don't construct an app nobody serves.
+def __getattr__(name: str):
+    if name == "app":
+        globals()["app"] = instance = create_app()
+        return instance
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,251 @@
+# app/metrics.py
+import glob
+import json
+import mmap
+import os
+from bisect import bisect_left
+from time import perf_counter
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Latency buckets in seconds (upper bounds; +Inf is implicit).
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATUS_CLASSES = ("1xx", "2xx", "3xx", "4xx", "5xx")
+UNMATCHED = "<unmatched>"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Multiprocess files: a fixed-size JSON header, then the float64 array.
+HEADER_SIZE = 4096
+FILE_MAGIC = b"QAM1"
+
+
+class Metrics:
+    """
+    Per-route request metrics kept in one preallocated float64 array.
+
+    Layout (R routes x C status classes x B buckets):
+      [requests R*C][in_flight R][duration_sum R*C][buckets R*C*B]
+
+    Recording is a handful of indexed increments on a memoryview -- no dict
+    or object allocation per request. With `multiproc_dir` set, the array is
+    an mmap'ed file per worker (metrics_<pid>.bin) and render() sums every
+    file in the directory, so any uvicorn worker can answer /metrics.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS, multiproc_dir: str = "") -> None:
+        self.buckets = tuple(buckets)
+        self.multiproc_dir = multiproc_dir
+        self.templates: List[str] = [UNMATCHED]
+        self.route_ids: Dict[str, int] = {UNMATCHED: 0}
+        self.values: Optional[memoryview] = None
+        self._mmap: Optional[mmap.mmap] = None
+        self._collectors: List[Tuple[str, Callable[[], dict]]] = []
+        self._expositions: List[Callable[[], List[str]]] = []
+
+    # ---------- Setup ----------
+    def configure(self, templates: Iterable[str]) -> None:
+        """Allocate storage for a fixed set of route templates (idempotent)."""
+        if self.values is not None:
+            return
+        self.templates = [UNMATCHED] + sorted(set(templates) - {UNMATCHED})
+        self.route_ids = {t: i for i, t in enumerate(self.templates)}
+        n_routes, n_classes, n_buckets = len(self.templates), len(STATUS_CLASSES), len(self.buckets) + 1
+        self._nb = n_buckets
+        self._inflight_off = n_routes * n_classes
+        self._sum_off = self._inflight_off + n_routes
+        self._bucket_off = self._sum_off + n_routes * n_classes
+        size = self._bucket_off + n_routes * n_classes * n_buckets
+        if self.multiproc_dir:
+            self.values = self._open_mmap(size)
+        else:
+            self.values = memoryview(bytearray(size * 8)).cast("d")
+
+    def _header(self) -> bytes:
+        return json.dumps({"routes": self.templates, "buckets": self.buckets}).encode("utf-8")
+
+    def _open_mmap(self, size: int) -> memoryview:
+        os.makedirs(self.multiproc_dir, exist_ok=True)
+        path = os.path.join(self.multiproc_dir, f"metrics_{os.getpid()}.bin")
+        header = FILE_MAGIC + self._header()
+        if len(header) > HEADER_SIZE:
+            raise ValueError("too many routes for the metrics file header")
+        with open(path, "w+b") as fh:
+            fh.write(header.ljust(HEADER_SIZE, b"\0"))
+            fh.truncate(HEADER_SIZE + size * 8)
+            self._mmap = mmap.mmap(fh.fileno(), HEADER_SIZE + size * 8)
+        return memoryview(self._mmap)[HEADER_SIZE:].cast("d")
+
+    def add_collector(self, prefix: str, stats: Callable[[], dict]) -> None:
+        """Export a process-local stats() dict as `<prefix>_<key>` gauges."""
+        self._collectors.append((prefix, stats))
+
+    def add_exposition(self, render: Callable[[], List[str]]) -> None:
+        """Append process-local, ready-made exposition lines (labels, histograms)."""
+        self._expositions.append(render)
+
+    # ---------- Hot path ----------
+    def observe(self, route: int, status: int, seconds: float) -> None:
+        cls = status // 100 - 1
+        if cls < 0 or cls > 4:
+            cls = 4
+        cell = route * 5 + cls
+        v = self.values
+        v[cell] += 1
+        v[self._sum_off + cell] += seconds
+        v[self._bucket_off + cell * self._nb + bisect_left(self.buckets, seconds)] += 1
+
+    def in_flight(self, route: int, delta: int) -> None:
+        self.values[self._inflight_off + route] += delta
+
+    # ---------- Export ----------
+    def _snapshots(self) -> Iterable[Tuple[List[str], Sequence[float], bool]]:
+        """(templates, values, alive) for this process or every worker file."""
+        if not self.multiproc_dir:
+            if self.values is not None:
+                yield self.templates, self.values, True
+            return
+        for path in sorted(glob.glob(os.path.join(self.multiproc_dir, "metrics_*.bin"))):
+            with open(path, "rb") as fh:
+                data = fh.read()
+            if not data.startswith(FILE_MAGIC) or len(data) <= HEADER_SIZE:
+                continue
+            header = json.loads(data[len(FILE_MAGIC):HEADER_SIZE].rstrip(b"\0"))
+            if tuple(header["buckets"]) != self.buckets:
+                continue
+            pid = int(os.path.basename(path)[len("metrics_"):-len(".bin")])
+            yield header["routes"], memoryview(data[HEADER_SIZE:]).cast("d"), _pid_alive(pid)
+
+    def render(self) -> str:
+        n_classes, nb = len(STATUS_CLASSES), len(self.buckets) + 1
+        requests: Dict[Tuple[str, int], float] = {}
+        sums: Dict[Tuple[str, int], float] = {}
+        hist: Dict[Tuple[str, int], List[float]] = {}
+        in_flight: Dict[str, float] = {}
+
+        for templates, v, alive in self._snapshots():
+            n_routes = len(templates)
+            inflight_off = n_routes * n_classes
+            sum_off = inflight_off + n_routes
+            bucket_off = sum_off + n_routes * n_classes
+            for r, template in enumerate(templates):
+                if alive:
+                    in_flight[template] = in_flight.get(template, 0.0) + v[inflight_off + r]
+                else:
+                    in_flight.setdefault(template, 0.0)
+                for c in range(n_classes):
+                    cell = r * n_classes + c
+                    if not v[cell]:
+                        continue
+                    key = (template, c)
+                    requests[key] = requests.get(key, 0.0) + v[cell]
+                    sums[key] = sums.get(key, 0.0) + v[sum_off + cell]
+                    counts = hist.setdefault(key, [0.0] * nb)
+                    base = bucket_off + cell * nb
+                    for b in range(nb):
+                        counts[b] += v[base + b]
+
+        lines = [
+            "# HELP qa_http_requests_total HTTP requests by route template and status class.",
+            "# TYPE qa_http_requests_total counter",
+        ]
+        for (template, c), value in sorted(requests.items()):
+            lines.append(f'qa_http_requests_total{{route="{template}",status="{STATUS_CLASSES[c]}"}} {value:g}')
+
+        lines += [
+            "# HELP qa_http_requests_in_flight HTTP requests currently being served.",
+            "# TYPE qa_http_requests_in_flight gauge",
+        ]
+        for template, value in sorted(in_flight.items()):
+            lines.append(f'qa_http_requests_in_flight{{route="{template}"}} {value:g}')
+
+        lines += [
+            "# HELP qa_http_request_duration_seconds HTTP request latency by route template and status class.",
+            "# TYPE qa_http_request_duration_seconds histogram",
+        ]
+        bounds = [f"{b:g}" for b in self.buckets] + ["+Inf"]
+        for (template, c), counts in sorted(hist.items()):
+            labels = f'route="{template}",status="{STATUS_CLASSES[c]}"'
+            cumulative = 0.0
+            for le, count in zip(bounds, counts):
+                cumulative += count
+                lines.append(f'qa_http_request_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative:g}')
+            lines.append(f"qa_http_request_duration_seconds_sum{{{labels}}} {sums[(template, c)]:.9g}")
+            lines.append(f"qa_http_request_duration_seconds_count{{{labels}}} {requests[(template, c)]:g}")
+
+        for prefix, stats in self._collectors:
+            for key, value in stats().items():
+                lines.append(f"# TYPE {prefix}_{key} gauge")
+                lines.append(f"{prefix}_{key} {value:.9g}")
+        for render in self._expositions:
+            lines += render()
+        return "\n".join(lines) + "\n"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class RouteIndex:
+    """Path -> route template id, resolved before the router runs."""
+
+    def __init__(self, routes: Sequence, route_ids: Dict[str, int]) -> None:
+        self.exact: Dict[str, int] = {}
+        self.patterns = []
+        for route in routes:
+            path = getattr(route, "path", None)
+            if path is None or path not in route_ids:
+                continue
+            if "{" in path or not hasattr(route, "endpoint"):
+                self.patterns.append((route.path_regex, route_ids[path]))
+            else:
+                self.exact.setdefault(path, route_ids[path])
+
+    def lookup(self, path: str) -> int:
+        route = self.exact.get(path)
+        if route is not None:
+            return route
+        for regex, route in self.patterns:
+            if regex.match(path):
+                return route
+        return 0
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware feeding a Metrics instance; add it outermost."""
+
+    def __init__(self, app: ASGIApp, metrics: Metrics, routes: Sequence) -> None:
+        self.app = app
+        self.metrics = metrics
+        metrics.configure(getattr(r, "path") for r in routes if hasattr(r, "path"))
+        self.index = RouteIndex(routes, metrics.route_ids)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = self.metrics
+        route = self.index.lookup(scope["path"])
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.in_flight(route, 1)
+        started = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            metrics.observe(route, status, perf_counter() - started)
+            metrics.in_flight(route, -1)
@@ -0,0 +1,103 @@
+# app/middleware.py
+from typing import Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Minimal set of security headers:
+# - X-Content-Type-Options: prevent MIME sniffing
+# - COOP/COEP/CORP: useful for Spectre isolation; keep strict in dev
+# Cache-Control is owned by the per-route table in app/cache_policy.py.
+SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "Cross-Origin-Opener-Policy": "same-origin",
+    "Cross-Origin-Embedder-Policy": "require-corp",
+    "Cross-Origin-Resource-Policy": "same-origin",
+}
+
+
+def encode_headers(headers: Mapping[str, str]) -> List[Tuple[bytes, bytes]]:
+    """Encode a header mapping into ASGI raw headers (lower-cased names)."""
+    return [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in headers.items()]
+
+
+class SecurityHeadersMiddleware:
+    """
+    Pure ASGI replacement for the old BaseHTTPMiddleware hook.
+
+    - Headers are encoded once, when the middleware is built.
+    - Only the `http.response.start` message is touched; body messages
+      (including streaming responses) pass straight through.
+    - setdefault semantics: a header already set by the endpoint wins.
+    """
+
+    def __init__(self, app: ASGIApp, headers: Mapping[str, str] = SECURITY_HEADERS) -> None:
+        self.app = app
+        self.raw_headers = encode_headers(headers)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        raw_headers = self.raw_headers
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = merge_headers(message.get("headers", ()), raw_headers)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+def merge_headers(
+    existing: Iterable[Tuple[bytes, bytes]], defaults: List[Tuple[bytes, bytes]]
+) -> List[Tuple[bytes, bytes]]:
+    """Return `existing` plus every default whose name is not already present."""
+    headers = list(existing)
+    present = {name.lower() for name, _ in headers}
+    headers.extend(item for item in defaults if item[0] not in present)
+    return headers
+
+
+# ---------- Helpers for middlewares that need the request body ----------
+async def read_body(receive: Receive) -> Optional[bytes]:
+    """The whole request body, or None if the client disconnected first."""
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            return None
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+def replay_body(body: bytes, receive: Receive) -> Receive:
+    """A receive() that hands `body` to the app once, then defers to the real one."""
+    replayed = False
+
+    async def replay() -> Message:
+        nonlocal replayed
+        if not replayed:
+            replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return replay
+
+
+async def send_response(
+    send: Send, status: int, body: bytes, headers: Sequence[Tuple[bytes, bytes]] = (),
+    media_type: bytes = b"application/json",
+) -> None:
+    """Send a complete, already-encoded response."""
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", media_type),
+            (b"content-length", str(len(body)).encode("latin-1")),
+            *headers,
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
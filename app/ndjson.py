@@ -0,0 +1,45 @@
+# app/ndjson.py
+from typing import AsyncIterator, Optional, Tuple
+
+
+async def iter_ndjson_lines(
+    chunks: AsyncIterator[bytes], max_line_bytes: int
+) -> AsyncIterator[Tuple[int, Optional[bytes]]]:
+    """
+    Split a streamed body into (line_number, line) pairs, 1-based.
+
+    Only the current partial line is buffered, so memory stays bounded by
+    `max_line_bytes` whatever the upload size. Lines longer than that are
+    yielded as (line_number, None) and their bytes are discarded. Blank
+    lines are skipped but still counted.
+    """
+    buffer = bytearray()
+    lineno = 0
+    oversized = False
+    async for chunk in chunks:
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end < 0:
+                if not oversized:
+                    buffer += chunk[start:]
+                    if len(buffer) > max_line_bytes:
+                        oversized = True
+                        buffer.clear()
+                break
+            lineno += 1
+            if oversized:
+                oversized = False
+                yield lineno, None
+            else:
+                buffer += chunk[start:end]
+                if len(buffer) > max_line_bytes:
+                    yield lineno, None
+                elif buffer.strip():
+                    yield lineno, bytes(buffer)
+            buffer.clear()
+            start = end + 1
+    if oversized:
+        yield lineno + 1, None
+    elif buffer.strip():
+        yield lineno + 1, bytes(buffer)
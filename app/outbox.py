@@ -0,0 +1,383 @@
+# app/outbox.py
+import asyncio
+import binascii
+import logging
+import random
+import re
+import smtplib
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from email.header import Header
+from email.utils import formatdate
+from typing import Dict, List, Optional, Tuple
+
+from app.contact_queue import open_db
+from app.settings import Settings
+
+log = logging.getLogger(__name__)
+
+# (contact_id, attempts so far, name, email, message, created_at)
+OutboxItem = Tuple[int, int, str, str, str, float]
+# (contact_id, error or None, permanent failure)
+SendResult = Tuple[int, Optional[str], bool]
+
+# Rows come from the contacts_outbox_insert trigger (app.contact_queue), i.e.
+# in the writer's transaction; nothing is added on the request path. The
+# trigger only exists while the outbox is enabled.
+# A claim pushes next_attempt_at out by the lease, so other workers skip the
+# rows and a crashed worker's batch is picked up again once it expires.
+CLAIM_SQL = """
+UPDATE contact_outbox SET next_attempt_at = ?
+WHERE contact_id IN (
+    SELECT contact_id FROM contact_outbox
+    WHERE status = 'pending' AND next_attempt_at <= ?
+    ORDER BY next_attempt_at LIMIT ?
+)
+RETURNING contact_id, attempts
+"""
+SENT_SQL = "UPDATE contact_outbox SET status = 'sent', attempts = attempts + 1, last_error = NULL WHERE contact_id = ?"
+RETRY_SQL = "UPDATE contact_outbox SET attempts = attempts + 1, next_attempt_at = ?, last_error = ? WHERE contact_id = ?"
+DEAD_SQL = "UPDATE contact_outbox SET status = 'dead', attempts = attempts + 1, last_error = ? WHERE contact_id = ?"
+# Oldest pending row (claimed rows included: their lease is their next attempt).
+# Served by the contact_outbox_due partial index, so it stays O(1) however long the backlog.
+OLDEST_PENDING_SQL = "SELECT min(next_attempt_at) FROM contact_outbox WHERE status = 'pending'"
+
+_LEADING_DOT = re.compile(rb"(?m)^\.")
+_BARE_EOL = re.compile(rb"\r\n|\r|\n")
+
+
+# ---------- SMTP ----------
+class PipeliningSMTP(smtplib.SMTP):
+    """smtplib.SMTP plus send_pipelined(): one round trip for MAIL/RCPT/DATA."""
+
+    def send_pipelined(self, from_addr: str, to_addrs: List[str], msg: bytes) -> None:
+        """
+        Like sendmail(), but when the server advertises PIPELINING (RFC 2920)
+        MAIL FROM, every RCPT TO and DATA go out in one write and their
+        replies are read afterwards: two round trips per message instead of
+        3 + recipients. Raises the same exceptions as sendmail().
+        """
+        self.ehlo_or_helo_if_needed()
+        if not self.has_extn("pipelining"):
+            self.sendmail(from_addr, to_addrs, msg)
+            return
+        commands = [f"MAIL FROM:{smtplib.quoteaddr(from_addr)}"]
+        commands += [f"RCPT TO:{smtplib.quoteaddr(addr)}" for addr in to_addrs]
+        commands.append("DATA")
+        self.send("".join(c + "\r\n" for c in commands))
+
+        mail_reply = self.getreply()
+        refused = {}
+        for addr in to_addrs:
+            code, resp = self.getreply()
+            if code not in (250, 251):
+                refused[addr] = (code, resp)
+        data_code, data_resp = self.getreply()
+        if data_code == 354 and (mail_reply[0] != 250 or len(refused) == len(to_addrs)):
+            self.close()  # the server wants a body for a transaction we are abandoning
+        if mail_reply[0] != 250:
+            raise smtplib.SMTPSenderRefused(mail_reply[0], mail_reply[1], from_addr)
+        if len(refused) == len(to_addrs):
+            raise smtplib.SMTPRecipientsRefused(refused)
+        if data_code != 354:
+            raise smtplib.SMTPDataError(data_code, data_resp)
+
+        body = _LEADING_DOT.sub(b"..", _BARE_EOL.sub(b"\r\n", msg))
+        if not body.endswith(b"\r\n"):
+            body += b"\r\n"
+        self.send(body + b".\r\n")
+        code, resp = self.getreply()
+        if code != 250:
+            raise smtplib.SMTPDataError(code, resp)
+        if refused:
+            raise smtplib.SMTPRecipientsRefused(refused)
+
+
+def _is_permanent(exc: Exception) -> bool:
+    """5xx replies (and messages we cannot even build) will not get better with retries."""
+    if isinstance(exc, ValueError):
+        return True
+    if isinstance(exc, smtplib.SMTPRecipientsRefused):
+        return all(500 <= code < 600 for code, _ in exc.recipients.values())
+    code = getattr(exc, "smtp_code", 0)
+    return 500 <= code < 600
+
+
+def _header(value: str) -> str:
+    """Header value as ASCII: RFC 2047 encoded words when it is not already."""
+    if value.isascii():
+        return value
+    return Header(value, "utf-8").encode(linesep="\r\n")
+
+
+def build_message(settings: Settings, item: OutboxItem) -> bytes:
+    """
+    The notification e-mail, formatted by hand: the email package's
+    EmailMessage takes ~1.7 ms per message, more than sending it.
+    Plain text, UTF-8, quoted-printable (7-bit clean for any relay).
+    """
+    contact_id, _, name, email, message, created_at = item
+    name = " ".join(name.split())[:100]  # no header injection via CR/LF
+    domain = settings.outbox_from.rpartition("@")[2] or "localhost"
+    received = datetime.fromtimestamp(created_at, timezone.utc).isoformat()
+    body = f"From: {name} <{email}>\nReceived: {received}\n\n{message}\n"
+    body = body.replace("\r\n", "\n").replace("\r", "\n")
+    headers = (
+        f"From: {settings.outbox_from}\r\n"
+        f"To: {settings.outbox_to}\r\n"
+        f"Reply-To: {email}\r\n"
+        f"Subject: {_header('Contact form: ' + name)}\r\n"
+        f"Date: {formatdate(created_at)}\r\n"
+        # Stable across retries, so a duplicate after a lost reply can be spotted.
+        f"Message-ID: <contact-{contact_id}@{domain}>\r\n"
+        "MIME-Version: 1.0\r\n"
+        "Content-Type: text/plain; charset=utf-8\r\n"
+        "Content-Transfer-Encoding: quoted-printable\r\n"
+        "\r\n"
+    )
+    return headers.encode("utf-8") + binascii.b2a_qp(body.encode("utf-8")).replace(b"\n", b"\r\n")
+
+
+class SmtpSender:
+    """
+    Sends on a small pool of threads, each keeping one SMTP connection open
+    across messages and batches (`reuse=False`: connect per message). A
+    connection the server dropped while idle is reopened once per message.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self.settings = settings
+        self.host = settings.outbox_smtp_host
+        self.port = settings.outbox_smtp_port
+        self.timeout = settings.outbox_smtp_timeout
+        self.reuse = settings.outbox_reuse_connections
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._conns: List[PipeliningSMTP] = []
+        # Counters
+        self.connections_opened = 0
+
+    def _connect(self) -> PipeliningSMTP:
+        conn = PipeliningSMTP(self.host, self.port, timeout=self.timeout)
+        conn.ehlo_or_helo_if_needed()
+        with self._lock:
+            self.connections_opened += 1
+            if self.reuse:
+                self._conns.append(conn)
+        return conn
+
+    def _drop(self, conn: PipeliningSMTP) -> None:
+        with self._lock:
+            if conn in self._conns:
+                self._conns.remove(conn)
+        try:
+            conn.close()
+        except OSError:
+            pass
+        self._local.conn = None
+
+    def _deliver(self, item: OutboxItem, msg: bytes) -> None:
+        to_addrs = [self.settings.outbox_to]
+        if not self.reuse:
+            conn = self._connect()
+            try:
+                conn.send_pipelined(self.settings.outbox_from, to_addrs, msg)
+            finally:
+                try:
+                    conn.quit()
+                except (smtplib.SMTPException, OSError):
+                    conn.close()
+            return
+        for attempt in (1, 2):
+            conn = getattr(self._local, "conn", None)
+            fresh = conn is None
+            if fresh:
+                conn = self._local.conn = self._connect()
+            try:
+                conn.send_pipelined(self.settings.outbox_from, to_addrs, msg)
+                return
+            except smtplib.SMTPServerDisconnected:
+                self._drop(conn)
+                if fresh or attempt == 2:
+                    raise
+            except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+                try:
+                    conn.rset()  # only this message failed; keep the connection
+                except (smtplib.SMTPException, OSError):
+                    self._drop(conn)
+                raise
+            except OSError:
+                self._drop(conn)
+                raise
+
+    def send_many(self, items: List[OutboxItem]) -> List[SendResult]:
+        """Runs on a sender thread; never raises."""
+        results = []
+        for item in items:
+            try:
+                self._deliver(item, build_message(self.settings, item))
+            except (smtplib.SMTPException, OSError, ValueError) as exc:
+                results.append((item[0], f"{type(exc).__name__}: {exc}"[:500], _is_permanent(exc)))
+            else:
+                results.append((item[0], None, False))
+        return results
+
+    def close(self) -> None:
+        with self._lock:
+            conns, self._conns = self._conns, []
+        for conn in conns:
+            try:
+                conn.quit()
+            except (smtplib.SMTPException, OSError):
+                conn.close()
+        self._local = threading.local()
+
+
+# ---------- Worker ----------
+class OutboxWorker:
+    """
+    Delivers contact messages by e-mail, entirely off the request path.
+
+    A background task claims due `contact_outbox` rows in batches, sends them
+    over `outbox_connections` persistent SMTP connections (pipelined when the
+    server allows it) and records the outcome: sent, retried later with
+    exponential backoff plus jitter, or `dead` after `outbox_max_attempts`
+    tries or a permanent (5xx) refusal. Delivery is at-least-once.
+    """
+
+    def __init__(self, settings: Settings, sender: Optional[SmtpSender] = None) -> None:
+        self.settings = settings
+        self.db_path = settings.contact_db_path
+        self.batch_size = settings.outbox_batch_size
+        self.poll_interval = settings.outbox_poll_interval
+        self.connections = settings.outbox_connections
+        self.sender = sender or SmtpSender(settings)
+        self._db_executor: Optional[ThreadPoolExecutor] = None
+        self._smtp_executor: Optional[ThreadPoolExecutor] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._random = random.random
+        # Counters
+        self.claimed = 0
+        self.sent = 0
+        self.retried = 0
+        self.dead = 0
+        self.batches = 0
+        self.last_batch_seconds = 0.0
+
+    # ---------- Lifecycle ----------
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._db_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="outbox-db")
+        self._smtp_executor = ThreadPoolExecutor(max_workers=self.connections, thread_name_prefix="outbox-smtp")
+        loop = asyncio.get_running_loop()
+        self._conn = await loop.run_in_executor(self._db_executor, open_db, self.db_path, True)
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="contact-outbox")
+
+    async def stop(self) -> None:
+        """Let the batch in flight finish (its rows would be re-sent otherwise), then close."""
+        if self._task is None:
+            return
+        self._stopping.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout=self.settings.outbox_smtp_timeout * 2)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._smtp_executor, self.sender.close)
+        await loop.run_in_executor(self._db_executor, self._conn.close)
+        self._smtp_executor.shutdown(wait=True)
+        self._db_executor.shutdown(wait=True)
+        self._smtp_executor = self._db_executor = self._conn = None
+
+    # ---------- Loop ----------
+    async def _run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                count = await self.run_once()
+            except sqlite3.Error:
+                log.exception("outbox batch failed")
+                count = 0
+            if count < self.batch_size:  # caught up: wait for new rows
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def run_once(self) -> int:
+        """Claim, send and record one batch; returns how many rows it had."""
+        loop = asyncio.get_running_loop()
+        batch = await loop.run_in_executor(self._db_executor, self._claim)
+        if not batch:
+            return 0
+        started = time.perf_counter()
+        chunks = [batch[i::self.connections] for i in range(min(self.connections, len(batch)))]
+        sent = await asyncio.gather(
+            *(loop.run_in_executor(self._smtp_executor, self.sender.send_many, chunk) for chunk in chunks)
+        )
+        results = [r for chunk in sent for r in chunk]
+        attempts = {item[0]: item[1] for item in batch}
+        await loop.run_in_executor(self._db_executor, self._record, results, attempts)
+        self.batches += 1
+        self.last_batch_seconds = time.perf_counter() - started
+        return len(batch)
+
+    # ---------- SQLite (db thread) ----------
+    def _claim(self) -> List[OutboxItem]:
+        now = time.time()
+        with self._conn:
+            claimed = self._conn.execute(CLAIM_SQL, (now + self.settings.outbox_lease, now, self.batch_size)).fetchall()
+            if not claimed:
+                return []
+            attempts = dict(claimed)
+            marks = ",".join("?" * len(attempts))
+            rows = self._conn.execute(
+                f"SELECT id, name, email, message, created_at FROM contacts WHERE id IN ({marks}) ORDER BY id",
+                list(attempts),
+            ).fetchall()
+        self.claimed += len(rows)
+        return [(r[0], attempts[r[0]], r[1], r[2], r[3], r[4]) for r in rows]
+
+    def backoff(self, attempts: int) -> float:
+        """Seconds before try number `attempts + 1`: exponential, capped, 50-100% jitter."""
+        delay = min(self.settings.outbox_backoff_max, self.settings.outbox_backoff_base * 2 ** (attempts - 1))
+        return delay * (0.5 + self._random() / 2)
+
+    def _record(self, results: List[SendResult], attempts: Dict[int, int]) -> None:
+        now = time.time()
+        sent, retry, dead = [], [], []
+        for contact_id, error, permanent in results:
+            tries = attempts.get(contact_id, 0) + 1
+            if error is None:
+                sent.append((contact_id,))
+            elif permanent or tries >= self.settings.outbox_max_attempts:
+                dead.append((error, contact_id))
+                log.warning("contact %d e-mail dead after %d attempt(s): %s", contact_id, tries, error)
+            else:
+                retry.append((now + self.backoff(tries), error, contact_id))
+        with self._conn:
+            self._conn.executemany(SENT_SQL, sent)
+            self._conn.executemany(RETRY_SQL, retry)
+            self._conn.executemany(DEAD_SQL, dead)
+        self.sent += len(sent)
+        self.retried += len(retry)
+        self.dead += len(dead)
+
+    def stats(self) -> dict:
+        return {
+            "claimed": self.claimed,
+            "sent": self.sent,
+            "retried": self.retried,
+            "dead": self.dead,
+            "batches": self.batches,
+            "connections_opened": self.sender.connections_opened,
+            "last_batch_seconds": self.last_batch_seconds,
+        }
@@ -0,0 +1,168 @@
+# app/passwords.py
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from app.settings import Settings
+
+# scrypt cost: ~50-70 ms of CPU and 16 MiB per check on a typical core.
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+HASH_BYTES = 32
+
+
+# ---------- Hash format ----------
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode("ascii").rstrip("=")
+
+
+def _unb64(text: str) -> bytes:
+    return base64.b64decode(text + "=" * (-len(text) % 4))
+
+
+def hash_password(password: str, *, n: int = SCRYPT_N, r: int = SCRYPT_R, p: int = SCRYPT_P) -> str:
+    """Encode as `scrypt$<n>$<r>$<p>$<salt>$<hash>` (unpadded base64)."""
+    salt = os.urandom(16)
+    digest = hashlib.scrypt(
+        password.encode("utf-8"), salt=salt, n=n, r=r, p=p, maxmem=130 * n * r, dklen=HASH_BYTES
+    )
+    return f"scrypt${n}${r}${p}${_b64(salt)}${_b64(digest)}"
+
+
+def verify_password(password: str, encoded: str) -> bool:
+    """Constant-time check of `password` against a hash_password() string."""
+    try:
+        scheme, n, r, p, salt, expected = encoded.split("$")
+        if scheme != "scrypt":
+            return False
+        n, r, p = int(n), int(r), int(p)
+        digest = hashlib.scrypt(
+            password.encode("utf-8"), salt=_unb64(salt), n=n, r=r, p=p,
+            maxmem=130 * n * r, dklen=len(_unb64(expected)),
+        )
+    except (ValueError, TypeError):
+        return False
+    return hmac.compare_digest(digest, _unb64(expected))
+
+
+# Unknown users are checked against this so they cost the same as known ones.
+# Precomputed: hashing at import time would slow every worker boot.
+DUMMY_HASH = "scrypt$16384$8$1$7kjzG+y94a7jU3Hn8te7Rg$O78tqHaYldpAH06oaCV6F+TF3nL8JIwNqFrQmY7YA7E"
+
+
+# ---------- Off-loop verification ----------
+class VerifierBusy(Exception):
+    """Too many checks pending, or this one waited longer than allowed."""
+
+
+class CredentialVerifier:
+    """
+    Runs password checks on a dedicated, size-limited thread pool.
+
+    - At most `login_max_pending` checks may be queued or running; beyond
+      that verify() raises VerifierBusy straight away (handlers answer 503).
+    - A check that sat in the pool queue longer than `login_max_queue_seconds`
+      is dropped without hashing; its client has likely given up already.
+    - Successful checks are remembered for `login_cache_ttl` seconds, keyed
+      by an HMAC (per-process random key) of username, password and stored
+      hash, so a repeated login skips scrypt and a password change
+      invalidates the entry. Failures are never cached.
+
+    Starlette's shared threadpool (sync endpoints, file responses) is never
+    used, so a login flood cannot starve the rest of the app.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self.workers = settings.login_workers
+        self.max_pending = settings.login_max_pending
+        self.max_queue_seconds = settings.login_max_queue_seconds
+        self.cache_ttl = settings.login_cache_ttl
+        self.cache_size = settings.login_cache_size
+        self._key = os.urandom(32)
+        self._cache: "OrderedDict[bytes, float]" = OrderedDict()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.pending = 0
+        # Counters
+        self.checks = 0
+        self.cache_hits = 0
+        self.rejected_busy = 0
+        self.queue_timeouts = 0
+        self.check_seconds_total = 0.0
+
+    # ---------- Request path ----------
+    async def verify(self, username: str, password: str, encoded: Optional[str]) -> bool:
+        """True if `password` matches `encoded` (None = unknown user)."""
+        key = None
+        if encoded is not None and self.cache_ttl > 0:
+            key = hmac.digest(self._key, f"{username}\0{password}\0{encoded}".encode("utf-8"), "sha256")
+            expires = self._cache.get(key)
+            if expires is not None:
+                if expires > time.monotonic():
+                    self.cache_hits += 1
+                    return True
+                del self._cache[key]
+
+        if self.pending >= self.max_pending:
+            self.rejected_busy += 1
+            raise VerifierBusy()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="login-verify")
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                self._executor, self._check, password, encoded or DUMMY_HASH, time.monotonic()
+            )
+        finally:
+            self.pending -= 1
+        if result is None:
+            self.queue_timeouts += 1
+            raise VerifierBusy()
+        matches, seconds = result
+        self.checks += 1
+        self.check_seconds_total += seconds
+        ok = matches and encoded is not None
+        if ok and key is not None:
+            self._remember(key)
+        return ok
+
+    def _check(self, password: str, encoded: str, enqueued: float) -> Optional[Tuple[bool, float]]:
+        """Pool thread body: (matches, seconds spent) or None if it queued too long."""
+        started = time.monotonic()
+        if started - enqueued > self.max_queue_seconds:
+            return None
+        return verify_password(password, encoded), time.monotonic() - started
+
+    def _remember(self, key: bytes) -> None:
+        cache = self._cache
+        cache[key] = time.monotonic() + self.cache_ttl
+        cache.move_to_end(key)
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+    # ---------- Lifecycle ----------
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self._cache.clear()
+
+    # ---------- Introspection ----------
+    def stats(self) -> dict:
+        return {
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "checks": self.checks,
+            "cache_hits": self.cache_hits,
+            "cache_entries": len(self._cache),
+            "rejected_busy": self.rejected_busy,
+            "queue_timeouts": self.queue_timeouts,
+            "check_seconds_total": self.check_seconds_total,
+        }
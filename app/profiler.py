@@ -0,0 +1,301 @@
+# app/profiler.py
+import asyncio
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter, deque
+from types import FrameType
+from typing import Deque, Dict, List, Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.settings import Settings
+
+log = logging.getLogger(__name__)
+
+# Event-loop lag buckets in seconds (upper bounds; +Inf is implicit).
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+PROFILE_SUFFIX = ".folded"
+_UNSAFE = re.compile(r"[^A-Za-z0-9]+")
+
+
+# ---------- Event-loop lag ----------
+class LoopLagMonitor:
+    """
+    Sleeps `interval` seconds in a loop and records how late it wakes up.
+
+    Lag is time the loop could not run ready callbacks: blocking calls in
+    async code, long CPU bursts, GC pauses. Kept as a histogram plus the
+    last and max values.
+    """
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+        # Counters
+        self.ticks = 0
+        self.lag_last = 0.0
+        self.lag_max = 0.0
+        self.lag_sum = 0.0
+        self.lag_counts = [0] * (len(LAG_BUCKETS) + 1)
+
+    def observe(self, lag: float) -> None:
+        self.ticks += 1
+        self.lag_last = lag
+        self.lag_max = max(self.lag_max, lag)
+        self.lag_sum += lag
+        self.lag_counts[bisect_left(LAG_BUCKETS, lag)] += 1
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        interval = self.interval
+        while True:
+            started = loop.time()
+            await asyncio.sleep(interval)
+            self.observe(max(0.0, loop.time() - started - interval))
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict:
+        return {"ticks": self.ticks, "lag_last_seconds": self.lag_last, "lag_max_seconds": self.lag_max}
+
+    def render(self) -> List[str]:
+        """Prometheus lines: the lag histogram."""
+        lines = [
+            "# HELP qa_event_loop_lag_seconds How late the event loop woke up from a fixed-interval sleep.",
+            "# TYPE qa_event_loop_lag_seconds histogram",
+        ]
+        cumulative = 0
+        bounds = [f"{b:g}" for b in LAG_BUCKETS] + ["+Inf"]
+        for le, count in zip(bounds, self.lag_counts):
+            cumulative += count
+            lines.append(f'qa_event_loop_lag_seconds_bucket{{le="{le}"}} {cumulative}')
+        lines.append(f"qa_event_loop_lag_seconds_sum {self.lag_sum:.9g}")
+        lines.append(f"qa_event_loop_lag_seconds_count {self.ticks}")
+        return lines
+
+
+# ---------- Slow-request profiler ----------
+def _frame_name(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def _thread_stack(frame: Optional[FrameType]) -> List[str]:
+    """Root-first names of a thread's frames."""
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    names.reverse()
+    return names
+
+
+def _await_chain(coro) -> Optional[List[str]]:
+    """
+    Root-first names along a suspended coroutine's await chain, ending with
+    what it waits on; None if the coroutine is running right now.
+    """
+    names = []
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) or getattr(coro, "ag_frame", None)
+        if frame is None:
+            names.append(f"<{type(coro).__name__}>")
+            break
+        if getattr(coro, "cr_running", False) or getattr(coro, "gi_running", False):
+            return None
+        names.append(_frame_name(frame))
+        coro = (
+            getattr(coro, "cr_await", None)
+            or getattr(coro, "gi_yieldfrom", None)
+            or getattr(coro, "ag_await", None)
+        )
+    return names
+
+
+class _Tracked:
+    __slots__ = ("label", "started", "wall", "task", "thread_id", "status", "samples")
+
+    def __init__(self, label: str, task: Optional[asyncio.Task]) -> None:
+        self.label = label
+        self.started = time.monotonic()
+        self.wall = time.time()
+        self.task = task
+        self.thread_id = threading.get_ident()
+        self.status = 0
+        self.samples: Counter = Counter()
+
+
+class SlowRequestProfiler:
+    """
+    Statistical stack sampler for requests slower than `slow_ms`.
+
+    A daemon thread wakes every `sample_interval` seconds while some request
+    has been running past the threshold and records its stack: the event
+    loop thread's real stack if the request is executing (e.g. blocking
+    the loop), else the await chain it is suspended on. Nothing is sampled
+    for fast requests.
+
+    When a sampled request finishes, its samples are written to
+    `<dir>/<time>-<pid>-<method>-<path>-<ms>ms.folded` in collapsed-stack
+    format ("frame;frame;frame count"), which flamegraph.pl, inferno and
+    speedscope read directly. Only the newest `max_files` profiles are
+    kept. File I/O happens on the sampler thread, never on the event loop.
+    """
+
+    def __init__(self, settings: Settings) -> None:
+        self.slow = settings.profile_slow_ms / 1000
+        self.sample_interval = settings.profile_sample_interval
+        self.directory = settings.profile_dir
+        self.max_files = settings.profile_max_files
+        self._tracked: Dict[int, _Tracked] = {}
+        self._done: Deque[_Tracked] = deque()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._closing = False
+        # Counters
+        self.slow_requests = 0
+        self.samples = 0
+        self.written = 0
+
+    # ---------- Loop side ----------
+    def track(self, scope: Scope) -> _Tracked:
+        tracked = _Tracked(f"{scope['method']} {scope['path']}", asyncio.current_task())
+        idle = not self._tracked
+        self._tracked[id(tracked)] = tracked
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="qa-profiler", daemon=True)
+            self._thread.start()
+        if idle:
+            # Otherwise the sampler is already in a timed wait that ends no
+            # later than this request can become slow.
+            self._wake.set()
+        return tracked
+
+    def finish(self, tracked: _Tracked, status: int) -> None:
+        self._tracked.pop(id(tracked), None)
+        tracked.status = status
+        if time.monotonic() - tracked.started >= self.slow:
+            self.slow_requests += 1
+            self._done.append(tracked)  # written (if sampled) by the sampler thread
+            self._wake.set()
+
+    def close(self) -> None:
+        """Stop the sampler thread after it wrote pending profiles."""
+        self._closing = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self._closing = False
+
+    # ---------- Sampler thread ----------
+    def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            while self._tracked or self._done:
+                self._sample()
+                self._flush()
+                if self._closing and not self._done:
+                    break
+                self._wake.wait(self._next_wait())
+                self._wake.clear()
+            if self._closing:
+                return
+            self._wake.wait()
+
+    def _next_wait(self) -> float:
+        tracked = list(self._tracked.values())
+        if not tracked:
+            return self.sample_interval
+        due = min(t.started for t in tracked) + self.slow - time.monotonic()
+        return max(self.sample_interval, due)
+
+    def _sample(self) -> None:
+        now = time.monotonic()
+        slow = [t for t in list(self._tracked.values()) if now - t.started >= self.slow]
+        if not slow:
+            return
+        frames = sys._current_frames()
+        for tracked in slow:
+            chain = None
+            if tracked.task is not None and not tracked.task.done():
+                chain = _await_chain(tracked.task.get_coro())
+            if chain is None:  # running on the loop thread right now
+                chain = _thread_stack(frames.get(tracked.thread_id))
+            tracked.samples[";".join([tracked.label] + chain)] += 1
+            self.samples += 1
+
+    def _flush(self) -> None:
+        while self._done:
+            tracked = self._done.popleft()
+            if tracked.samples:
+                try:
+                    self._write(tracked)
+                except OSError as exc:
+                    log.warning("could not write profile for %s: %s", tracked.label, exc)
+
+    def _write(self, tracked: _Tracked) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        elapsed_ms = int((time.monotonic() - tracked.started) * 1000)
+        stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(tracked.wall)) + f".{int(tracked.wall * 1000) % 1000:03d}"
+        name = _UNSAFE.sub("_", tracked.label).strip("_")[:80]
+        path = os.path.join(
+            self.directory, f"{stamp}-{os.getpid()}-{name}-{tracked.status}-{elapsed_ms}ms{PROFILE_SUFFIX}"
+        )
+        with open(path, "w", encoding="utf-8") as fh:
+            for stack, count in tracked.samples.most_common():
+                fh.write(f"{stack} {count}\n")
+        self.written += 1
+        self._rotate()
+
+    def _rotate(self) -> None:
+        profiles = sorted(f for f in os.listdir(self.directory) if f.endswith(PROFILE_SUFFIX))
+        for old in profiles[:-self.max_files] if self.max_files > 0 else ():
+            try:
+                os.remove(os.path.join(self.directory, old))
+            except OSError:
+                pass  # another worker got there first
+
+    def stats(self) -> dict:
+        return {"slow_requests": self.slow_requests, "samples": self.samples, "profiles_written": self.written}
+
+
+class SlowRequestProfilerMiddleware:
+    """Pure ASGI: registers every HTTP request with a SlowRequestProfiler."""
+
+    def __init__(self, app: ASGIApp, profiler: SlowRequestProfiler) -> None:
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        tracked = self.profiler.track(scope)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.profiler.finish(tracked, status)
@@ -0,0 +1,190 @@
+# app/readiness.py
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Tuple
+
+from app.contact_queue import open_db
+from app.outbox import OLDEST_PENDING_SQL
+from app.settings import Settings
+
+log = logging.getLogger(__name__)
+
+# (HTTP status, encoded JSON body) -- what GET /ready sends as is.
+Snapshot = Tuple[int, bytes]
+
+STARTING: Snapshot = (503, b'{"status":"starting"}')
+STOPPING: Snapshot = (503, b'{"status":"stopping"}')
+STALE: Snapshot = (503, b'{"status":"stale"}')
+
+
+class Readiness:
+    """
+    Dependency checks behind GET /ready, run off the request path.
+
+    A background task re-runs every check each `ready_interval` seconds and
+    encodes the outcome once; a probe just returns the latest (status, body)
+    pair, so probing costs the same however often it happens and never
+    touches SQLite. Checks:
+
+      sqlite         the contacts database grants a write lock (BEGIN
+                     IMMEDIATE / ROLLBACK) within `ready_sqlite_timeout`
+      contact_queue  queue depth below `ready_queue_max_ratio` of capacity
+      event_loop     the refresh task woke up less than `ready_max_loop_lag` late
+      outbox         (when enabled) the oldest pending e-mail has been due for
+                     less than `ready_max_outbox_delay` seconds
+
+    Any failing check -> 503. A snapshot older than two intervals plus the
+    SQLite timeout (refresh task stuck or dead) is reported as 503 "stale".
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        contact_pipeline,
+        outbox_enabled: bool = False,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.db_path = settings.contact_db_path
+        self.interval = settings.ready_interval
+        self.sqlite_timeout = settings.ready_sqlite_timeout
+        self.queue_max_ratio = settings.ready_queue_max_ratio
+        self.max_loop_lag = settings.ready_max_loop_lag
+        self.max_outbox_delay = settings.ready_max_outbox_delay
+        self.stale_after = 2 * self.interval + self.sqlite_timeout
+        self.contact_pipeline = contact_pipeline
+        self.outbox_enabled = outbox_enabled
+        self.clock = clock
+        self._snapshot: Snapshot = STARTING
+        self._refreshed_at: Optional[float] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+        # Counters
+        self.refreshes = 0
+        self.not_ready = 0
+        self.refresh_seconds_last = 0.0
+        self.refresh_seconds_max = 0.0
+
+    # ---------- Request path ----------
+    def response(self) -> Snapshot:
+        """Latest snapshot; O(1), nothing is checked or encoded here."""
+        if self._refreshed_at is not None and self.clock() - self._refreshed_at > self.stale_after:
+            return STALE
+        return self._snapshot
+
+    # ---------- Lifecycle ----------
+    async def start(self) -> None:
+        """Run the checks once (so the first probe gets real data), then every interval."""
+        if self._task is not None:
+            return
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="readiness")
+        await self.refresh()
+        self._task = asyncio.create_task(self._run(), name="readiness")
+
+    async def stop(self) -> None:
+        """Report 503 "stopping" from here on, then stop the checks."""
+        self._snapshot, self._refreshed_at = STOPPING, None
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._executor is not None:
+            await asyncio.get_running_loop().run_in_executor(self._executor, self._close_db)
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.interval)
+            await self.refresh(lag=max(0.0, loop.time() - started - self.interval))
+
+    # ---------- Checks ----------
+    async def refresh(self, lag: float = 0.0) -> None:
+        """Run every check and swap in a new encoded snapshot."""
+        started = time.perf_counter()
+        checks: Dict[str, dict] = {}
+        # Wait a little past the busy timeout: a hung filesystem must not stall
+        # the refresh loop (the thread finishes in the background). asyncio.wait,
+        # not wait_for: on 3.11 wait_for can swallow the cancel sent by stop().
+        db_check = asyncio.get_running_loop().run_in_executor(self._executor, self._check_db)
+        done, _ = await asyncio.wait({db_check}, timeout=self.sqlite_timeout + 1.0)
+        if done:
+            checks.update(db_check.result())
+        else:
+            checks["sqlite"] = {"ok": False, "error": "timed out"}
+        checks["contact_queue"] = self._check_queue()
+        checks["event_loop"] = {"ok": lag <= self.max_loop_lag, "lag_ms": round(lag * 1000, 1)}
+        ready = all(check["ok"] for check in checks.values())
+        body = json.dumps(
+            {
+                "status": "ready" if ready else "not_ready",
+                "checked_at": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+                "checks": checks,
+            },
+            separators=(",", ":"),
+        ).encode()
+        self._snapshot = (200 if ready else 503, body)
+        self._refreshed_at = self.clock()
+        self.refreshes += 1
+        if not ready:
+            self.not_ready += 1
+        elapsed = time.perf_counter() - started
+        self.refresh_seconds_last = elapsed
+        self.refresh_seconds_max = max(self.refresh_seconds_max, elapsed)
+
+    def _check_queue(self) -> dict:
+        stats = self.contact_pipeline.stats()
+        depth, capacity = stats.get("queue_depth", 0), stats.get("queue_capacity", 0)
+        limit = int(capacity * self.queue_max_ratio)
+        return {"ok": capacity <= 0 or depth < limit, "depth": depth, "limit": limit}
+
+    def _check_db(self) -> Dict[str, dict]:
+        """SQLite (and outbox) checks; runs on the readiness thread."""
+        checks: Dict[str, dict] = {}
+        started = time.perf_counter()
+        try:
+            conn = self._db()
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("ROLLBACK")
+            checks["sqlite"] = {"ok": True, "ms": round((time.perf_counter() - started) * 1000, 2)}
+            if self.outbox_enabled:
+                oldest = conn.execute(OLDEST_PENDING_SQL).fetchone()[0]
+                delay = 0.0 if oldest is None else max(0.0, time.time() - oldest)
+                checks["outbox"] = {"ok": delay < self.max_outbox_delay, "oldest_due_seconds": round(delay, 1)}
+        except (sqlite3.Error, OSError) as exc:
+            log.warning("readiness: contacts database check failed: %s", exc)
+            self._close_db()  # reopen next time (file recreated, disk remounted...)
+            checks["sqlite"] = {"ok": False, "error": f"{type(exc).__name__}: {exc}"}
+            if self.outbox_enabled:
+                checks["outbox"] = {"ok": False, "error": "database unavailable"}
+        return checks
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = open_db(self.db_path)
+            conn.isolation_level = None  # explicit BEGIN / ROLLBACK only
+            conn.execute(f"PRAGMA busy_timeout={int(self.sqlite_timeout * 1000)}")
+            self._conn = conn
+        return self._conn
+
+    def _close_db(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # ---------- Introspection ----------
+    def stats(self) -> dict:
+        return {
+            "ready": 1 if self.response()[0] == 200 else 0,
+            "refreshes": self.refreshes,
+            "not_ready": self.not_ready,
+            "refresh_seconds_last": self.refresh_seconds_last,
+            "refresh_seconds_max": self.refresh_seconds_max,
+        }
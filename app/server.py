@@ -0,0 +1,175 @@
+# app/server.py
+"""
+Production launcher behind `python -m app`.
+
+Everything comes from Settings (QA_* environment variables):
+  - uvloop / httptools when installed (QA_LOOP / QA_HTTP = auto)
+  - one worker per available CPU (QA_WORKERS=0)
+  - keep-alive, backlog, concurrency and max-requests limits
+  - graceful-shutdown timeout
+  - optional SO_REUSEPORT: each worker binds its own socket and the kernel
+    balances connections between them (QA_REUSE_PORT=1, Linux/BSD)
+
+`python -m app --profile-startup` prints a cold-start breakdown instead
+of serving (see app/startup.py).
+"""
+import argparse
+import importlib.util
+import logging
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import time
+from dataclasses import replace
+from typing import List, Optional, Sequence
+
+import uvicorn
+
+from app.settings import ENV_PREFIX, Settings
+
+log = logging.getLogger("app.server")
+
+
+def _installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def resolve_loop(choice: str) -> str:
+    if choice != "auto":
+        return choice
+    return "uvloop" if _installed("uvloop") else "asyncio"
+
+
+def resolve_http(choice: str) -> str:
+    if choice != "auto":
+        return choice
+    return "httptools" if _installed("httptools") else "h11"
+
+
+def worker_count(requested: int) -> int:
+    if requested > 0:
+        return requested
+    if hasattr(os, "sched_getaffinity"):  # honours cgroup/taskset CPU pinning
+        return max(1, len(os.sched_getaffinity(0)))
+    return max(1, os.cpu_count() or 1)
+
+
+def uvicorn_options(settings: Settings) -> dict:
+    """Keyword arguments for uvicorn.Config / uvicorn.run (minus workers)."""
+    return {
+        "host": settings.host,
+        "port": settings.port,
+        "factory": settings.app_factory,
+        "loop": resolve_loop(settings.loop),
+        "http": resolve_http(settings.http),
+        "backlog": settings.backlog,
+        "timeout_keep_alive": settings.keepalive_timeout,
+        "limit_concurrency": settings.limit_concurrency or None,
+        "limit_max_requests": settings.limit_max_requests or None,
+        "timeout_graceful_shutdown": settings.graceful_timeout,
+        # The apps write their own access log through app.log_pipeline.
+        "access_log": not settings.access_log,
+    }
+
+
+def _reuseport_socket(settings: Settings) -> socket.socket:
+    family = socket.AF_INET6 if ":" in settings.host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((settings.host, settings.port))
+    return sock
+
+
+def _serve_reuseport(settings: Settings) -> None:
+    """Worker process body for reuse-port mode."""
+    sock = _reuseport_socket(settings)
+    config = uvicorn.Config(settings.app_target, **uvicorn_options(settings))
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def _supervise_reuseport(settings: Settings, workers: int) -> None:
+    ctx = multiprocessing.get_context("spawn")
+    stopping = False
+
+    def spawn() -> multiprocessing.Process:
+        proc = ctx.Process(target=_serve_reuseport, args=(settings,), name="qa-worker")
+        proc.start()
+        return proc
+
+    def stop(signum, _frame) -> None:
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    procs: List[multiprocessing.Process] = [spawn() for _ in range(workers)]
+    while not stopping:
+        time.sleep(0.5)
+        for i, proc in enumerate(procs):
+            if not proc.is_alive() and not stopping:
+                log.warning("worker %s exited with %s; restarting", proc.pid, proc.exitcode)
+                procs[i] = spawn()
+
+    for proc in procs:
+        if proc.is_alive():
+            os.kill(proc.pid, signal.SIGTERM)  # uvicorn's graceful shutdown
+    deadline = time.monotonic() + settings.graceful_timeout + 5
+    for proc in procs:
+        proc.join(max(0.0, deadline - time.monotonic()))
+        if proc.is_alive():
+            proc.kill()
+
+
+def run(settings: Settings) -> None:
+    workers = worker_count(settings.workers)
+    shared = None
+    if workers > 1 and not settings.metrics_multiproc_dir:
+        # Workers must share metrics files for /metrics to add up.
+        shared = tempfile.mkdtemp(prefix="qa-metrics-")
+        os.environ[ENV_PREFIX + "METRICS_MULTIPROC_DIR"] = shared
+        settings = replace(settings, metrics_multiproc_dir=shared)
+    try:
+        _run(settings, workers)
+    finally:
+        if shared:
+            shutil.rmtree(shared, ignore_errors=True)
+
+
+def _run(settings: Settings, workers: int) -> None:
+    options = uvicorn_options(settings)
+    log.info(
+        "starting %s on %s:%s with %d worker(s), loop=%s, http=%s, reuse_port=%s",
+        settings.app_target, settings.host, settings.port, workers,
+        options["loop"], options["http"], settings.reuse_port,
+    )
+    if settings.reuse_port and workers > 1:
+        if hasattr(socket, "SO_REUSEPORT"):
+            _supervise_reuseport(settings, workers)
+            return
+        log.warning("SO_REUSEPORT is not available here; falling back to a shared socket")
+    uvicorn.run(settings.app_target, workers=workers, **options)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m app", description="Run the QA Automation API.")
+    parser.add_argument(
+        "--profile-startup", action="store_true",
+        help="print a ranked import-time and app-construction breakdown, then exit",
+    )
+    parser.add_argument("--top", type=int, default=15, help="packages listed by --profile-startup")
+    args = parser.parse_args(argv)
+    settings = Settings.from_env()
+
+    if args.profile_startup:
+        from app.startup import format_report, profile_startup
+
+        print(format_report(profile_startup(settings), top=args.top))
+        return
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s:     %(message)s")
+    run(settings)
@@ -0,0 +1,199 @@
+# app/settings.py
+import os
+from dataclasses import dataclass, fields
+from typing import Mapping, Optional
+
+ENV_PREFIX = "QA_"
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Runtime configuration shared by app.main and backend.app.
+
+    Every field can be overridden with an environment variable named
+    QA_<FIELD_NAME_UPPERCASE>, e.g. QA_CONTACT_QUEUE_SIZE=5000.
+    """
+
+    # ---------- Contact persistence pipeline ----------
+    contact_db_path: str = "data/contacts.db"
+    contact_queue_size: int = 10_000      # bounded: full queue -> 503
+    contact_batch_size: int = 500         # flush when this many are pending...
+    contact_flush_interval: float = 0.05  # ...or after this many seconds
+    contact_retry_after: int = 1          # Retry-After (s) sent with the 503
+    contact_drain_timeout: float = 10.0   # max seconds to drain on shutdown
+    # /api/contact/batch (NDJSON): per-line cap, errors reported, wait for room
+    contact_batch_max_line_bytes: int = 64 * 1024
+    contact_batch_max_errors: int = 100
+    contact_batch_enqueue_timeout: float = 1.0
+    # Admin search/export (GET /api/contacts*, both apps)
+    admin_token: str = ""                  # Bearer token; empty = admin API answers 403
+    contact_search_pool_size: int = 2      # query threads, one read connection each
+    contact_search_max_limit: int = 500    # largest page a client may ask for
+    contact_export_page_size: int = 1000   # rows read and encoded per export chunk
+
+    # ---------- Contact e-mail outbox (both apps) ----------
+    # Each stored contact is e-mailed to outbox_to by a background worker.
+    outbox_enabled: bool = False
+    outbox_smtp_host: str = "localhost"
+    outbox_smtp_port: int = 25
+    outbox_smtp_timeout: float = 10.0
+    outbox_connections: int = 1            # persistent SMTP connections (sender threads)
+    outbox_reuse_connections: bool = True  # False: one connection per message
+    outbox_from: str = "no-reply@qa-site.local"
+    outbox_to: str = "support@qa-site.local"
+    outbox_batch_size: int = 100           # rows claimed per round
+    outbox_poll_interval: float = 1.0      # seconds between rounds once caught up
+    outbox_lease: float = 120.0            # claimed rows are retried after this (crash)
+    outbox_max_attempts: int = 8           # then the row is marked dead
+    outbox_backoff_base: float = 2.0       # first retry after ~this many seconds, doubling
+    outbox_backoff_max: float = 900.0
+
+    # ---------- Readiness (GET /ready, both apps) ----------
+    # Checks run in the background every ready_interval; probes read the result.
+    ready_interval: float = 1.0
+    ready_sqlite_timeout: float = 1.0      # write lock must be granted within this
+    ready_queue_max_ratio: float = 0.8     # contact queue depth / capacity; above -> 503
+    ready_max_loop_lag: float = 0.5        # seconds the event loop may run late
+    ready_max_outbox_delay: float = 600.0  # oldest due e-mail waiting longer -> 503
+
+    # ---------- Login (backend.app) ----------
+    login_workers: int = 2                 # dedicated password-hashing threads
+    login_max_pending: int = 64            # queued + running checks; above -> 503
+    login_max_queue_seconds: float = 0.5   # drop checks that waited longer than this
+    login_cache_ttl: float = 30.0          # remember successful logins (0 = off)
+    login_cache_size: int = 10_000
+    login_retry_after: int = 1             # Retry-After (s) sent with the 503
+    # Failed-login throttle (backend.app): 429 + Retry-After over the limits.
+    # Fixed memory: one sketch per username and one per IP, each
+    # (buckets + 1) * depth * width * 4 bytes (2 x 7 MiB per worker here).
+    login_throttle_window: float = 60.0    # sliding window, seconds
+    login_throttle_buckets: int = 6        # time slices in the window
+    login_throttle_user_limit: int = 10    # failures per username per window
+    login_throttle_ip_limit: int = 50      # failures per client IP per window
+    login_throttle_width: int = 2 ** 16    # counters per sketch row (power of two)
+    login_throttle_depth: int = 4          # sketch rows (hash functions)
+    login_throttle_max_fill: float = 0.5   # sketch fuller than this -> its limit is skipped
+    # User store: "memory" (seeded demo users) or "sqlite"
+    user_store: str = "memory"
+    user_db_path: str = "data/users.db"
+    user_db_pool_size: int = 4             # lookup threads, one connection each
+    user_cache_size: int = 10_000          # LRU entries per worker
+    user_cache_ttl: float = 60.0           # seconds a found user is cached
+    user_cache_negative_ttl: float = 5.0   # seconds an unknown username is cached
+
+    # ---------- Idempotency-Key (POST /api/contact, /api/login) ----------
+    idempotency_store: str = "memory"      # memory (per worker) | sqlite (shared)
+    idempotency_db_path: str = "data/idempotency.db"
+    idempotency_ttl: float = 3600.0        # seconds a first response is replayed
+    idempotency_max_entries: int = 10_000  # LRU bound (sqlite: trimmed periodically)
+    idempotency_max_body: int = 64 * 1024  # larger responses are not stored
+    idempotency_wait_timeout: float = 5.0  # sqlite: wait for another worker, then 409
+
+    # ---------- Load shedding (both apps) ----------
+    # In-flight cap per route class (app.shedding.ROUTE_CLASS_TABLE), per worker.
+    # Waiting for a slot is fine until the queue stays non-empty for a whole
+    # interval (CoDel); then waiters older than the target are shed with 503.
+    shed_enabled: bool = True
+    shed_api_max_in_flight: int = 128      # /api/*
+    shed_default_max_in_flight: int = 64   # pages, docs, everything else
+    shed_queue_target: float = 0.05        # queue time allowed while overloaded, seconds
+    shed_interval: float = 0.1             # queue non-empty this long -> overloaded
+    shed_max_queue: int = 1024             # waiters per class; above -> 503
+    shed_max_wait: float = 2.0             # queue time allowed otherwise (bursts)
+    shed_retry_after: int = 1              # Retry-After (s) sent with the 503
+
+    # ---------- Request timing (Server-Timing + X-Request-ID) ----------
+    # Off = no middleware and plain routes, i.e. no per-request cost at all.
+    timing_enabled: bool = False
+    timing_slow_ms: float = 500.0          # requests at least this slow are logged...
+    timing_log_sample_rate: float = 0.1    # ...this share of them, as JSON lines
+
+    # ---------- Profiling ----------
+    # Event-loop lag: a task sleeps `interval` and records how late it wakes.
+    loop_monitor_enabled: bool = False
+    loop_monitor_interval: float = 0.1
+    # Stack samples of requests slower than profile_slow_ms, one collapsed-stack
+    # (.folded, flamegraph-ready) file per slow request, newest max_files kept.
+    profile_enabled: bool = False
+    profile_slow_ms: float = 1000.0
+    profile_sample_interval: float = 0.005  # seconds between samples
+    profile_dir: str = "data/profiles"
+    profile_max_files: int = 200
+
+    # ---------- Logging ----------
+    # app.*, backend.* and access records go through a bounded queue to a
+    # listener thread that writes JSON lines in batches; callers never block.
+    log_enabled: bool = True
+    log_level: str = "INFO"
+    log_file: str = ""                     # empty = stdout
+    log_queue_size: int = 10_000           # full queue -> record dropped (counted)
+    log_batch_size: int = 256              # records per write
+    log_sample_rate: float = 1.0           # share of INFO/DEBUG records kept
+    access_log: bool = True                # one JSON line per request (replaces uvicorn's)
+    access_log_sample_rate: float = 1.0
+
+    # ---------- Traffic capture (both apps) ----------
+    # Sampled requests appended as JSON lines for tests/perf/replay.py, written
+    # in batches by a background thread; callers never block.
+    capture_enabled: bool = False
+    capture_file: str = "data/capture/requests.jsonl"
+    capture_sample_rate: float = 1.0       # share of requests recorded
+    capture_queue_size: int = 10_000       # full queue -> request not recorded (counted)
+    capture_batch_size: int = 256          # lines per write
+    capture_max_body_bytes: int = 64 * 1024  # longer bodies are cut and flagged
+    # Comma-separated, case-insensitive; values become "[redacted]".
+    capture_redact_fields: str = "password,access_token,token,secret"  # JSON/form fields, query params
+    capture_redact_headers: str = "authorization,cookie,x-api-key"
+    capture_exclude: str = "/health,/ready,/metrics,/docs,/redoc,/openapi.json"  # path prefixes
+
+    # ---------- Metrics ----------
+    # Directory shared by all uvicorn workers (one mmap'ed file per worker);
+    # empty = single-process, in-memory arrays. Wipe it between deploys.
+    metrics_multiproc_dir: str = ""
+
+    # ---------- Serialization ----------
+    # Pre-encoded constant responses + orjson/msgspec default response class.
+    fast_mode: bool = False
+
+    # ---------- Startup ----------
+    # Render /openapi.json, /docs and /redoc during lifespan startup instead of
+    # on the first docs request. Off by default: worker boots stay short.
+    docs_prebuild: bool = False
+
+    # ---------- Launcher (python -m app) ----------
+    app_target: str = "app.main:create_app"  # "module:attr" passed to uvicorn
+    app_factory: bool = True                 # app_target is a factory, not an app
+    host: str = "0.0.0.0"
+    port: int = 8000
+    workers: int = 0                     # 0 = one per available CPU
+    loop: str = "auto"                   # auto -> uvloop if installed, else asyncio
+    http: str = "auto"                   # auto -> httptools if installed, else h11
+    backlog: int = 2048
+    keepalive_timeout: int = 5           # seconds an idle keep-alive conn stays open
+    limit_concurrency: int = 0           # 0 = unlimited; above it uvicorn answers 503
+    limit_max_requests: int = 0          # 0 = never recycle workers
+    graceful_timeout: int = 30           # seconds to finish in-flight requests on shutdown
+    reuse_port: bool = False             # one SO_REUSEPORT socket per worker
+
+    @classmethod
+    def from_env(cls, environ: Optional[Mapping[str, str]] = None) -> "Settings":
+        environ = os.environ if environ is None else environ
+        values = {}
+        for f in fields(cls):
+            raw = environ.get(ENV_PREFIX + f.name.upper())
+            if raw is not None:
+                values[f.name] = _coerce(f.type, raw)
+        return cls(**values)
+
+
+def _coerce(type_name, raw: str):
+    # Annotations are plain strings/types here; keep the mapping explicit.
+    kind = type_name if isinstance(type_name, str) else type_name.__name__
+    if kind == "bool":
+        return raw.strip().lower() in ("1", "true", "yes", "on")
+    if kind == "int":
+        return int(raw)
+    if kind == "float":
+        return float(raw)
+    return raw
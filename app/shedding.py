@@ -0,0 +1,253 @@
+# app/shedding.py
+import asyncio
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Callable, Deque, Dict, List, Mapping, Optional, Tuple
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.middleware import send_response
+from app.settings import Settings
+
+# Queue-time buckets in seconds (upper bounds; +Inf is implicit).
+QUEUE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# Route classes. Exact paths, or prefixes ending in "*" (longest prefix wins).
+# PRIORITY routes bypass the limiter entirely: probes are never queued or shed.
+PRIORITY = "priority"
+ROUTE_CLASS_TABLE: Mapping[str, str] = {
+    "/health": PRIORITY,
+    "/ready": PRIORITY,
+    "/metrics": PRIORITY,
+    "/api/*": "api",
+}
+DEFAULT_CLASS = "default"
+
+SHED_BODY = b'{"detail":"Server overloaded, retry later"}'
+
+
+class RouteClassLimiter:
+    """
+    Concurrency cap for one route class, with a CoDel-style queue.
+
+    Up to `max_in_flight` requests run at once; the rest wait in FIFO order.
+    What is controlled is the time spent waiting, not the queue length:
+    while the queue has been empty at least once in the last `interval`,
+    a waiter may wait up to `max_wait` (bursts are absorbed). Once it has
+    stayed non-empty for longer than `interval` (a standing queue), waiters
+    older than `target` are shed with 503 as soon as they reach the head,
+    so admitted requests never queue much longer than `target`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_in_flight: int,
+        target: float,
+        interval: float,
+        max_queue: int,
+        max_wait: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.target = target
+        self.interval = interval
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.clock = clock
+        self.in_flight = 0
+        self.queued = 0
+        self._last_empty = clock()
+        self._waiters: Deque[Tuple[float, asyncio.Future]] = deque()
+        # Counters
+        self.admitted = 0
+        self.shed = 0
+        self.queue_counts = [0] * (len(QUEUE_BUCKETS) + 1)
+        self.queue_sum = 0.0
+
+    def _observe(self, seconds: float) -> None:
+        self.admitted += 1
+        self.queue_sum += seconds
+        self.queue_counts[bisect_left(QUEUE_BUCKETS, seconds)] += 1
+
+    def overloaded(self, now: float) -> bool:
+        """True while the queue has not been empty for a whole interval."""
+        return bool(self.queued) and now - self._last_empty > self.interval
+
+    async def acquire(self) -> bool:
+        """True once a slot is held (call release() after), False if shed."""
+        if self.in_flight < self.max_in_flight and not self.queued:
+            self._last_empty = self.clock()
+            self.in_flight += 1
+            self._observe(0.0)
+            return True
+        if self.queued >= self.max_queue:
+            self.shed += 1
+            return False
+
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        enqueued = self.clock()
+        if not self.queued:
+            self._last_empty = enqueued
+        self._waiters.append((enqueued, fut))
+        self.queued += 1
+        timer = loop.call_later(self.max_wait, self._resolve, fut, False)
+        try:
+            admitted = await fut
+        except asyncio.CancelledError:
+            if fut.cancelled():  # client went away while queued
+                self._dequeued()
+            elif fut.result():   # ...or right after release() handed it a slot
+                self.release()
+            raise
+        finally:
+            timer.cancel()
+        if admitted:
+            self._observe(self.clock() - enqueued)
+        else:
+            self.shed += 1
+        return admitted
+
+    def _dequeued(self) -> None:
+        self.queued -= 1
+        if not self.queued:
+            self._last_empty = self.clock()
+
+    def _resolve(self, fut: asyncio.Future, admitted: bool) -> None:
+        if not fut.done():
+            self._dequeued()
+            fut.set_result(admitted)
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        now = self.clock()
+        limit = self.target if self.overloaded(now) else self.max_wait
+        waiters = self._waiters
+        while waiters and self.in_flight < self.max_in_flight:
+            enqueued, fut = waiters.popleft()
+            if fut.done():  # expired or cancelled (client went away)
+                continue
+            if now - enqueued > limit:
+                self._resolve(fut, False)
+                continue
+            self.in_flight += 1
+            self._resolve(fut, True)
+
+
+class LoadShedder:
+    """
+    Per-route-class limiters (see ROUTE_CLASS_TABLE) built from Settings.
+
+    Each worker process has its own; the limits are per worker.
+    """
+
+    def __init__(
+        self,
+        settings: Settings,
+        table: Mapping[str, str] = ROUTE_CLASS_TABLE,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.enabled = settings.shed_enabled
+        self.retry_after = str(settings.shed_retry_after).encode("latin-1")
+        self.exact: Dict[str, str] = {p: c for p, c in table.items() if not p.endswith("*")}
+        self.prefixes: List[Tuple[str, str]] = sorted(
+            ((p[:-1], c) for p, c in table.items() if p.endswith("*")),
+            key=lambda item: len(item[0]),
+            reverse=True,
+        )
+        limits = {"api": settings.shed_api_max_in_flight}
+        self.limiters: Dict[str, RouteClassLimiter] = {
+            name: RouteClassLimiter(
+                name,
+                max_in_flight=limits.get(name, settings.shed_default_max_in_flight),
+                target=settings.shed_queue_target,
+                interval=settings.shed_interval,
+                max_queue=settings.shed_max_queue,
+                max_wait=settings.shed_max_wait,
+                clock=clock,
+            )
+            for name in sorted((set(table.values()) | {DEFAULT_CLASS}) - {PRIORITY})
+        }
+
+    def limiter_for(self, path: str) -> Optional[RouteClassLimiter]:
+        """The limiter for `path`, or None for PRIORITY routes."""
+        name = self.exact.get(path)
+        if name is None:
+            for prefix, cls in self.prefixes:
+                if path.startswith(prefix):
+                    name = cls
+                    break
+            else:
+                name = DEFAULT_CLASS
+        return None if name == PRIORITY else self.limiters[name]
+
+    def stats(self) -> dict:
+        admitted = sum(lim.admitted for lim in self.limiters.values())
+        shed = sum(lim.shed for lim in self.limiters.values())
+        return {
+            "admitted": admitted,
+            "shed": shed,
+            "shed_ratio": shed / (admitted + shed) if admitted + shed else 0.0,
+            "in_flight": sum(lim.in_flight for lim in self.limiters.values()),
+            "queued": sum(lim.queued for lim in self.limiters.values()),
+        }
+
+    def render(self) -> List[str]:
+        """Prometheus lines: shed counts and queue-time histograms per class."""
+        limiters = list(self.limiters.values())
+        lines = [
+            "# HELP qa_shed_requests_total Requests answered 503 by the load shedder, by route class.",
+            "# TYPE qa_shed_requests_total counter",
+        ]
+        lines += [f'qa_shed_requests_total{{class="{lim.name}"}} {lim.shed}' for lim in limiters]
+        lines += [
+            "# HELP qa_shed_queued Requests waiting for a slot, by route class.",
+            "# TYPE qa_shed_queued gauge",
+        ]
+        lines += [f'qa_shed_queued{{class="{lim.name}"}} {lim.queued}' for lim in limiters]
+        lines += [
+            "# HELP qa_shed_queue_seconds Time admitted requests waited for a slot, by route class.",
+            "# TYPE qa_shed_queue_seconds histogram",
+        ]
+        bounds = [f"{b:g}" for b in QUEUE_BUCKETS] + ["+Inf"]
+        for lim in limiters:
+            cumulative = 0
+            for le, count in zip(bounds, lim.queue_counts):
+                cumulative += count
+                lines.append(f'qa_shed_queue_seconds_bucket{{class="{lim.name}",le="{le}"}} {cumulative}')
+            lines.append(f'qa_shed_queue_seconds_sum{{class="{lim.name}"}} {lim.queue_sum:.9g}')
+            lines.append(f'qa_shed_queue_seconds_count{{class="{lim.name}"}} {lim.admitted}')
+        return lines
+
+
+class LoadSheddingMiddleware:
+    """
+    Pure ASGI concurrency limiter: holds a route-class slot for the whole
+    request and answers a fast 503 + Retry-After when the LoadShedder sheds.
+    Add it outside the per-route middlewares (so shed requests cost nothing)
+    and inside metrics (so shed responses are counted).
+    """
+
+    def __init__(self, app: ASGIApp, shedder: LoadShedder) -> None:
+        self.app = app
+        self.shedder = shedder
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.shedder.enabled:
+            await self.app(scope, receive, send)
+            return
+        limiter = self.shedder.limiter_for(scope["path"])
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not await limiter.acquire():
+            await send_response(send, 503, SHED_BODY, [(b"retry-after", self.shedder.retry_after)])
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
@@ -0,0 +1,92 @@
+# app/startup.py
+"""
+Cold-start breakdown behind `python -m app --profile-startup`.
+
+A fresh interpreter runs with -X importtime, imports QA_APP_TARGET, builds
+the app and renders the docs once. The report ranks packages by the import
+time they cost on their own (nested imports are attributed to the package
+that owns each module) and times the app-construction phases.
+"""
+import json
+import subprocess
+import sys
+import time
+from typing import Dict, List, Tuple
+
+from app.settings import Settings
+
+# Runs in the child. Prints the phase timings as one JSON line on stdout;
+# -X importtime writes to stderr.
+_CHILD = """
+import importlib, json, sys, time
+module, attr, factory = sys.argv[1], sys.argv[2], sys.argv[3] == "1"
+t0 = time.perf_counter()
+mod = importlib.import_module(module)
+t1 = time.perf_counter()
+target = getattr(mod, attr)
+app = target() if factory else target
+t2 = time.perf_counter()
+cache = getattr(app.state, "docs_cache", None)
+if cache is not None:
+    cache.build()
+else:
+    app.openapi()
+t3 = time.perf_counter()
+print(json.dumps({"import": t1 - t0, "build": t2 - t1, "docs": t3 - t2}))
+"""
+
+
+def parse_importtime(lines: List[str]) -> Dict[str, Tuple[float, int]]:
+    """`-X importtime` output -> {top-level package: (self seconds, modules)}."""
+    packages: Dict[str, Tuple[float, int]] = {}
+    for line in lines:
+        if not line.startswith("import time:"):
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():  # the column header
+            continue
+        package = name.strip().split(".")[0]
+        seconds, count = packages.get(package, (0.0, 0))
+        packages[package] = (seconds + int(self_us) / 1e6, count + 1)
+    return packages
+
+
+def profile_startup(settings: Settings) -> dict:
+    """Run one cold start in a subprocess and return the measurements."""
+    module, _, attr = settings.app_target.partition(":")
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD, module, attr or "app", "1" if settings.app_factory else "0"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    wall = time.perf_counter() - started
+    phases = json.loads(proc.stdout.strip().splitlines()[-1])
+    return {
+        "target": settings.app_target,
+        "wall": wall,
+        "phases": phases,
+        "packages": parse_importtime(proc.stderr.splitlines()),
+    }
+
+
+def format_report(report: dict, top: int = 15) -> str:
+    module, _, attr = report["target"].partition(":")
+    phases = report["phases"]
+    rows = [
+        (f"import {module}", phases["import"]),
+        (f"build app ({attr})", phases["build"]),
+        ("first docs/schema render", phases["docs"]),
+        ("process wall time", report["wall"]),
+    ]
+    lines = [f"cold start: {report['target']}", f"  {'phase':<32}{'ms':>10}"]
+    lines += [f"  {name:<32}{seconds * 1000:>10.1f}" for name, seconds in rows]
+
+    packages = sorted(report["packages"].items(), key=lambda item: item[1][0], reverse=True)
+    total = sum(seconds for seconds, _ in report["packages"].values()) or 1.0
+    lines += ["", f"imports by package (self time, {total * 1000:.1f} ms total)"]
+    lines.append(f"  {'package':<32}{'ms':>10}{'%':>8}{'modules':>9}")
+    for package, (seconds, count) in packages[:top]:
+        lines.append(f"  {package:<32}{seconds * 1000:>10.1f}{seconds / total * 100:>8.1f}{count:>9}")
+    return "\n".join(lines)
@@ -0,0 +1,282 @@
+# app/throttle.py
+import json
+import logging
+import math
+import time
+from array import array
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.middleware import read_body, replay_body, send_response
+from app.settings import Settings
+
+log = logging.getLogger(__name__)
+
+
+class SlidingWindowCounter:
+    """
+    Approximate per-key event counts over a sliding window, in fixed memory.
+
+    A ring of `buckets` time slices (window / buckets seconds each), every
+    slice a count-min sketch of `depth` rows x `width` uint32 counters, all in
+    one preallocated array. Memory is (buckets + 1) * depth * width * 4
+    bytes (the extra slice is the zero template used to reset old slices)
+    no matter how many distinct keys show up.
+
+    add() is one string hash plus `depth` indexed updates (conservative
+    update: only rows at the current minimum grow). Estimates never
+    undercount; they overcount when the distinct keys in a slice approach
+    `width`. fill_ratio() reports how close that is (share of non-zero
+    counters in the fullest live slice) so callers can stop trusting it.
+    The storage is allocated on first add(), so idle apps pay nothing.
+    """
+
+    def __init__(
+        self,
+        window: float,
+        buckets: int,
+        width: int,
+        depth: int,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if width <= 0 or width & (width - 1):
+            raise ValueError("width must be a power of two")
+        if depth < 1:
+            raise ValueError("depth must be at least 1")
+        self.buckets = buckets
+        self.width = width
+        self.depth = depth
+        self.bucket_seconds = window / buckets
+        self.clock = clock
+        self._slice = depth * width
+        self._mask = width - 1
+        self._rows = [(row, row * width) for row in range(depth)]
+        self.counts: Optional[array] = None
+        self._zeros: Optional[array] = None
+        self._epochs: List[int] = [-1] * buckets
+        self._filled: List[int] = [0] * buckets  # non-zero counters per slice
+
+    @property
+    def memory_bytes(self) -> int:
+        return (self.buckets + 1) * self._slice * 4
+
+    def _columns(self, key: str) -> List[int]:
+        # Python's str hash is SipHash with a per-process random key: cheap,
+        # and not predictable from outside (unless PYTHONHASHSEED is pinned).
+        # Rows use double hashing (h1 + row * h2) from its two 32-bit halves.
+        h = hash(key)
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) & 0xFFFFFFFF | 1
+        mask = self._mask
+        return [offset + ((h1 + row * h2) & mask) for row, offset in self._rows]
+
+    def _current(self, now: float) -> int:
+        """Offset of the slice for `now`, zeroing it if it still holds an old epoch."""
+        epoch = int(now // self.bucket_seconds)
+        b = epoch % self.buckets
+        if self._epochs[b] != epoch:
+            start = b * self._slice
+            self.counts[start:start + self._slice] = self._zeros
+            self._epochs[b] = epoch
+            self._filled[b] = 0
+        return b * self._slice
+
+    def add(self, key: str, now: Optional[float] = None) -> None:
+        if self.counts is None:
+            self.counts = array("I", bytes(4 * self.buckets * self._slice))
+            self._zeros = array("I", bytes(4 * self._slice))
+        base = self._current(self.clock() if now is None else now)
+        counts = self.counts
+        cells = [base + c for c in self._columns(key)]
+        floor = min(map(counts.__getitem__, cells)) + 1
+        if floor == 1:  # some row had no count for this key yet
+            self._filled[base // self._slice] += sum(1 for i in cells if not counts[i])
+        for i in cells:
+            if counts[i] < floor:
+                counts[i] = floor
+
+    def _per_bucket(self, key: str, now: float) -> List[Tuple[int, int]]:
+        """(epoch, estimate) for every live slice holding `key`, oldest first."""
+        if self.counts is None:
+            return []
+        current = int(now // self.bucket_seconds)
+        oldest = current - self.buckets
+        columns = self._columns(key)
+        get = self.counts.__getitem__
+        live = []
+        for b, epoch in enumerate(self._epochs):
+            if oldest < epoch <= current:
+                base = b * self._slice
+                value = min([get(base + c) for c in columns])
+                if value:
+                    live.append((epoch, value))
+        live.sort()
+        return live
+
+    def fill_ratio(self, now: Optional[float] = None) -> float:
+        """Share of non-zero counters in the fullest slice still in the window."""
+        now = self.clock() if now is None else now
+        current = int(now // self.bucket_seconds)
+        oldest = current - self.buckets
+        filled = [n for epoch, n in zip(self._epochs, self._filled) if oldest < epoch <= current]
+        return max(filled, default=0) / self._slice
+
+    def estimate(self, key: str, now: Optional[float] = None) -> int:
+        now = self.clock() if now is None else now
+        return sum(value for _, value in self._per_bucket(key, now))
+
+    def retry_after(self, key: str, limit: int, now: Optional[float] = None) -> float:
+        """Seconds until the estimate for `key` drops below `limit` (0 = now)."""
+        now = self.clock() if now is None else now
+        live = self._per_bucket(key, now)
+        total = sum(value for _, value in live)
+        if total < limit:
+            return 0.0
+        for epoch, value in live:
+            total -= value
+            if total < limit:
+                # A slice leaves the window once its epoch is `buckets` behind.
+                return (epoch + self.buckets) * self.bucket_seconds - now
+        return 0.0
+
+
+class LoginThrottle:
+    """
+    Failed-login limits per username and per client IP, one
+    SlidingWindowCounter each. Only failures count, so legitimate traffic
+    and load tests that log in correctly are never throttled.
+
+    A flood of distinct usernames (or IPs) fills its sketch until every key
+    looks over the limit. Once a sketch's fill ratio passes
+    `login_throttle_max_fill` it is ignored until it drains, i.e. spraying
+    usernames leaves the per-IP limit in force instead of locking everyone
+    out.
+    """
+
+    def __init__(self, settings: Settings, clock: Callable[[], float] = time.monotonic) -> None:
+        def sketch() -> SlidingWindowCounter:
+            return SlidingWindowCounter(
+                window=settings.login_throttle_window,
+                buckets=settings.login_throttle_buckets,
+                width=settings.login_throttle_width,
+                depth=settings.login_throttle_depth,
+                clock=clock,
+            )
+
+        self.clock = clock
+        self.users = sketch()
+        self.ips = sketch()
+        self.user_limit = settings.login_throttle_user_limit
+        self.ip_limit = settings.login_throttle_ip_limit
+        self.max_fill = settings.login_throttle_max_fill
+        self._saturated = {"username": False, "ip": False}
+        # Counters
+        self.failures = 0
+        self.throttled = 0
+        self.saturated_checks = 0
+
+    def _usable(self, name: str, counter: SlidingWindowCounter, now: float) -> bool:
+        """False while `counter` is too full for its estimates to mean anything."""
+        saturated = counter.counts is not None and counter.fill_ratio(now) > self.max_fill
+        if saturated != self._saturated[name]:
+            self._saturated[name] = saturated
+            if saturated:
+                log.warning("login throttle: %s sketch saturated, %s limit suspended", name, name)
+            else:
+                log.info("login throttle: %s sketch drained, %s limit restored", name, name)
+        if saturated:
+            self.saturated_checks += 1
+        return not saturated
+
+    def retry_after(self, username: str, ip: str) -> float:
+        """0 if the attempt may proceed, else seconds the client should wait."""
+        now = self.clock()
+        wait = 0.0
+        if username and self._usable("username", self.users, now):
+            wait = self.users.retry_after(username, self.user_limit, now)
+        if ip and self._usable("ip", self.ips, now):
+            wait = max(wait, self.ips.retry_after(ip, self.ip_limit, now))
+        if wait > 0:
+            self.throttled += 1
+        return wait
+
+    def record_failure(self, username: str, ip: str) -> None:
+        self.failures += 1
+        now = self.clock()
+        if username:
+            self.users.add(username, now)
+        if ip:
+            self.ips.add(ip, now)
+
+    def stats(self) -> dict:
+        now = self.clock()
+        return {
+            "failures": self.failures,
+            "throttled": self.throttled,
+            "saturated_checks": self.saturated_checks,
+            "user_fill_ratio": self.users.fill_ratio(now),
+            "ip_fill_ratio": self.ips.fill_ratio(now),
+            "memory_bytes": self.users.memory_bytes + self.ips.memory_bytes,
+        }
+
+
+# Only the username is needed; larger bodies are left for FastAPI to reject.
+MAX_PARSED_BODY = 16 * 1024
+THROTTLED_BODY = b'{"detail":"Too many failed login attempts, retry later"}'
+
+
+def _username(body: bytes) -> str:
+    if len(body) > MAX_PARSED_BODY:
+        return ""
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return ""
+    username = payload.get("username") if isinstance(payload, dict) else None
+    return username if isinstance(username, str) else ""
+
+
+class LoginThrottleMiddleware:
+    """
+    Pure ASGI guard for the login route(s).
+
+    Buffers the (small) request body to read the username, answers 429 +
+    Retry-After while either the username or the client IP is over its
+    failure limit, and records a failure whenever the handler answers 401.
+    The handler sees the body exactly as sent.
+    """
+
+    def __init__(self, app: ASGIApp, throttle: LoginThrottle, paths: Sequence[str] = ("/api/login",)) -> None:
+        self.app = app
+        self.throttle = throttle
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        body = await read_body(receive)
+        if body is None:  # client went away
+            return
+        username = _username(body)
+        client = scope.get("client")
+        ip = client[0] if client else ""
+
+        wait = self.throttle.retry_after(username, ip)
+        if wait > 0:
+            retry_after = str(max(1, math.ceil(wait))).encode("latin-1")
+            await send_response(send, 429, THROTTLED_BODY, [(b"retry-after", retry_after)])
+            return
+
+        status = 0
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        await self.app(scope, replay_body(body, receive), send_with_status)
+        if status == 401:
+            self.throttle.record_failure(username, ip)
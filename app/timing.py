@@ -0,0 +1,218 @@
+# app/timing.py
+import asyncio
+import functools
+import logging
+import random
+import re
+import uuid
+from contextvars import ContextVar
+from time import perf_counter_ns
+from typing import Any, Callable, Coroutine, List, Optional, Tuple
+
+from fastapi import Request, Response
+from fastapi.routing import APIRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.settings import Settings
+
+log = logging.getLogger("app.timing")
+
+# Stage names, in request order (Server-Timing metric names):
+#   mw_in      middlewares + routing before the route handler
+#   recv       reading the request body
+#   parse      JSON decode
+#   validate   dependency solving / Pydantic validation of the payload
+#   handler    the endpoint function
+#   serialize  response_model validation + rendering the Response
+#   mw_out     response start back out through the middlewares
+#   mw         whole request, when a middleware answered before routing
+REQUEST_ID_HEADER = b"x-request-id"
+SERVER_TIMING_HEADER = b"server-timing"
+# Client-supplied request IDs are echoed back only if they look harmless.
+_REQUEST_ID_RE = re.compile(rb"[A-Za-z0-9._:-]{1,128}")
+
+_current: ContextVar[Optional["RequestTiming"]] = ContextVar("qa_request_timing", default=None)
+
+
+class RequestTiming:
+    """Consecutive stage durations (ns) of one request, marked as it goes."""
+
+    __slots__ = ("start", "last", "stages")
+
+    def __init__(self) -> None:
+        self.start = self.last = perf_counter_ns()
+        self.stages: List[Tuple[str, int]] = []
+
+    def mark(self, stage: str) -> None:
+        """Close `stage`: it lasted from the previous mark until now."""
+        now = perf_counter_ns()
+        self.stages.append((stage, now - self.last))
+        self.last = now
+
+    def header(self) -> bytes:
+        parts = [f"{name};dur={ns / 1e6:.3f}" for name, ns in self.stages]
+        parts.append(f"total;dur={(self.last - self.start) / 1e6:.3f}")
+        return ", ".join(parts).encode("latin-1")
+
+
+def current_timing() -> Optional[RequestTiming]:
+    """The RequestTiming of the request being served, if timing is on."""
+    return _current.get()
+
+
+def _timed_call(call: Callable) -> Callable:
+    """Wrap an endpoint so its entry closes `validate` and its exit `handler`."""
+    if asyncio.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def timed(**kwargs):
+            timing = _current.get()
+            if timing is None:
+                return await call(**kwargs)
+            timing.mark("validate")
+            try:
+                return await call(**kwargs)
+            finally:
+                timing.mark("handler")
+    else:
+        @functools.wraps(call)
+        def timed(**kwargs):  # runs in the threadpool; the context is copied along
+            timing = _current.get()
+            if timing is None:
+                return call(**kwargs)
+            timing.mark("validate")
+            try:
+                return call(**kwargs)
+            finally:
+                timing.mark("handler")
+    return timed
+
+
+def _is_json(content_type: str) -> bool:
+    media = content_type.split(";")[0].strip().lower()
+    return not media or media == "application/json" or media.endswith("+json")
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute that splits the handler into recv / parse / validate / handler /
+    serialize stages. The body is read and JSON-decoded here, up front;
+    Starlette caches both on the Request, so FastAPI's own handler reuses
+    them. Set as the router's route_class only when timing is enabled.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Coroutine[Any, Any, Response]]:
+        self.dependant.call = _timed_call(self.dependant.call)
+        handler = super().get_route_handler()
+        has_body = self.body_field is not None
+
+        async def timed_handler(request: Request) -> Response:
+            timing = _current.get()
+            if timing is None:
+                return await handler(request)
+            timing.mark("mw_in")
+            if has_body:
+                body = await request.body()
+                timing.mark("recv")
+                if body and _is_json(request.headers.get("content-type", "")):
+                    try:
+                        await request.json()
+                    except ValueError:
+                        pass  # FastAPI decodes again and reports the 422
+                    timing.mark("parse")
+            response = await handler(request)
+            timing.mark("serialize")
+            return response
+
+        return timed_handler
+
+
+class ServerTiming:
+    """Settings for the timing middleware plus its counters (stats())."""
+
+    def __init__(self, settings: Settings) -> None:
+        self.slow_ns = int(settings.timing_slow_ms * 1e6)
+        self.sample_rate = settings.timing_log_sample_rate
+        self._random = random.random
+        # Counters
+        self.requests = 0
+        self.slow = 0
+        self.logged = 0
+
+    def finished(self, scope: Scope, request_id: str, status: int, timing: RequestTiming) -> None:
+        self.requests += 1
+        total = perf_counter_ns() - timing.start
+        if total < self.slow_ns:
+            return
+        self.slow += 1
+        if self._random() >= self.sample_rate:
+            return
+        self.logged += 1
+        total_ms = round(total / 1e6, 3)
+        log.warning(
+            "slow request %s %s %d %.1f ms",
+            scope["method"],
+            scope["path"],
+            status,
+            total_ms,
+            extra={
+                "event": "slow_request",
+                "request_id": request_id,
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status,
+                "total_ms": total_ms,
+                "stages_ms": {name: round(ns / 1e6, 3) for name, ns in timing.stages},
+            },
+        )
+
+    def stats(self) -> dict:
+        return {"requests": self.requests, "slow": self.slow, "slow_logged": self.logged}
+
+
+def request_id_for(scope: Scope) -> bytes:
+    for name, value in scope.get("headers", ()):
+        if name == REQUEST_ID_HEADER:
+            if _REQUEST_ID_RE.fullmatch(value):
+                return value
+            break
+    return uuid.uuid4().hex.encode("latin-1")
+
+
+class ServerTimingMiddleware:
+    """
+    Pure ASGI: per-request stage timestamps (perf_counter_ns) exposed as a
+    Server-Timing header, plus X-Request-ID (the client's, if sane, else a
+    new one). Slow requests are logged as sampled JSON lines. Add it just
+    inside metrics so mw_in/mw_out cover every other middleware.
+    """
+
+    def __init__(self, app: ASGIApp, timing: ServerTiming) -> None:
+        self.app = app
+        self.timing = timing
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming()
+        request_id = request_id_for(scope)
+        status = 500
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                timing.mark("mw_out" if timing.stages else "mw")
+                message["headers"] = list(message.get("headers", ())) + [
+                    (SERVER_TIMING_HEADER, timing.header()),
+                    (REQUEST_ID_HEADER, request_id),
+                ]
+            await send(message)
+
+        token = _current.set(timing)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            self.timing.finished(scope, request_id.decode("latin-1"), status, timing)
@@ -0,0 +1,241 @@
+# app/user_store.py
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from app.settings import Settings
+
+USERS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    username      TEXT PRIMARY KEY,
+    password_hash TEXT NOT NULL,
+    updated_at    REAL NOT NULL
+)
+"""
+
+# Constant SQL text: sqlite3 keeps each connection's prepared statements in
+# its statement cache, so lookups never re-parse.
+SELECT_HASH_SQL = "SELECT password_hash FROM users WHERE username = ?"
+UPSERT_SQL = (
+    "INSERT INTO users (username, password_hash, updated_at) VALUES (?, ?, ?) "
+    "ON CONFLICT(username) DO UPDATE SET password_hash = excluded.password_hash, "
+    "updated_at = excluded.updated_at"
+)
+DELETE_SQL = "DELETE FROM users WHERE username = ?"
+
+
+class UserStore(ABC):
+    """
+    Where password hashes (app.passwords format) live.
+
+    get() is awaited on the request path; put()/delete() are for admin
+    scripts and tests and may block. A backend missing one of them cannot
+    be instantiated.
+    """
+
+    @abstractmethod
+    async def get(self, username: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def put(self, username: str, encoded: str) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, username: str) -> None:
+        ...
+
+    def close(self) -> None:
+        pass
+
+
+class InMemoryUserStore(UserStore):
+    """A plain dict, as backend.app always had."""
+
+    def __init__(self, users: Optional[Mapping[str, str]] = None) -> None:
+        self.users: Dict[str, str] = dict(users or {})
+
+    async def get(self, username: str) -> Optional[str]:
+        return self.users.get(username)
+
+    def put(self, username: str, encoded: str) -> None:
+        self.users[username] = encoded
+
+    def delete(self, username: str) -> None:
+        self.users.pop(username, None)
+
+
+class SQLiteUserStore(UserStore):
+    """
+    Users table in SQLite (WAL). Lookups run on a small thread pool and each
+    pool thread keeps its own connection, so reads never touch the event
+    loop and never share a connection across threads.
+    """
+
+    def __init__(self, path: str, pool_size: int = 4) -> None:
+        self.path = path
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._conns: List[sqlite3.Connection] = []
+        self.pool_size = pool_size
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._conn() as conn:
+            conn.executescript(USERS_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=32)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._conns.append(conn)
+        return conn
+
+    def _get(self, username: str) -> Optional[str]:
+        row = self._conn().execute(SELECT_HASH_SQL, (username,)).fetchone()
+        return row[0] if row else None
+
+    async def get(self, username: str) -> Optional[str]:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="user-store")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._get, username)
+
+    def put(self, username: str, encoded: str) -> None:
+        with self._conn() as conn:
+            conn.execute(UPSERT_SQL, (username, encoded, time.time()))
+
+    def delete(self, username: str) -> None:
+        with self._conn() as conn:
+            conn.execute(DELETE_SQL, (username,))
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        with self._lock:
+            for conn in self._conns:
+                conn.close()
+            self._conns.clear()
+        self._local = threading.local()
+
+
+class CachedUserStore(UserStore):
+    """
+    Read-through LRU cache with TTL in front of another UserStore.
+
+    - Found users are kept for `ttl` seconds, unknown usernames for
+      `negative_ttl` (short, so a newly added user shows up quickly and a
+      username-spraying client doesn't hit the database on every attempt).
+    - At most `size` entries; least recently used ones are evicted.
+    - put()/delete() write through and invalidate; invalidate()/clear() are
+      the hooks for changes made behind the cache's back (other workers,
+      admin scripts). Each worker has its own cache, so those changes are
+      visible everywhere after at most `ttl` seconds.
+    """
+
+    def __init__(self, store: UserStore, size: int = 10_000, ttl: float = 60.0, negative_ttl: float = 5.0) -> None:
+        self.store = store
+        self.size = size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: "OrderedDict[str, Tuple[float, Optional[str]]]" = OrderedDict()
+        # Counters
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    async def get(self, username: str) -> Optional[str]:
+        entries = self._entries
+        entry = entries.get(username)
+        if entry is not None:
+            expires, encoded = entry
+            if expires > time.monotonic():
+                entries.move_to_end(username)
+                if encoded is None:
+                    self.negative_hits += 1
+                else:
+                    self.hits += 1
+                return encoded
+            del entries[username]
+
+        self.misses += 1
+        encoded = await self.store.get(username)
+        ttl = self.ttl if encoded is not None else self.negative_ttl
+        if ttl > 0:
+            entries[username] = (time.monotonic() + ttl, encoded)
+            entries.move_to_end(username)
+            while len(entries) > self.size:
+                entries.popitem(last=False)
+                self.evictions += 1
+        return encoded
+
+    def put(self, username: str, encoded: str) -> None:
+        self.store.put(username, encoded)
+        self.invalidate(username)
+
+    def delete(self, username: str) -> None:
+        self.store.delete(username)
+        self.invalidate(username)
+
+    # ---------- Invalidation hooks ----------
+    def invalidate(self, username: str) -> None:
+        if self._entries.pop(username, None) is not None:
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self.invalidations += len(self._entries)
+        self._entries.clear()
+
+    def close(self) -> None:
+        self.clear()
+        self.store.close()
+
+    # ---------- Introspection ----------
+    def stats(self) -> dict:
+        return {
+            "cache_entries": len(self._entries),
+            "cache_capacity": self.size,
+            "cache_hits": self.hits,
+            "cache_negative_hits": self.negative_hits,
+            "cache_misses": self.misses,
+            "cache_evictions": self.evictions,
+            "cache_invalidations": self.invalidations,
+        }
+
+
+def build_user_store(settings: Settings, seed: Mapping[str, str]) -> CachedUserStore:
+    """
+    The store selected by QA_USER_STORE ("memory" or "sqlite"), cached.
+    An empty SQLite table is seeded with `seed` so a fresh deploy can log in.
+    """
+    if settings.user_store == "memory":
+        store: UserStore = InMemoryUserStore(seed)
+    elif settings.user_store == "sqlite":
+        store = SQLiteUserStore(settings.user_db_path, settings.user_db_pool_size)
+        if store.count() == 0:
+            for username, encoded in seed.items():
+                store.put(username, encoded)
+    else:
+        raise ValueError(f"unknown QA_USER_STORE {settings.user_store!r} (expected memory or sqlite)")
+    return CachedUserStore(
+        store,
+        size=settings.user_cache_size,
+        ttl=settings.user_cache_ttl,
+        negative_ttl=settings.user_cache_negative_ttl,
+    )
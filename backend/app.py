@@ -1,10 +1,107 @@
 # backend/app.py
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, Response
 from pydantic import BaseModel, Field, EmailStr
 
-app = FastAPI(title="QA Automation API (compose backend)", version="0.1.0")
+from app.capture import TrafficCapture, TrafficCaptureMiddleware
+from app.contact_queue import ContactPipeline
+from app.contact_search import ContactSearch
+from app.contacts_api import contacts_router
+from app.fast_json import RawJSONResponse
+from app.idempotency import Idempotency, IdempotencyMiddleware
+from app.log_pipeline import AccessLogMiddleware, LogPipeline
+from app.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, Metrics, MetricsMiddleware
+from app.outbox import OutboxWorker
+from app.passwords import CredentialVerifier, VerifierBusy
+from app.profiler import LoopLagMonitor, SlowRequestProfiler, SlowRequestProfilerMiddleware
+from app.readiness import Readiness
+from app.settings import Settings
+from app.shedding import LoadShedder, LoadSheddingMiddleware
+from app.throttle import LoginThrottle, LoginThrottleMiddleware
+from app.timing import ServerTiming, ServerTimingMiddleware, TimedRoute
+from app.user_store import build_user_store
+
+log = logging.getLogger("backend.app")
+settings = Settings.from_env()
+contact_pipeline = ContactPipeline(settings)
+contact_search = ContactSearch(settings.contact_db_path, settings.contact_search_pool_size)
+outbox = OutboxWorker(settings) if settings.outbox_enabled else None
+readiness = Readiness(settings, contact_pipeline, outbox_enabled=outbox is not None)
+verifier = CredentialVerifier(settings)
+login_throttle = LoginThrottle(settings)
+idempotency = Idempotency.from_settings(settings)
+shedder = LoadShedder(settings)
+loop_monitor = LoopLagMonitor(settings.loop_monitor_interval) if settings.loop_monitor_enabled else None
+profiler = SlowRequestProfiler(settings) if settings.profile_enabled else None
+log_pipeline = LogPipeline(settings) if settings.log_enabled else None
+capture = TrafficCapture(settings) if settings.capture_enabled else None
+metrics = Metrics(multiproc_dir=settings.metrics_multiproc_dir)
+metrics.add_collector("qa_contact", lambda: contact_pipeline.stats())
+metrics.add_collector("qa_contact_search", contact_search.stats)
+metrics.add_collector("qa_login", verifier.stats)
+metrics.add_collector("qa_login_throttle", login_throttle.stats)
+metrics.add_collector("qa_idempotency", idempotency.stats)
+metrics.add_exposition(shedder.render)
+if outbox is not None:
+    metrics.add_collector("qa_outbox", outbox.stats)
+metrics.add_collector("qa_readiness", readiness.stats)
+if loop_monitor is not None:
+    metrics.add_collector("qa_event_loop", loop_monitor.stats)
+    metrics.add_exposition(loop_monitor.render)
+if profiler is not None:
+    metrics.add_collector("qa_profiler", profiler.stats)
+if log_pipeline is not None:
+    metrics.add_collector("qa_logging", log_pipeline.stats)
+if capture is not None:
+    metrics.add_collector("qa_capture", capture.stats)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if log_pipeline is not None:
+        log_pipeline.start()
+    if capture is not None:
+        capture.start()
+    await contact_pipeline.start()
+    if outbox is not None:
+        await outbox.start()
+    if loop_monitor is not None:
+        loop_monitor.start()
+    await readiness.start()  # first snapshot before the first probe
+    yield
+    await readiness.stop()  # /ready answers 503 from here on
+    await contact_pipeline.stop()  # drain pending contacts
+    if outbox is not None:
+        await outbox.stop()
+    contact_search.close()
+    verifier.close()
+    user_store.close()
+    idempotency.close()
+    if loop_monitor is not None:
+        await loop_monitor.stop()
+    if profiler is not None:
+        profiler.close()
+    if capture is not None:
+        capture.stop()  # writes what is still queued
+    if log_pipeline is not None:
+        log_pipeline.stop()  # flushes queued records
+
 
+app = FastAPI(title="QA Automation API (compose backend)", version="0.1.0", lifespan=lifespan)
+if settings.timing_enabled:
+    # Per-stage timestamps; must be set before the routes are declared.
+    app.router.route_class = TimedRoute
+
+# Failed-login limits per username / client IP (fixed-memory sketch) -> 429
+app.add_middleware(LoginThrottleMiddleware, throttle=login_throttle)
+# Idempotency-Key on POST /api/contact and /api/login: replay the first response
+app.add_middleware(IdempotencyMiddleware, idempotency=idempotency)
+# In-flight cap per route class; fast 503 + Retry-After once queue time stays high
+app.add_middleware(LoadSheddingMiddleware, shedder=shedder)
 # Enable CORS to allow frontend (on port 8080) to communicate with backend
 app.add_middleware(
     CORSMiddleware,
@@ -12,12 +109,31 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Server-Timing + X-Request-ID; sampled JSON log lines for slow requests
+if settings.timing_enabled:
+    server_timing = ServerTiming(settings)
+    metrics.add_collector("qa_timing", server_timing.stats)
+    app.add_middleware(ServerTimingMiddleware, timing=server_timing)
+# Stack samples of requests slower than QA_PROFILE_SLOW_MS -> .folded files
+if profiler is not None:
+    app.add_middleware(SlowRequestProfilerMiddleware, profiler=profiler)
+# One JSON access record per request, through the log pipeline
+if settings.access_log:
+    app.add_middleware(AccessLogMiddleware, sample_rate=settings.access_log_sample_rate)
+# Sampled, redacted request log (JSONL) for tests/perf/replay.py
+if capture is not None:
+    app.add_middleware(TrafficCaptureMiddleware, capture=capture)
+# Per-route counts / in-flight / latency histograms, exported at /metrics
+app.add_middleware(MetricsMiddleware, metrics=metrics, routes=app.router.routes)
 
-# Simulated user database
+# Demo users: scrypt hashes (app.passwords.hash_password) of "1234" and
+# "password123". They seed the user store (QA_USER_STORE=memory|sqlite).
 users_db = {
-    "admin": "1234",
-    "testuser": "password123",
+    "admin": "scrypt$16384$8$1$xBnWsjH5evaMo97nDuwXqw$vOIeS5dFpaLh5wDfZhVIHVEcNA3JHxdjtHKuHVqNMbE",
+    "testuser": "scrypt$16384$8$1$iUkUJVZrlyCL3+J3iY5/bA$WLmLrDLDrI5geEqRSlSHHmfaiWjYlv2TLV0njyExcLs",
 }
+user_store = build_user_store(settings, seed=users_db)
+metrics.add_collector("qa_users", user_store.stats)
 
 # ---------- Models ----------
 class LoginRequest(BaseModel):
@@ -38,6 +154,15 @@ class ContactRequest(BaseModel):
 class ContactResponse(BaseModel):
     message: str = "Message received"
 
+class ServiceBusy(BaseModel):
+    detail: str = "Contact queue is full, retry later"
+
+class LoginBusy(BaseModel):
+    detail: str = "Too many login attempts in progress, retry later"
+
+class TooManyAttempts(BaseModel):
+    detail: str = "Too many failed login attempts, retry later"
+
 # ---------- Endpoints ----------
 @app.post(
     "/api/login",
@@ -49,11 +174,30 @@ class ContactResponse(BaseModel):
         401: {
             "description": "Unauthorized - Invalid credentials",
             "model": ErrorMessage,
-        }
+        },
+        429: {
+            "description": "Too Many Requests - too many failed attempts (see Retry-After)",
+            "model": TooManyAttempts,
+        },
+        503: {
+            "description": "Service Unavailable - too many logins being verified (see Retry-After)",
+            "model": LoginBusy,
+        },
     },
 )
-def login(data: LoginRequest):
-    if data.username in users_db and users_db[data.username] == data.password:
+async def login(data: LoginRequest):
+    # scrypt runs on the verifier's own bounded pool, never on the event loop
+    # or Starlette's shared threadpool.
+    try:
+        encoded = await user_store.get(data.username)  # cached; misses go to the store's pool
+        ok = await verifier.verify(data.username, data.password, encoded)
+    except VerifierBusy:
+        raise HTTPException(
+            status_code=503,
+            detail=LoginBusy().detail,
+            headers={"Retry-After": str(settings.login_retry_after)},
+        )
+    if ok:
         return LoginResponse()
     # This 401 response is documented for Schemathesis
     raise HTTPException(status_code=401, detail="Invalid credentials")
@@ -63,8 +207,42 @@ def login(data: LoginRequest):
     response_model=ContactResponse,
     tags=["API"],
     summary="Contact",
+    responses={
+        503: {
+            "description": "Service Unavailable - contact queue full (see Retry-After)",
+            "model": ServiceBusy,
+        }
+    },
 )
-def contact(data: ContactRequest):
-    # En una app real: persistir/enviar email/cola, etc.
-    print(f"New contact from {data.name} <{data.email}>: {data.message}")
+async def contact(data: ContactRequest):
+    # Queued for the log pipeline's writer thread; no stdout write here.
+    log.info(
+        "New contact from %s <%s>", data.name, data.email,
+        extra={"event": "contact", "contact_name": data.name, "email": str(data.email), "contact_message": data.message},
+    )
+    # Hand off to the batched SQLite writer; never block the event loop.
+    # The e-mail goes out later from the outbox (app.outbox, QA_OUTBOX_ENABLED).
+    if not contact_pipeline.submit(data.name, str(data.email), data.message):
+        raise HTTPException(
+            status_code=503,
+            detail=ServiceBusy().detail,
+            headers={"Retry-After": str(settings.contact_retry_after)},
+        )
     return ContactResponse()
+
+# Admin search / export over the persisted contacts (QA_ADMIN_TOKEN)
+app.include_router(contacts_router(contact_search, settings, route_class=app.router.route_class))
+
+@app.get(
+    "/ready",
+    summary="Readiness check",
+    responses={503: {"description": "Not ready (see `checks`), starting or stopping"}},
+)
+async def ready() -> Response:
+    # Precomputed by the readiness task (QA_READY_INTERVAL); nothing is checked here.
+    status, body = readiness.response()
+    return RawJSONResponse(body, status_code=status)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint():
+    return PlainTextResponse(metrics.render(), media_type=METRICS_CONTENT_TYPE)
@@ -0,0 +1,53 @@
+# tests/api/test_bench_suite.py
+import importlib
+import json
+import os
+import sys
+
+from app.main import create_app
+from app.settings import Settings
+
+BENCH_DIR = os.path.join(os.path.dirname(__file__), "..", "perf", "bench")
+sys.path.insert(0, os.path.abspath(BENCH_DIR))
+bench_suite = importlib.import_module("bench_suite")
+
+
+def result(ops, alloc_kib=10.0):
+    return {"ops": ops, "p50_us": 100.0, "p99_us": 200.0, "alloc_kib": alloc_kib, "iterations": 100}
+
+
+def test_every_route_has_a_request_spec():
+    app = create_app(Settings(log_enabled=False))
+    assert [route for route in bench_suite.routes(app) if route not in bench_suite.SPECS] == []
+
+
+def test_compare_flags_slowdowns_and_memory_growth_beyond_tolerance():
+    baseline = {"results": {
+        "main GET /a": result(1000), "main GET /b": result(1000), "main GET /c": result(1000, alloc_kib=10.0),
+    }}
+    results = {
+        "main GET /a": result(800),                  # -20%: within 25%
+        "main GET /b": result(700),                  # -30%
+        "main GET /c": result(1000, alloc_kib=20.0),  # +100% memory
+        "main GET /d": result(50),                   # not in the baseline
+    }
+    verdicts = {key: verdict for key, _, _, verdict in bench_suite.compare(results, baseline, 1.0, 0.25)}
+    assert verdicts == {"main GET /a": "ok", "main GET /b": "REGRESSION", "main GET /c": "REGRESSION",
+                        "main GET /d": "new"}
+    # A machine half as fast (reference score) expects half the ops/s.
+    verdicts = {key: verdict for key, _, _, verdict in bench_suite.compare(results, baseline, 0.5, 0.25)}
+    assert verdicts["main GET /b"] == "ok"
+
+
+def test_baseline_from_another_python_is_refused():
+    assert bench_suite.python_mismatch({"python": "3.11.7"}, "3.11.9") is None
+    assert bench_suite.python_mismatch({}, "3.13.0") is None
+    assert "3.11.7" in bench_suite.python_mismatch({"python": "3.11.7"}, "3.13.0")
+
+
+def test_committed_baseline_covers_both_apps():
+    with open(bench_suite.BASELINE) as f:
+        baseline = json.load(f)
+    keys = set(baseline["results"])
+    assert "main GET /health" in keys and "backend POST /api/login" in keys
+    assert all({"ops", "p50_us", "p99_us", "alloc_kib"} <= set(entry) for entry in baseline["results"].values())
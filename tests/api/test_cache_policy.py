@@ -0,0 +1,92 @@
+# tests/api/test_cache_policy.py
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+
+from app.cache_policy import (
+    CACHE_POLICY_TABLE,
+    DEFAULT_POLICY,
+    NO_STORE,
+    STATIC,
+    CachePolicyMiddleware,
+    PolicyTable,
+    policy_for,
+)
+from app.main import app
+
+client = TestClient(app)
+
+
+@pytest.mark.parametrize("path", [p for p in CACHE_POLICY_TABLE if not p.endswith("*")])
+def test_every_exact_route_follows_table(path):
+    with TestClient(app) as started:  # /ready answers 503 until lifespan startup ran
+        r = started.get(path)
+    assert r.status_code == 200
+    assert r.headers["cache-control"] == CACHE_POLICY_TABLE[path].cache_control
+
+
+@pytest.mark.parametrize("path,expected", [
+    ("/api/login", NO_STORE),
+    ("/api/contact", NO_STORE),
+    ("/api/anything/else", NO_STORE),
+    ("/sitemap.xml", STATIC),
+    ("/not-in-table", DEFAULT_POLICY),
+])
+def test_policy_lookup(path, expected):
+    assert policy_for(path) == expected
+
+
+def test_api_responses_are_no_store():
+    r = client.post("/api/login", json={"username": "u", "password": "p"})
+    assert r.headers["cache-control"] == "no-store"
+    assert "etag" not in r.headers
+
+
+# ---------- Conditional GET short-circuit ----------
+calls = {"n": 0}
+demo = FastAPI()
+
+
+@demo.get("/static")
+async def static():
+    calls["n"] += 1
+    return PlainTextResponse("static body")
+
+
+@pytest.fixture
+def demo_client():
+    calls["n"] = 0
+    mw = CachePolicyMiddleware(demo.router, table=PolicyTable({"/static": STATIC}))
+    return TestClient(mw), mw
+
+
+def test_handler_runs_once_then_served_from_memory(demo_client):
+    c, _ = demo_client
+    first = c.get("/static")
+    second = c.get("/static")
+    assert first.text == second.text == "static body"
+    assert first.headers["etag"] == second.headers["etag"]
+    assert calls["n"] == 1
+
+
+def test_if_none_match_and_if_modified_since_skip_handler(demo_client):
+    c, _ = demo_client
+    first = c.get("/static")
+    by_etag = c.get("/static", headers={"If-None-Match": first.headers["etag"]})
+    by_date = c.get("/static", headers={"If-Modified-Since": first.headers["last-modified"]})
+    stale = c.get("/static", headers={"If-None-Match": '"nope"'})
+    assert by_etag.status_code == by_date.status_code == 304
+    assert stale.status_code == 200
+    assert calls["n"] == 1
+
+
+def test_query_string_bypasses_memo_and_invalidate_resets(demo_client):
+    c, mw = demo_client
+    c.get("/static?v=1")
+    c.get("/static?v=2")
+    assert calls["n"] == 2
+    c.get("/static")
+    mw.invalidate("/static")
+    c.get("/static")
+    assert calls["n"] == 4
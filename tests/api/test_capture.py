@@ -0,0 +1,177 @@
+# tests/api/test_capture.py
+import asyncio
+import importlib
+import json
+import os
+import sys
+from urllib.parse import parse_qsl
+
+import httpx
+from fastapi.testclient import TestClient
+
+from app.capture import REDACTED, TrafficCapture
+from app.main import create_app
+from app.settings import Settings
+
+PERF_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "perf"))
+sys.path.insert(0, PERF_DIR)
+replay = importlib.import_module("replay")
+
+
+def settings_for(tmp_path, **overrides):
+    return Settings(
+        contact_db_path=str(tmp_path / "contacts.db"), log_enabled=False, capture_enabled=True,
+        capture_file=str(tmp_path / "capture" / "requests.jsonl"), **overrides,
+    )
+
+
+def captured(settings):
+    with open(settings.capture_file) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_capture_records_redacted_requests(tmp_path):
+    settings = settings_for(tmp_path)
+    with TestClient(create_app(settings)) as client:
+        assert client.post("/api/login", json={"username": "admin", "password": "1234"},
+                           headers={"Authorization": "Bearer abc"}).status_code == 200
+        assert client.post("/api/contact", json={"name": "Ann", "email": "ann@example.com", "message": "hi"}
+                           ).status_code == 200
+        client.get("/api/contacts?q=ann&token=s3cret")
+        client.get("/health")  # excluded
+        client.get("/metrics")  # excluded
+        stats = client.app.state.capture.stats()
+    assert stats["enqueued"] == 3 and stats["dropped"] == 0
+
+    login, contact, search = captured(settings)
+    assert (login["method"], login["path"], login["status"]) == ("POST", "/api/login", 200)
+    assert json.loads(login["body"]) == {"username": "admin", "password": REDACTED}
+    assert login["headers"]["authorization"] == REDACTED
+    assert login["headers"]["content-type"] == "application/json"
+    assert login["ts"] <= contact["ts"] and contact["duration_ms"] >= 0
+    assert json.loads(contact["body"])["email"] == "ann@example.com"
+    assert parse_qsl(search["query"]) == [("q", "ann"), ("token", REDACTED)]
+    assert "body" not in search and "truncated" not in search
+
+
+def test_capture_flags_bodies_the_app_did_not_read(tmp_path):
+    settings = settings_for(tmp_path, capture_max_body_bytes=16)
+    with TestClient(create_app(settings)) as client:
+        client.post("/api/contact", json={"name": "A" * 40, "email": "a@b.com", "message": "x"})
+        client.post("/nope", content=b"0123456789")  # 404: body never read
+    long_body, unread = captured(settings)
+    assert long_body["truncated"] is True and long_body["body"] == REDACTED and long_body["body_bytes"] == 16
+    assert unread["status"] == 404 and unread["truncated"] is True
+
+
+def test_capture_redacts_login_without_content_type(tmp_path):
+    settings = settings_for(tmp_path)
+    with TestClient(create_app(settings)) as client:
+        r = client.post("/api/login", content=b'{"username":"admin","password":"hunter2"}')
+        assert r.status_code == 200
+    (login,) = captured(settings)
+    assert "content-type" not in login["headers"]
+    assert json.loads(login["body"]) == {"username": "admin", "password": REDACTED}
+
+
+def encoded(capture, body, content_type=None, content_length=None, truncated=False):
+    headers = [(b"content-type", content_type.encode())] if content_type else []
+    headers.append((b"content-length", str(content_length or len(body)).encode()))
+    return json.loads(capture.encode((1.0, "POST", "/api/login", b"", headers, body, truncated, 200, 1.0)))
+
+
+def test_capture_never_writes_bodies_it_cannot_redact(tmp_path):
+    capture = TrafficCapture(settings_for(tmp_path))
+    secret = b'{"username":"admin","password":"hunter2"}'
+    # Wrong content-type: still parsed as JSON.
+    assert json.loads(encoded(capture, secret, "text/plain")["body"])["password"] == REDACTED
+    # Form body without a content-type.
+    assert parse_qsl(encoded(capture, b"username=admin&password=hunter2")["body"]) == [
+        ("username", "admin"), ("password", REDACTED)]
+    # Partial bodies (cut, or content-length above what was read) are withheld.
+    for entry in (encoded(capture, secret[:30], "application/json", content_length=len(secret)),
+                  encoded(capture, secret[:30], "application/json", truncated=True)):
+        assert entry["truncated"] is True and entry["body"] == REDACTED and "hunter2" not in json.dumps(entry)
+    # Neither JSON nor a form, or not UTF-8.
+    for body in (b"password: hunter2", b"\xff\xfepassword=hunter2"):
+        entry = encoded(capture, body, "text/plain")
+        assert entry["body"] == REDACTED and entry["body_bytes"] == len(body)
+
+
+def test_capture_sampling_and_full_queue_are_counted(tmp_path):
+    capture = TrafficCapture(settings_for(tmp_path, capture_sample_rate=0.5, capture_queue_size=1))
+    capture._random = iter([0.1, 0.9, 0.2]).__next__
+    assert [capture.wanted("/api/contact") for _ in range(3)] == [True, False, True]
+    assert not capture.wanted("/health")
+    pending = (1.0, "GET", "/", b"", [], b"", False, 200, 1.0)
+    capture.record(pending)
+    capture.record(pending)  # writer not started: queue of one is full
+    assert capture.stats()["sampled_out"] == 1 and capture.stats()["dropped"] == 1
+    capture.start()
+    capture.stop()
+    assert capture.stats()["written"] == 1
+
+
+def write_capture(path, entries):
+    with open(path, "w") as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+    return str(path)
+
+
+def login_entry(ts, password=REDACTED):
+    return {"ts": ts, "method": "POST", "path": "/api/login",
+            "headers": {"content-type": "application/json", "host": "old", "content-length": "40"},
+            "body": json.dumps({"username": "admin", "password": password}, separators=(",", ":")),
+            "status": 200}
+
+
+def test_replay_keeps_inter_arrival_times_scaled(tmp_path):
+    path = write_capture(tmp_path / "c.jsonl", [
+        login_entry(1000.0), login_entry(1001.0),
+        {"ts": 1002.0, "method": "GET", "path": "/health", "headers": {}, "status": 200},
+        {"ts": 1002.0, "method": "GET", "path": "/missing", "headers": {}, "status": 200},
+        # Bodies the capture withheld are never sent.
+        {"ts": 1002.0, "method": "POST", "path": "/api/login", "headers": {}, "body": REDACTED, "body_bytes": 9,
+         "status": 200},
+        {"ts": 1002.0, "method": "POST", "path": "/api/contact", "headers": {}, "body": REDACTED,
+         "body_bytes": 16, "truncated": True, "status": 200},
+    ])
+    app = create_app(Settings(contact_db_path=str(tmp_path / "contacts.db"), log_enabled=False))
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay") as client:
+            return await replay.replay(replay.read_entries(path), client, speed=10)
+
+    report = asyncio.run(main())
+    summary = report.summary()
+    assert 0.2 <= summary["elapsed_s"] < 1.5  # 2 s of traffic at 10x
+    assert summary["requests"] == 4
+    assert summary["not_replayable"] == 2
+    assert summary["not_replayable_by_endpoint"] == {"POST /api/contact": 1, "POST /api/login": 1}
+    assert summary["endpoints"]["POST /api/login"]["requests"] == 2
+    assert summary["endpoints"]["GET /missing"]["status_mismatch"] == 1
+    assert all(s["errors"] == 0 for s in summary["endpoints"].values())
+
+
+def test_replay_fill_restores_redacted_fields(tmp_path):
+    method, url, headers, body = replay.build_request(login_entry(1.0), {"password": "1234"})
+    assert (method, url) == ("POST", "/api/login")
+    assert headers == {"content-type": "application/json"}
+    assert json.loads(body) == {"username": "admin", "password": "1234"}
+    _, _, _, untouched = replay.build_request(login_entry(1.0), {})
+    assert json.loads(untouched)["password"] == REDACTED
+    form = {"ts": 1.0, "method": "POST", "path": "/api/login", "headers": {},
+            "body": "username=admin&password=%5Bredacted%5D"}
+    _, _, _, filled = replay.build_request(form, {"password": "1 2&3"})
+    assert parse_qsl(filled.decode()) == [("username", "admin"), ("password", "1 2&3")]
+
+
+def test_replay_cli_in_process(tmp_path, monkeypatch, capsys):
+    monkeypatch.setenv("QA_CONTACT_DB_PATH", str(tmp_path / "contacts.db"))
+    monkeypatch.setenv("QA_LOG_ENABLED", "0")
+    path = write_capture(tmp_path / "c.jsonl", [login_entry(float(i)) for i in range(20)])
+    assert replay.main([path, "--app", "app.main:create_app", "--speed", "0", "--json"]) == 0
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["endpoints"]["POST /api/login"]["requests"] == 20
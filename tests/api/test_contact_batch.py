@@ -0,0 +1,117 @@
+# tests/api/test_contact_batch.py
+import asyncio
+import json
+import tracemalloc
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from app.contact_queue import ContactPipeline
+from app.main import create_app
+from app.settings import Settings
+
+NDJSON = {"Content-Type": "application/x-ndjson"}
+
+
+class Sink:
+    """Stands in for the pipeline: counts records, always has room."""
+
+    def __init__(self):
+        self.count = 0
+
+    async def submit_wait(self, name, email, message, timeout):
+        self.count += 1
+        return True
+
+    def stats(self):
+        return {"accepted": self.count}
+
+
+@pytest.fixture
+def sink():
+    return Sink()
+
+
+def client_for(sink, **settings) -> TestClient:
+    return TestClient(create_app(Settings(**settings), contact_pipeline=sink))
+
+
+def ndjson(*records) -> bytes:
+    return b"".join((r if isinstance(r, bytes) else json.dumps(r).encode()) + b"\n" for r in records)
+
+
+def test_mixed_batch_reports_line_indexed_errors(sink):
+    body = ndjson(
+        {"name": "A", "email": "a@example.com", "message": "one"},
+        b"{not json",
+        {"name": "B", "email": "not-an-email", "message": "two"},
+        b"",
+        {"name": "C", "email": "c@example.com", "message": "three"},
+    )
+    r = client_for(sink).post("/api/contact/batch", content=body, headers=NDJSON)
+    assert r.status_code == 200
+    out = r.json()
+    assert out["accepted"] == 2 and out["rejected"] == 2
+    assert [e["line"] for e in out["errors"]] == [2, 3]
+    assert "email" in out["errors"][1]["error"]
+    assert sink.count == 2
+
+
+def test_streamed_chunks_split_mid_line(sink):
+    body = ndjson(*({"name": f"n{i}", "email": "x@example.com", "message": "m"} for i in range(100)))
+    chunks = (body[i:i + 7] for i in range(0, len(body), 7))
+    r = client_for(sink).post("/api/contact/batch", content=chunks, headers=NDJSON)
+    assert r.json()["accepted"] == 100
+    assert sink.count == 100
+
+
+def test_last_line_without_newline_and_oversized_line(sink):
+    client = client_for(sink, contact_batch_max_line_bytes=64)
+    body = b'{"name": "x"}\n' + b'{"message": "' + b"a" * 200 + b'"}\n{"name": "tail"}'
+    out = client.post("/api/contact/batch", content=body, headers=NDJSON).json()
+    assert out["accepted"] == 2
+    assert out["errors"] == [{"line": 2, "error": "line longer than 64 bytes"}]
+
+
+def test_error_list_is_capped(sink):
+    out = client_for(sink, contact_batch_max_errors=3).post("/api/contact/batch", content=b"nope\n" * 10, headers=NDJSON).json()
+    assert out["rejected"] == 10
+    assert len(out["errors"]) == 3
+    assert out["errors_truncated"] is True
+
+
+def test_wrong_content_type_is_415(sink):
+    r = client_for(sink).post("/api/contact/batch", json={"name": "x"})
+    assert r.status_code == 415
+
+
+def test_full_queue_rejects_lines_instead_of_hanging(tmp_path):
+    full = ContactPipeline(Settings(contact_db_path=str(tmp_path / "c.db"), contact_queue_size=1))
+    out = client_for(full, contact_batch_enqueue_timeout=0.01).post("/api/contact/batch", content=ndjson({}, {}, {}), headers=NDJSON).json()
+    assert out["accepted"] == 1 and out["rejected"] == 2
+
+
+def test_memory_does_not_grow_with_upload_size(sink):
+    # TestClient buffers request bodies; httpx's ASGITransport really streams.
+    line = ndjson({"name": "Eddie", "email": "a@b.com", "message": "Hello from QA site!"})
+
+    async def upload(n):
+        for _ in range(n // 100):
+            yield line * 100
+
+    async def post(n):
+        transport = httpx.ASGITransport(app=create_app(contact_pipeline=sink))
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+            return await c.post("/api/contact/batch", content=upload(n), headers=NDJSON)
+
+    def peak(n):
+        tracemalloc.start()
+        r = asyncio.run(post(n))
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert r.json()["accepted"] == n
+        return peak_bytes
+
+    small, large = peak(500), peak(5_000)
+    assert large < small * 1.5
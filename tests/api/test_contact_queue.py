@@ -0,0 +1,94 @@
+# tests/api/test_contact_queue.py
+import asyncio
+import sqlite3
+
+from fastapi.testclient import TestClient
+
+from app.contact_queue import ContactPipeline
+from app.settings import Settings
+
+
+def make_pipeline(tmp_path, **overrides) -> ContactPipeline:
+    return ContactPipeline(Settings(contact_db_path=str(tmp_path / "contacts.db"), **overrides))
+
+
+def rows(tmp_path):
+    with sqlite3.connect(tmp_path / "contacts.db") as conn:
+        return conn.execute("SELECT name, email, message FROM contacts ORDER BY id").fetchall()
+
+
+def test_flushes_by_size_in_batches(tmp_path):
+    pipeline = make_pipeline(tmp_path, contact_batch_size=10, contact_flush_interval=5.0)
+
+    async def scenario():
+        await pipeline.start()
+        for i in range(30):
+            assert pipeline.submit(f"n{i}", "a@b.com", "hello")
+        await asyncio.wait_for(pipeline.queue.join(), 1.0)  # 5s interval never reached
+        await pipeline.stop()
+
+    asyncio.run(scenario())
+    assert len(rows(tmp_path)) == 30
+    assert pipeline.stats()["batches"] == 3
+    assert pipeline.stats()["flush_seconds_max"] > 0
+
+
+def test_flushes_by_time(tmp_path):
+    pipeline = make_pipeline(tmp_path, contact_batch_size=1000, contact_flush_interval=0.02)
+
+    async def scenario():
+        await pipeline.start()
+        pipeline.submit("Eddie", "a@b.com", "hello")
+        await asyncio.sleep(0.2)
+        written = pipeline.written
+        await pipeline.stop()
+        return written
+
+    assert asyncio.run(scenario()) == 1
+
+
+def test_full_queue_rejects_without_blocking(tmp_path):
+    pipeline = make_pipeline(tmp_path, contact_queue_size=2)
+    assert pipeline.submit("a", "a@b.com", "m")
+    assert pipeline.submit("b", "a@b.com", "m")
+    assert not pipeline.submit("c", "a@b.com", "m")
+    assert pipeline.stats()["queue_depth"] == 2
+    assert pipeline.stats()["rejected"] == 1
+
+
+def test_stop_drains_pending_records(tmp_path):
+    pipeline = make_pipeline(tmp_path, contact_batch_size=1000, contact_flush_interval=10.0)
+
+    async def scenario():
+        pipeline.submit("before-start", "a@b.com", "m")
+        await pipeline.start()
+        for i in range(50):
+            pipeline.submit(f"n{i}", "a@b.com", "m")
+        await pipeline.stop()
+
+    asyncio.run(scenario())
+    names = [r[0] for r in rows(tmp_path)]
+    assert names[0] == "before-start"
+    assert len(names) == 51
+
+
+def test_contact_returns_503_with_retry_after_when_full(tmp_path):
+    from app.main import create_app
+
+    settings = Settings(contact_db_path=str(tmp_path / "contacts.db"), contact_queue_size=1, contact_retry_after=7)
+    full = ContactPipeline(settings)
+    full.submit("x", "a@b.com", "m")
+    r = TestClient(create_app(settings, contact_pipeline=full)).post(
+        "/api/contact", json={"name": "J", "email": "j@example.com", "message": "Hi"}
+    )
+    assert r.status_code == 503
+    assert r.headers["retry-after"] == "7"
+
+
+def test_contact_persists_through_app_lifespan(tmp_path):
+    from app.main import create_app
+
+    with TestClient(create_app(Settings(contact_db_path=str(tmp_path / "contacts.db")))) as client:
+        r = client.post("/api/contact", json={"name": "J", "email": "j@example.com", "message": "Hi"})
+        assert r.status_code == 200
+    assert rows(tmp_path) == [("J", "j@example.com", "Hi")]
@@ -0,0 +1,127 @@
+# tests/api/test_contact_search.py
+import csv
+import io
+import json
+import sqlite3
+
+from fastapi.testclient import TestClient
+
+from app.contact_queue import INSERT_SQL, open_db
+from app.main import create_app
+from app.settings import Settings
+
+TOKEN = "s3cret"
+AUTH = {"Authorization": f"Bearer {TOKEN}"}
+DAY = 86400.0
+T0 = 1_700_000_000.0  # 2023-11-14T22:13:20Z
+
+
+def seed(path, n=25):
+    conn = open_db(str(path))
+    with conn:
+        conn.executemany(INSERT_SQL, [
+            (f"User {i}", f"user{i % 5}@example.com", f"order {i} arrived {'broken' if i % 3 == 0 else 'fine'}",
+             T0 + i * DAY)
+            for i in range(n)
+        ])
+    conn.close()
+
+
+def client_for(tmp_path, **overrides):
+    path = tmp_path / "contacts.db"
+    if not path.exists():
+        seed(path)
+    values = dict(contact_db_path=str(path), admin_token=TOKEN, log_enabled=False)
+    values.update(overrides)
+    return TestClient(create_app(Settings(**values)))
+
+
+def ids(response):
+    return [item["id"] for item in response.json()["items"]]
+
+
+def test_admin_token_required(tmp_path):
+    with client_for(tmp_path, admin_token="") as client:
+        assert client.get("/api/contacts", headers=AUTH).status_code == 403
+    with client_for(tmp_path) as client:
+        assert client.get("/api/contacts").status_code == 401
+        r = client.get("/api/contacts", headers={"Authorization": "Bearer nope"})
+        assert r.status_code == 401 and r.headers["www-authenticate"] == "Bearer"
+        assert client.get("/api/contacts/export", headers={"Authorization": "Bearer nope"}).status_code == 401
+
+
+def test_keyset_pages_cover_everything_newest_first(tmp_path):
+    seen, cursor = [], None
+    with client_for(tmp_path) as client:
+        while True:
+            params = {"limit": 7, **({"cursor": cursor} if cursor else {})}
+            r = client.get("/api/contacts", params=params, headers=AUTH)
+            assert r.status_code == 200
+            seen += ids(r)
+            cursor = r.json()["next_cursor"]
+            if cursor is None:
+                break
+        first = client.get("/api/contacts", params={"limit": 1}, headers=AUTH).json()["items"][0]
+    assert seen == list(range(25, 0, -1))
+    assert first["created_at"] == "2023-12-08T22:13:20Z"
+
+
+def test_filters(tmp_path):
+    with client_for(tmp_path) as client:
+        def search(**params):
+            r = client.get("/api/contacts", params=params, headers=AUTH)
+            assert r.status_code == 200, r.text
+            return ids(r)
+
+        assert search(email="USER1@example.com") == [22, 17, 12, 7, 2]
+        assert search(since="2023-11-16T22:13:20Z", until="2023-11-19T22:13:20") == [5, 4, 3]
+        assert search(q="Broken order") == [25, 22, 19, 16, 13, 10, 7, 4, 1]
+        assert search(q='"broken*', email="user0@example.com") == [16, 1]  # words, not FTS syntax
+        assert search(q="missing") == []
+        first = client.get("/api/contacts", params={"q": "broken", "limit": 5}, headers=AUTH).json()
+        assert search(q="broken", limit=5, cursor=first["next_cursor"]) == [10, 7, 4, 1]
+        assert client.get("/api/contacts", params={"q": "!!!"}, headers=AUTH).status_code == 400
+        assert client.get("/api/contacts", params={"cursor": "garbage"}, headers=AUTH).status_code == 400
+
+
+def test_export_streams_every_page(tmp_path):
+    seed(tmp_path / "contacts.db")
+    conn = open_db(str(tmp_path / "contacts.db"))
+    with conn:
+        conn.execute(INSERT_SQL, ("=HYPERLINK(\"x\")", "evil@example.com", "formula, \"quoted\"\nline", T0 + 99 * DAY))
+    conn.close()
+    with client_for(tmp_path, contact_export_page_size=4) as client:
+        r = client.get("/api/contacts/export", headers=AUTH)
+        assert r.headers["content-type"] == "application/x-ndjson"
+        rows = [json.loads(line) for line in r.text.splitlines()]
+        assert [row["id"] for row in rows] == list(range(26, 0, -1))
+
+        r = client.get("/api/contacts/export", params={"format": "csv", "q": "formula"}, headers=AUTH)
+        assert r.headers["content-type"].startswith("text/csv")
+        assert 'filename="contacts.csv"' in r.headers["content-disposition"]
+        table = list(csv.reader(io.StringIO(r.text)))
+    assert table[0] == ["id", "name", "email", "message", "created_at"]
+    assert table[1][:4] == ["26", "'=HYPERLINK(\"x\")", "evil@example.com", "formula, \"quoted\"\nline"]
+    assert len(table) == 2
+    assert client.app.state.contact_search.stats()["queries"] >= 8  # one per export page
+
+
+def test_existing_database_gets_indexed(tmp_path):
+    path = tmp_path / "contacts.db"
+    with sqlite3.connect(path) as conn:  # schema from before the search index
+        conn.execute("CREATE TABLE contacts (id INTEGER PRIMARY KEY, name TEXT NOT NULL, email TEXT NOT NULL,"
+                     " message TEXT NOT NULL, created_at REAL NOT NULL)")
+        conn.execute(INSERT_SQL, ("Old", "old@example.com", "legacy message", T0))
+    conn.close()
+    with client_for(tmp_path) as client:
+        assert ids(client.get("/api/contacts", params={"q": "legacy"}, headers=AUTH)) == [1]
+
+
+def test_posted_contacts_are_searchable(tmp_path):
+    with client_for(tmp_path) as client:
+        assert client.post("/api/contact", json={"name": "Eddie", "email": "eddie@b.com",
+                                                 "message": "Searchable hello"}).status_code == 200
+    # Shutdown drained the writer queue.
+    with client_for(tmp_path) as client:
+        r = client.get("/api/contacts", params={"q": "searchable"}, headers=AUTH)
+    assert [item["email"] for item in r.json()["items"]] == ["eddie@b.com"]
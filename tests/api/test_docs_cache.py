@@ -0,0 +1,104 @@
+# tests/api/test_docs_cache.py
+import gzip
+import json
+
+import brotli
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.docs_cache import DocsCache, DocsCacheMiddleware
+from app.main import app, create_app
+from app.settings import Settings
+
+client = TestClient(app)
+
+DOC_PATHS = ["/openapi.json", "/docs", "/redoc"]
+
+
+def test_openapi_bytes_match_fastapi_schema():
+    r = client.get("/openapi.json")
+    assert r.json() == app.openapi()
+
+
+@pytest.mark.parametrize("path", DOC_PATHS)
+def test_if_none_match_returns_304(path):
+    first = client.get(path)
+    etag = first.headers["etag"]
+    r = client.get(path, headers={"If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.content == b""
+    assert r.headers["etag"] == etag
+
+
+@pytest.mark.parametrize("encoding,decode", [("gzip", gzip.decompress), ("br", brotli.decompress)])
+def test_precompressed_variants(encoding, decode):
+    identity = client.get("/openapi.json", headers={"Accept-Encoding": "identity"})
+    # Ask httpx not to decode so we see the stored variant as-is.
+    with client.stream("GET", "/openapi.json", headers={"Accept-Encoding": encoding}) as r:
+        raw = b"".join(r.iter_raw())
+        assert r.headers["content-encoding"] == encoding
+        assert r.headers["vary"] == "Accept-Encoding"
+        assert r.headers["etag"] != identity.headers["etag"]
+    assert decode(raw) == identity.content
+
+
+def test_head_has_headers_but_no_body():
+    r = client.head("/openapi.json")
+    assert r.status_code == 200
+    assert r.content == b""
+    assert int(r.headers["content-length"]) > 0
+
+
+def test_cache_rebuilds_when_routes_change():
+    demo = FastAPI()
+    cache = DocsCache(demo)
+    demo.add_middleware(DocsCacheMiddleware, cache=cache)
+    demo_client = TestClient(demo)
+
+    first = demo_client.get("/openapi.json")
+    assert "/late" not in first.json()["paths"]
+
+    @demo.get("/late")
+    async def late():
+        return {}
+
+    second = demo_client.get("/openapi.json")
+    assert "/late" in json.loads(second.content)["paths"]
+    assert second.headers["etag"] != first.headers["etag"]
+    assert cache.builds == 2
+
+
+def test_other_paths_never_touch_the_routes(monkeypatch):
+    demo = FastAPI()
+
+    @demo.get("/ping")
+    async def ping():
+        return {}
+
+    cache = DocsCache(demo)
+    demo.add_middleware(DocsCacheMiddleware, cache=cache)
+    calls = []
+    fingerprint = cache._routes_fingerprint
+    monkeypatch.setattr(cache, "_routes_fingerprint", lambda: calls.append(1) or fingerprint())
+    client = TestClient(demo)
+    for _ in range(3):
+        assert client.get("/ping").status_code == 200
+    assert calls == [] and cache.builds == 0
+    assert client.get("/docs").status_code == 200
+    assert len(calls) == 2 and cache.builds == 1  # checked, then built
+
+
+def test_docs_render_on_first_use(tmp_path):
+    fresh = create_app(Settings(contact_db_path=str(tmp_path / "contacts.db")))
+    with TestClient(fresh) as c:
+        assert fresh.state.docs_cache.builds == 0
+        assert fresh.openapi_schema is None
+        assert c.get("/docs").status_code == 200
+        assert fresh.state.docs_cache.builds == 1
+
+
+def test_startup_prebuilds_cache_when_asked(tmp_path):
+    fresh = create_app(Settings(contact_db_path=str(tmp_path / "contacts.db"), docs_prebuild=True))
+    with TestClient(fresh):
+        assert set(DOC_PATHS) <= set(fresh.state.docs_cache.assets)
@@ -1,5 +1,6 @@
 # tests/api/test_endpoints.py
 from fastapi.testclient import TestClient
+from app.cache_policy import policy_for
 from app.main import app
 
 client = TestClient(app)
@@ -41,13 +42,14 @@ def test_security_headers_on_openapi():
     assert r.headers.get("cross-origin-opener-policy") == "same-origin"
     assert r.headers.get("cross-origin-embedder-policy") == "require-corp"
     assert r.headers.get("cross-origin-resource-policy") == "same-origin"
-    # No-store to reduce ZAP "storable" warnings in dev
-    assert "no-store" in (r.headers.get("cache-control") or "").lower()
+    # Schema is served from memory with an ETag, so clients must revalidate
+    assert r.headers.get("cache-control") == policy_for("/openapi.json").cache_control
+    assert r.headers.get("etag")
 
 
 def test_sitemap_xml():
     r = client.get("/sitemap.xml")
     assert r.status_code == 200
     assert r.headers["content-type"].startswith("application/xml")
-    assert "no-store" in r.headers.get("cache-control", "").lower()
+    assert r.headers.get("cache-control") == policy_for("/sitemap.xml").cache_control
     assert "<urlset" in r.text
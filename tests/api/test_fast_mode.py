@@ -0,0 +1,38 @@
+# tests/api/test_fast_mode.py
+import pytest
+from fastapi.testclient import TestClient
+
+from app import fast_json
+from app.main import create_app
+from app.settings import Settings
+
+standard_app = create_app(Settings(fast_mode=False))
+fast_app = create_app(Settings(fast_mode=True))
+
+REQUESTS = {
+    "login": ("POST", "/api/login", {"json": {"username": "u", "password": "p"}}),
+    "contact": ("POST", "/api/contact", {"json": {"name": "J", "email": "j@example.com", "message": "Hi"}}),
+    "health": ("GET", "/health", {}),
+}
+
+
+def test_dumps_bytes_fallback_matches_orjson(monkeypatch):
+    pytest.importorskip("orjson")
+    payload = {"msg": "héllo", "n": [1, 2.5, None], "when": object}
+    fast = fast_json.dumps_bytes(payload, default=str)
+    monkeypatch.setattr(fast_json, "orjson", None)
+    assert fast_json.dumps_bytes(payload, default=str) == fast
+
+
+def test_openapi_identical_in_both_modes():
+    assert fast_app.openapi() == standard_app.openapi()
+
+
+@pytest.mark.parametrize("endpoint", sorted(REQUESTS))
+def test_responses_byte_identical_in_both_modes(endpoint):
+    method, path, kwargs = REQUESTS[endpoint]
+    standard = TestClient(standard_app).request(method, path, **kwargs)
+    fast = TestClient(fast_app).request(method, path, **kwargs)
+    assert fast.status_code == standard.status_code == 200
+    assert fast.headers["content-type"] == standard.headers["content-type"]
+    assert fast.content == standard.content
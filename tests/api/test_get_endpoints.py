@@ -14,7 +14,8 @@ Coverage areas per endpoint:
   - Status code
   - Response body shape / content
   - Content-Type header
-  - Security headers (X-Content-Type-Options, COOP, COEP, CORP, Cache-Control)
+  - Security headers (X-Content-Type-Options, COOP, COEP, CORP)
+  - Cache-Control as declared in app.cache_policy.CACHE_POLICY_TABLE
   - Edge cases: trailing slash, wrong method (405), unknown routes (404)
   - Idempotency: same result on repeated calls
   - Response time (soft assertion via elapsed)
@@ -23,6 +24,7 @@ Coverage areas per endpoint:
 import time
 import pytest
 from fastapi.testclient import TestClient
+from app.cache_policy import policy_for
 from app.main import app
 
 client = TestClient(app)
@@ -46,10 +48,19 @@ def assert_security_headers(response):
         assert actual == expected_value, (
             f"Header '{header}': expected '{expected_value}', got '{actual}'"
         )
+    assert_cache_policy(response)
+
+
+def assert_cache_policy(response):
+    """Assert Cache-Control (and validators) match the route's CachePolicy."""
+    policy = policy_for(response.request.url.path)
     cache = response.headers.get("cache-control", "")
-    assert "no-store" in cache.lower(), (
-        f"Expected 'no-store' in Cache-Control, got: '{cache}'"
+    assert cache.lower() == policy.cache_control, (
+        f"Expected Cache-Control '{policy.cache_control}', got: '{cache}'"
     )
+    if policy.conditional:
+        assert response.headers.get("etag"), "Conditional policy requires an ETag"
+        assert response.headers.get("last-modified"), "Conditional policy requires Last-Modified"
 
 
 def assert_fast_response(response, max_seconds: float = 2.0):
@@ -151,8 +162,9 @@ class TestHealth:
         r = client.get("/health")
         assert_security_headers(r)
 
-    def test_cache_control_no_store(self):
+    def test_cache_control_from_policy(self):
         r = client.get("/health")
+        assert_cache_policy(r)
         assert "no-store" in r.headers.get("cache-control", "").lower()
 
     def test_idempotent(self):
@@ -235,9 +247,15 @@ class TestSitemapXml:
         r = client.get("/sitemap.xml")
         assert "sitemaps.org/schemas/sitemap" in r.text
 
-    def test_cache_control_no_store(self):
+    def test_cache_control_from_policy(self):
         r = client.get("/sitemap.xml")
-        assert "no-store" in r.headers.get("cache-control", "").lower()
+        assert_cache_policy(r)
+
+    def test_conditional_get_returns_304(self):
+        etag = client.get("/sitemap.xml").headers["etag"]
+        r = client.get("/sitemap.xml", headers={"If-None-Match": etag})
+        assert r.status_code == 304
+        assert r.content == b""
 
     def test_security_headers(self):
         r = client.get("/sitemap.xml")
@@ -342,9 +360,11 @@ class TestOpenApiJson:
         r = client.get("/openapi.json")
         assert_security_headers(r)
 
-    def test_cache_control_no_store(self):
+    def test_cache_control_from_policy(self):
+        """Served from memory with an ETag: cacheable, but always revalidated."""
         r = client.get("/openapi.json")
-        assert "no-store" in r.headers.get("cache-control", "").lower()
+        assert_cache_policy(r)
+        assert r.headers.get("etag")
 
     def test_idempotent(self):
         r1 = client.get("/openapi.json")
@@ -0,0 +1,183 @@
+# tests/api/test_idempotency.py
+import asyncio
+import sqlite3
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app.idempotency import (
+    Idempotency,
+    IdempotencyMiddleware,
+    IdempotencyStore,
+    InMemoryIdempotencyStore,
+    SQLiteIdempotencyStore,
+    StoredResponse,
+)
+from app.main import create_app
+from app.settings import Settings
+
+CONTACT = {"name": "Eddie", "email": "a@b.com", "message": "Hello from QA site!"}
+
+
+class Sink:
+    """Stands in for the contact pipeline: counts submits."""
+
+    def __init__(self):
+        self.count = 0
+
+    def submit(self, name, email, message):
+        self.count += 1
+        return True
+
+    def stats(self):
+        return {"accepted": self.count}
+
+
+def counting_app(idempotency, delay=0.0, status=200):
+    app = FastAPI()
+    app.state.calls = 0
+
+    @app.post("/api/contact")
+    async def contact(body: dict):
+        app.state.calls += 1
+        await asyncio.sleep(delay)
+        if status != 200:
+            raise HTTPException(status_code=status)
+        return {"call": app.state.calls}
+
+    app.add_middleware(IdempotencyMiddleware, idempotency=idempotency)
+    return app
+
+
+def memory_idempotency():
+    return Idempotency(InMemoryIdempotencyStore(ttl=60, max_entries=100))
+
+
+def test_repeat_contact_is_replayed_without_rerunning_the_handler():
+    sink = Sink()
+    app = create_app(Settings(), contact_pipeline=sink)
+    client = TestClient(app)
+    headers = {"Idempotency-Key": "retry-1"}
+    first = client.post("/api/contact", json=CONTACT, headers=headers)
+    second = client.post("/api/contact", json=CONTACT, headers=headers)
+    assert first.status_code == second.status_code == 200
+    assert second.content == first.content
+    assert second.headers["idempotent-replayed"] == "true"
+    assert "idempotent-replayed" not in first.headers
+    # Replays still go out through the security/cache headers.
+    assert second.headers["x-content-type-options"] == "nosniff"
+    assert second.headers["cache-control"] == first.headers["cache-control"]
+    assert sink.count == 1
+    stats = app.state.idempotency.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_ratio"]) == (1, 1, 0.5)
+
+
+def test_requests_without_a_key_always_run():
+    app = counting_app(memory_idempotency())
+    client = TestClient(app)
+    for _ in range(3):
+        client.post("/api/contact", json=CONTACT)
+    assert app.state.calls == 3
+
+
+def test_key_reused_with_another_body_is_422():
+    app = counting_app(memory_idempotency())
+    client = TestClient(app)
+    client.post("/api/contact", json=CONTACT, headers={"Idempotency-Key": "k"})
+    r = client.post("/api/contact", json={**CONTACT, "message": "other"}, headers={"Idempotency-Key": "k"})
+    assert r.status_code == 422
+    assert app.state.calls == 1
+
+
+def test_invalid_key_is_400():
+    client = TestClient(counting_app(memory_idempotency()))
+    assert client.post("/api/contact", json=CONTACT, headers={"Idempotency-Key": "x" * 256}).status_code == 400
+
+
+def test_server_errors_are_not_stored():
+    app = counting_app(memory_idempotency(), status=503)
+    client = TestClient(app)
+    for _ in range(2):
+        assert client.post("/api/contact", json=CONTACT, headers={"Idempotency-Key": "k"}).status_code == 503
+    assert app.state.calls == 2
+
+
+async def _burst(apps, n, key="burst"):
+    clients = [
+        httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") for app in apps
+    ]
+    try:
+        return await asyncio.gather(*(
+            clients[i % len(clients)].post("/api/contact", json=CONTACT, headers={"Idempotency-Key": key})
+            for i in range(n)
+        ))
+    finally:
+        for client in clients:
+            await client.aclose()
+
+
+def test_concurrent_duplicates_coalesce():
+    idempotency = memory_idempotency()
+    app = counting_app(idempotency, delay=0.05)
+    responses = asyncio.run(_burst([app], 5))
+    assert app.state.calls == 1
+    assert {r.content for r in responses} == {b'{"call":1}'}
+    assert idempotency.stats()["coalesced"] == 4
+
+
+def test_sqlite_store_dedupes_across_workers(tmp_path):
+    path = str(tmp_path / "idempotency.db")
+    states = [Idempotency(SQLiteIdempotencyStore(path, ttl=60, max_entries=100)) for _ in range(2)]
+    workers = [counting_app(state, delay=0.1) for state in states]
+    responses = asyncio.run(_burst(workers, 4))
+    assert sum(app.state.calls for app in workers) == 1
+    assert {r.status_code for r in responses} == {200}
+    assert len({r.content for r in responses}) == 1
+    # A later retry on either worker is served from the shared table.
+    again = asyncio.run(_burst(workers[1:], 1))
+    assert again[0].headers["idempotent-replayed"] == "true"
+    assert sum(app.state.calls for app in workers) == 1
+    for state in states:
+        state.close()
+
+
+def test_sqlite_store_counts_entries_without_querying(tmp_path):
+    path = str(tmp_path / "idempotency.db")
+    store = SQLiteIdempotencyStore(path, ttl=60, max_entries=100)
+    response = StoredResponse("fp", 200, [], b"{}")
+
+    async def scenario():
+        for key in ("a", "b"):
+            assert await store.claim(key)
+            await store.put(key, response)
+        assert await store.claim("c")  # pending claims are not entries
+        await store.release("c")
+        counts = [store.entries()]
+        with sqlite3.connect(path) as conn:
+            conn.execute("UPDATE idempotency SET expires_at = 0 WHERE key = 'a'")
+        assert await store.claim("a")  # drops the expired response
+        counts.append(store.entries())
+        return counts
+
+    assert asyncio.run(scenario()) == [2, 1]
+    store.close()
+
+
+def test_incomplete_store_fails_at_construction():
+    class WriteOnlyStore(IdempotencyStore):
+        async def put(self, key, response):
+            pass
+
+    with pytest.raises(TypeError, match="get"):
+        WriteOnlyStore()
+
+
+def test_memory_store_is_bounded():
+    store = InMemoryIdempotencyStore(ttl=60, max_entries=2)
+    app = counting_app(Idempotency(store))
+    client = TestClient(app)
+    for key in ("a", "b", "c"):
+        client.post("/api/contact", json=CONTACT, headers={"Idempotency-Key": key})
+    assert store.entries() == 2 and store.evictions == 1
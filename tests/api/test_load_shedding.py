@@ -0,0 +1,117 @@
+# tests/api/test_load_shedding.py
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.settings import Settings
+from app.shedding import LoadShedder, LoadSheddingMiddleware
+
+
+def shedding_settings(**overrides):
+    values = dict(
+        shed_api_max_in_flight=2,
+        shed_queue_target=0.01,
+        shed_interval=0.02,
+        shed_max_queue=100,
+        shed_max_wait=5.0,
+    )
+    values.update(overrides)
+    return Settings(**values)
+
+
+def slow_app(shedder, delay):
+    app = FastAPI()
+    app.state.running = app.state.peak = 0
+
+    @app.get("/api/slow")
+    async def slow():
+        app.state.running += 1
+        app.state.peak = max(app.state.peak, app.state.running)
+        await asyncio.sleep(delay)
+        app.state.running -= 1
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    app.add_middleware(LoadSheddingMiddleware, shedder=shedder)
+    return app
+
+
+async def _flood(app, n, extra=()):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        return await asyncio.gather(*(client.get(path) for path in ["/api/slow"] * n + list(extra)))
+
+
+def test_short_burst_queues_without_shedding():
+    shedder = LoadShedder(shedding_settings(shed_queue_target=1.0))
+    app = slow_app(shedder, delay=0.01)
+    responses = asyncio.run(_flood(app, 6))
+    assert {r.status_code for r in responses} == {200}
+    assert app.state.peak == 2
+    assert shedder.stats()["shed"] == 0
+
+
+def test_standing_queue_is_shed_with_503_and_retry_after():
+    shedder = LoadShedder(shedding_settings())
+    app = slow_app(shedder, delay=0.02)
+    responses = asyncio.run(_flood(app, 40, extra=["/health"] * 5))
+    slow, health = responses[:40], responses[40:]
+    statuses = [r.status_code for r in slow]
+    assert statuses.count(503) > 0 and statuses.count(200) >= 2
+    shed = next(r for r in slow if r.status_code == 503)
+    assert shed.headers["retry-after"] == "1"
+    assert shed.json() == {"detail": "Server overloaded, retry later"}
+    # Probes bypass the limiter.
+    assert {r.status_code for r in health} == {200}
+    assert app.state.peak == 2
+    stats = shedder.stats()
+    assert stats["shed"] == statuses.count(503)
+    assert (stats["in_flight"], stats["queued"]) == (0, 0)
+
+
+def test_hard_queue_bound_sheds_immediately():
+    shedder = LoadShedder(shedding_settings(shed_queue_target=10.0, shed_max_queue=3))
+    app = slow_app(shedder, delay=0.02)
+    statuses = [r.status_code for r in asyncio.run(_flood(app, 10))]
+    assert statuses.count(200) == 5 and statuses.count(503) == 5
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    shedder = LoadShedder(shedding_settings(shed_queue_target=10.0))
+    limiter = shedder.limiter_for("/api/slow")
+
+    async def scenario():
+        assert await limiter.acquire() and await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        limiter.release()  # hands the slot to the waiter...
+        waiter.cancel()    # ...which goes away before it runs
+        await asyncio.gather(waiter, return_exceptions=True)
+        limiter.release()
+
+    asyncio.run(scenario())
+    assert (limiter.in_flight, limiter.queued) == (0, 0)
+
+
+def test_route_classes():
+    shedder = LoadShedder(Settings())
+    assert shedder.limiter_for("/health") is None
+    assert shedder.limiter_for("/metrics") is None
+    assert shedder.limiter_for("/api/login").name == "api"
+    assert shedder.limiter_for("/docs").name == "default"
+    assert shedder.limiter_for("/api/login").max_in_flight == Settings().shed_api_max_in_flight
+
+
+def test_main_app_exports_shedding_metrics():
+    client = TestClient(create_app(Settings()))
+    client.get("/sitemap.xml")
+    client.get("/health")
+    text = client.get("/metrics").text
+    assert 'qa_shed_requests_total{class="api"} 0' in text
+    assert 'qa_shed_queue_seconds_bucket{class="default",le="0.001"} 1' in text
+    assert 'qa_shed_queue_seconds_count{class="default"} 1' in text
@@ -0,0 +1,98 @@
+# tests/api/test_log_pipeline.py
+import io
+import json
+import logging
+import queue
+
+from fastapi.testclient import TestClient
+
+from app.log_pipeline import BoundedQueueHandler, LogPipeline
+from app.main import create_app
+from app.settings import Settings
+
+
+def read_lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+def test_records_are_written_as_json_lines_in_batches(tmp_path):
+    path = tmp_path / "logs" / "app.jsonl"
+    pipeline = LogPipeline(Settings(log_file=str(path), log_batch_size=50))
+    pipeline.start()
+    log = logging.getLogger("app.test")
+    for i in range(200):
+        log.info("item %d", i, extra={"event": "test", "n": i})
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        log.exception("failed")
+    pipeline.stop()
+
+    records = read_lines(path)
+    assert len(records) == 201
+    assert records[0]["msg"] == "item 0" and records[0]["n"] == 0 and records[0]["logger"] == "app.test"
+    assert records[-1]["level"] == "ERROR" and "ValueError: boom" in records[-1]["exc"]
+    stats = pipeline.stats()
+    assert stats["written"] == 201 and stats["dropped"] == 0
+    assert stats["batches"] >= 201 // 50  # and usually far fewer writes than records
+    assert stats["batches"] < 201
+
+
+def test_full_queue_drops_instead_of_blocking():
+    handler = BoundedQueueHandler(queue.Queue(maxsize=2))
+    log = logging.getLogger("app.test.full")
+    log.addHandler(handler)
+    log.propagate = False
+    try:
+        for i in range(5):
+            log.warning("w %d", i)
+    finally:
+        log.removeHandler(handler)
+        log.propagate = True
+    assert (handler.enqueued, handler.dropped) == (2, 3)
+
+
+def test_sampling_keeps_warnings():
+    stream = io.StringIO()
+    pipeline = LogPipeline(Settings(log_sample_rate=0.0), stream=stream)
+    pipeline.start()
+    log = logging.getLogger("app.test.sampled")
+    for _ in range(10):
+        log.info("chatty")
+    log.warning("important")
+    pipeline.stop()
+    assert [json.loads(line)["msg"] for line in stream.getvalue().splitlines()] == ["important"]
+    assert pipeline.stats()["sampled_out"] == 10
+
+
+def test_stop_restores_loggers():
+    logger = logging.getLogger("app")
+    before = (logger.level, logger.propagate, list(logger.handlers))
+    pipeline = LogPipeline(Settings(), stream=io.StringIO())
+    pipeline.start()
+    pipeline.stop()
+    assert (logger.level, logger.propagate, list(logger.handlers)) == before
+
+
+def test_main_app_access_log(tmp_path):
+    path = tmp_path / "access.jsonl"
+    app = create_app(Settings(log_file=str(path), contact_db_path=str(tmp_path / "contacts.db")))
+    with TestClient(app) as client:
+        client.get("/health")
+        client.post("/api/login", json={"username": "a", "password": "b"})
+    access = [r for r in read_lines(path) if r["logger"] == "qa.access"]
+    assert [(r["method"], r["path"], r["status"]) for r in access] == [
+        ("GET", "/health", 200),
+        ("POST", "/api/login", 200),
+    ]
+    assert access[0]["duration_ms"] >= 0
+    assert app.state.log_pipeline.stats()["dropped"] == 0
+
+
+def test_backend_contact_does_not_print(capsys):
+    from backend.app import app
+
+    client = TestClient(app)
+    r = client.post("/api/contact", json={"name": "Eddie", "email": "a@b.com", "message": "Hello from pytest!"})
+    assert r.status_code == 200
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,139 @@
+# tests/api/test_login_throttle.py
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.settings import Settings
+from app.throttle import LoginThrottle, LoginThrottleMiddleware, SlidingWindowCounter
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def test_counter_slides_out_old_buckets():
+    clock = Clock()
+    counter = SlidingWindowCounter(window=60, buckets=6, width=1024, depth=4, clock=clock)
+    for _ in range(3):
+        counter.add("k")
+    clock.now += 30
+    counter.add("k")
+    assert counter.estimate("k") == 4
+    assert counter.estimate("other") == 0
+    # The first three leave once their 10 s slice is 60 s old.
+    assert counter.retry_after("k", limit=4) == pytest.approx(30.0)
+    clock.now += 30
+    assert counter.estimate("k") == 1
+    assert counter.retry_after("k", limit=4) == 0.0
+
+
+def test_memory_is_fixed_and_estimates_never_undercount():
+    counter = SlidingWindowCounter(window=60, buckets=2, width=1024, depth=4, clock=Clock())
+    for i in range(20_000):  # far more distinct keys than counters per row
+        counter.add(f"user-{i}")
+    for _ in range(5):
+        counter.add("target")
+    assert len(counter.counts) * 4 + len(counter._zeros) * 4 == counter.memory_bytes
+    assert counter.estimate("target") >= 5
+
+
+def test_fill_ratio_tracks_the_fullest_live_slice():
+    clock = Clock()
+    counter = SlidingWindowCounter(window=60, buckets=6, width=1024, depth=4, clock=clock)
+    assert counter.fill_ratio() == 0.0
+    counter.add("k")
+    counter.add("k")
+    assert counter.fill_ratio() == 4 / (4 * 1024)
+    for i in range(5000):
+        counter.add(f"user-{i}")
+    assert counter.fill_ratio() > 0.9
+    clock.now += 60
+    assert counter.fill_ratio() == 0.0
+
+
+def test_rejects_non_power_of_two_width():
+    with pytest.raises(ValueError):
+        SlidingWindowCounter(window=60, buckets=6, width=1000, depth=4)
+
+
+def guarded_app(throttle):
+    app = FastAPI()
+
+    @app.post("/api/login")
+    async def login(body: dict):
+        if body.get("password") != "good":
+            raise HTTPException(status_code=401, detail="Invalid credentials")
+        return {"ok": True}
+
+    app.add_middleware(LoginThrottleMiddleware, throttle=throttle)
+    return app
+
+
+def test_failures_per_username_lead_to_429_with_retry_after():
+    throttle = LoginThrottle(Settings(login_throttle_user_limit=3, login_throttle_ip_limit=100, login_throttle_width=1024))
+    client = TestClient(guarded_app(throttle))
+    for _ in range(3):
+        assert client.post("/api/login", json={"username": "admin", "password": "bad"}).status_code == 401
+    r = client.post("/api/login", json={"username": "admin", "password": "good"})
+    assert r.status_code == 429
+    assert 1 <= int(r.headers["retry-after"]) <= 60
+    assert r.json() == {"detail": "Too many failed login attempts, retry later"}
+    # Other usernames (below the per-IP limit) are unaffected.
+    assert client.post("/api/login", json={"username": "eddie", "password": "good"}).status_code == 200
+    assert throttle.stats()["failures"] == 3
+    assert throttle.stats()["throttled"] == 1
+
+
+def test_failures_per_ip_cover_username_spraying():
+    throttle = LoginThrottle(Settings(login_throttle_user_limit=100, login_throttle_ip_limit=5, login_throttle_width=1024))
+    client = TestClient(guarded_app(throttle))
+    for i in range(5):
+        client.post("/api/login", json={"username": f"user{i}", "password": "bad"})
+    assert client.post("/api/login", json={"username": "fresh", "password": "good"}).status_code == 429
+
+
+def test_successful_logins_are_never_counted():
+    throttle = LoginThrottle(Settings(login_throttle_user_limit=2, login_throttle_width=1024))
+    client = TestClient(guarded_app(throttle))
+    for _ in range(20):
+        assert client.post("/api/login", json={"username": "admin", "password": "good"}).status_code == 200
+    assert throttle.users.counts is None and throttle.ips.counts is None  # nothing recorded, nothing allocated
+
+
+def test_throttle_only_guards_the_backend_login():
+    from backend import app as backend
+
+    assert "429" in backend.app.openapi()["paths"]["/api/login"]["post"]["responses"]
+    # app.main's demo login never answers 401, so nothing could ever be throttled.
+    app = create_app(Settings())
+    assert not hasattr(app.state, "login_throttle")
+    assert "429" not in app.openapi()["paths"]["/api/login"]["post"]["responses"]
+
+
+def test_username_flood_suspends_only_the_username_limit():
+    throttle = LoginThrottle(Settings(login_throttle_user_limit=3, login_throttle_ip_limit=5,
+                                      login_throttle_width=1024), clock=Clock())
+    for i in range(5000):  # distinct usernames from 50 IPs: only the user sketch fills up
+        throttle.record_failure(f"user{i}", f"10.0.0.{i % 50}")
+    assert throttle.stats()["user_fill_ratio"] > 0.5 > throttle.stats()["ip_fill_ratio"]
+    # Saturated username sketch is ignored instead of locking everyone out...
+    assert throttle.retry_after("someone-new", "192.0.2.1") == 0.0
+    assert throttle.stats()["saturated_checks"] == 1
+    # ...while the per-IP limit still applies.
+    for _ in range(5):
+        throttle.record_failure("someone-new", "192.0.2.1")
+    assert throttle.retry_after("someone-new", "192.0.2.1") > 0
+
+
+def test_usernames_and_ips_do_not_share_counters():
+    throttle = LoginThrottle(Settings(login_throttle_user_limit=2, login_throttle_ip_limit=100,
+                                      login_throttle_width=1024), clock=Clock())
+    for _ in range(3):
+        throttle.record_failure("", "10.0.0.1")  # IP-only failures
+    assert throttle.users.counts is None
+    assert throttle.retry_after("10.0.0.1", "10.0.0.2") == 0.0
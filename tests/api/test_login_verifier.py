@@ -0,0 +1,119 @@
+# tests/api/test_login_verifier.py
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.passwords import CredentialVerifier, VerifierBusy, hash_password, verify_password
+from app.settings import Settings
+
+# Cheap cost parameters keep the unit tests fast; the format carries them.
+FAST_HASH = hash_password("s3cret", n=2 ** 10)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_hash_roundtrip():
+    assert FAST_HASH.startswith("scrypt$1024$8$1$")
+    assert verify_password("s3cret", FAST_HASH)
+    assert not verify_password("s3cret!", FAST_HASH)
+    assert not verify_password("s3cret", "md5$abc")
+    assert hash_password("s3cret", n=2 ** 10) != FAST_HASH  # salted
+
+
+def test_positive_results_are_cached():
+    verifier = CredentialVerifier(Settings())
+
+    async def scenario():
+        assert await verifier.verify("eddie", "s3cret", FAST_HASH)
+        assert await verifier.verify("eddie", "s3cret", FAST_HASH)
+        assert not await verifier.verify("eddie", "wrong", FAST_HASH)
+        assert not await verifier.verify("eddie", "wrong", FAST_HASH)
+
+    run(scenario())
+    stats = verifier.stats()
+    assert stats["cache_hits"] == 1
+    assert stats["checks"] == 3  # failures always hash
+    verifier.close()
+
+
+def test_cache_entry_expires_and_follows_hash_changes():
+    verifier = CredentialVerifier(Settings(login_cache_ttl=0.05))
+
+    async def scenario():
+        assert await verifier.verify("eddie", "s3cret", FAST_HASH)
+        # New stored hash (password reset) -> different cache key.
+        assert await verifier.verify("eddie", "s3cret", hash_password("s3cret", n=2 ** 10))
+        await asyncio.sleep(0.06)
+        assert await verifier.verify("eddie", "s3cret", FAST_HASH)
+
+    run(scenario())
+    assert verifier.stats()["cache_hits"] == 0
+    assert verifier.stats()["checks"] == 3
+    verifier.close()
+
+
+def test_unknown_user_costs_a_hash_and_fails():
+    verifier = CredentialVerifier(Settings())
+    assert run(verifier.verify("ghost", "s3cret", None)) is False
+    assert verifier.stats()["checks"] == 1
+    verifier.close()
+
+
+def test_rejects_when_too_many_pending():
+    verifier = CredentialVerifier(Settings(login_workers=1, login_max_pending=2, login_cache_ttl=0))
+
+    async def scenario():
+        return await asyncio.gather(
+            *(verifier.verify("eddie", "s3cret", FAST_HASH) for _ in range(5)), return_exceptions=True
+        )
+
+    results = run(scenario())
+    assert results.count(True) == 2
+    assert sum(isinstance(r, VerifierBusy) for r in results) == 3
+    assert verifier.stats()["rejected_busy"] == 3
+    verifier.close()
+
+
+def test_checks_that_queue_too_long_are_dropped():
+    verifier = CredentialVerifier(Settings(login_workers=1, login_max_queue_seconds=0.02, login_cache_ttl=0))
+    slow_hash = hash_password("s3cret", n=2 ** 15)
+
+    async def scenario():
+        # The second check waits behind the first one's scrypt.
+        return await asyncio.gather(
+            verifier.verify("eddie", "s3cret", slow_hash),
+            verifier.verify("eddie", "s3cret", FAST_HASH),
+            return_exceptions=True,
+        )
+
+    first, second = run(scenario())
+    assert first is True
+    assert isinstance(second, VerifierBusy)
+    assert verifier.stats()["queue_timeouts"] == 1
+    verifier.close()
+
+
+def test_backend_login_verifies_hashes():
+    from backend.app import app as backend_app
+
+    client = TestClient(backend_app)  # no lifespan: nothing touches the contacts DB
+    ok = client.post("/api/login", json={"username": "admin", "password": "1234"})
+    assert ok.status_code == 200
+    bad = client.post("/api/login", json={"username": "admin", "password": "12345"})
+    assert bad.status_code == 401
+    ghost = client.post("/api/login", json={"username": "ghost", "password": "1234"})
+    assert ghost.status_code == 401
+
+
+def test_backend_login_busy_is_503(monkeypatch):
+    from backend import app as backend
+
+    async def busy(*args):
+        raise VerifierBusy()
+
+    monkeypatch.setattr(backend.verifier, "verify", busy)
+    r = TestClient(backend.app).post("/api/login", json={"username": "admin", "password": "1234"})
+    assert r.status_code == 503
+    assert r.headers["retry-after"] == "1"
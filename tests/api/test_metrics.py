@@ -0,0 +1,71 @@
+# tests/api/test_metrics.py
+import os
+import re
+import shutil
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.metrics import Metrics
+
+client = TestClient(app)
+
+
+def sample(text: str, name: str, **labels) -> float:
+    label_re = ",".join(f'{k}="{re.escape(v)}"' for k, v in labels.items())
+    m = re.search(rf"^{name}\{{{label_re}\}} (\S+)$", text, re.M)
+    assert m, f"{name}{labels} not found"
+    return float(m.group(1))
+
+
+def test_metrics_endpoint_counts_by_route_template_and_status_class():
+    before = client.get("/metrics").text
+    try:
+        start = sample(before, "qa_http_requests_total", route="/health", status="2xx")
+    except AssertionError:
+        start = 0.0
+    for _ in range(3):
+        client.get("/health")
+    client.post("/api/login", json={})  # 422
+    client.get("/definitely-missing")    # 404, no route
+
+    r = client.get("/metrics")
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = r.text
+    assert sample(text, "qa_http_requests_total", route="/health", status="2xx") == start + 3
+    assert sample(text, "qa_http_requests_total", route="/api/login", status="4xx") >= 1
+    assert sample(text, "qa_http_requests_total", route="<unmatched>", status="4xx") >= 1
+    # The /metrics request itself is in flight while rendering
+    assert sample(text, "qa_http_requests_in_flight", route="/metrics") == 1
+    assert "qa_contact_queue_depth" in text
+
+
+def test_histogram_buckets_are_cumulative():
+    m = Metrics(buckets=(0.01, 0.1))
+    m.configure(["/x"])
+    route = m.route_ids["/x"]
+    for seconds in (0.005, 0.05, 0.05, 5.0):
+        m.observe(route, 200, seconds)
+    text = m.render()
+    labels = {"route": "/x", "status": "2xx"}
+    assert sample(text, "qa_http_request_duration_seconds_bucket", **labels, le="0.01") == 1
+    assert sample(text, "qa_http_request_duration_seconds_bucket", **labels, le="0.1") == 3
+    assert sample(text, "qa_http_request_duration_seconds_bucket", **labels, le="+Inf") == 4
+    assert sample(text, "qa_http_request_duration_seconds_count", **labels) == 4
+    assert abs(sample(text, "qa_http_request_duration_seconds_sum", **labels) - 5.105) < 1e-9
+
+
+def test_multiproc_dir_sums_worker_files(tmp_path):
+    m = Metrics(multiproc_dir=str(tmp_path))
+    m.configure(["/x"])
+    route = m.route_ids["/x"]
+    m.observe(route, 201, 0.002)
+    m.in_flight(route, 1)
+    # Pretend another (long dead) worker left its file behind.
+    own = tmp_path / f"metrics_{os.getpid()}.bin"
+    shutil.copy(own, tmp_path / "metrics_999999999.bin")
+
+    text = m.render()
+    assert sample(text, "qa_http_requests_total", route="/x", status="2xx") == 2
+    # Dead workers' counters are kept, their in-flight gauges are not.
+    assert sample(text, "qa_http_requests_in_flight", route="/x") == 1
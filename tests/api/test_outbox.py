@@ -0,0 +1,174 @@
+# tests/api/test_outbox.py
+import asyncio
+import socket
+import sqlite3
+import time
+from email import message_from_bytes
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.contact_queue import INSERT_SQL, open_db
+from app.main import create_app
+from app.outbox import OutboxWorker
+from app.settings import Settings
+
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+
+class Sink:
+    """aiosmtpd handler: keeps messages, optionally refuses or defers some."""
+
+    def __init__(self, pipelining=True):
+        self.pipelining = pipelining
+        self.messages = []
+        self.replies = []  # DATA replies to use before accepting ("451 ...", "550 ...")
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        session.host_name = hostname
+        if self.pipelining:
+            responses.insert(-1, "250-PIPELINING")
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.replies:
+            return self.replies.pop(0)
+        self.messages.append(message_from_bytes(envelope.content))
+        return "250 OK"
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.fixture
+def smtp():
+    sink = Sink()
+    controller = aiosmtpd_controller.Controller(sink, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    yield sink, controller
+    controller.stop()
+
+
+def settings_for(tmp_path, port, **overrides):
+    values = dict(
+        contact_db_path=str(tmp_path / "contacts.db"), outbox_smtp_port=port, outbox_smtp_host="127.0.0.1",
+        outbox_poll_interval=0.02, outbox_backoff_base=0.01, log_enabled=False,
+    )
+    values.update(overrides)
+    return Settings(**values)
+
+
+def seed(settings, n):
+    conn = open_db(settings.contact_db_path, outbox=True)
+    with conn:
+        conn.executemany(INSERT_SQL, [(f"User {i}", f"user{i}@example.com", f"hello {i}", time.time())
+                                      for i in range(n)])
+    conn.close()
+
+
+def outbox_rows(settings):
+    with sqlite3.connect(settings.contact_db_path) as conn:
+        return conn.execute("SELECT contact_id, status, attempts FROM contact_outbox ORDER BY contact_id").fetchall()
+
+
+def run_rounds(worker, rounds, pause=0.0):
+    async def scenario():
+        await worker.start()
+        worker._stopping.set()  # drive run_once() by hand
+        await worker._task
+        counts = []
+        for _ in range(rounds):
+            counts.append(await worker.run_once())
+            await asyncio.sleep(pause)
+        await worker.stop()
+        return counts
+
+    return asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("pipelining", [True, False])
+def test_batch_goes_out_over_one_connection(tmp_path, smtp, pipelining):
+    sink, controller = smtp
+    sink.pipelining = pipelining
+    settings = settings_for(tmp_path, controller.port, outbox_batch_size=10)
+    seed(settings, 25)
+    worker = OutboxWorker(settings)
+    assert run_rounds(worker, 4) == [10, 10, 5, 0]
+    assert len(sink.messages) == 25
+    assert worker.stats()["connections_opened"] == 1
+    first = sink.messages[0]
+    assert first["Reply-To"] == "user0@example.com" and first["Subject"] == "Contact form: User 0"
+    assert first["Message-ID"].startswith("<contact-1@")
+    assert {status for _, status, _ in outbox_rows(settings)} == {"sent"}
+
+
+def test_transient_failures_back_off_then_dead_letter(tmp_path, smtp):
+    sink, controller = smtp
+    settings = settings_for(tmp_path, controller.port, outbox_max_attempts=3)
+    seed(settings, 2)
+    # Message 1: deferred once, then delivered. Message 2: refused for good.
+    sink.replies = ["451 try again later", "550 mailbox unavailable"]
+    worker = OutboxWorker(settings)
+    worker._random = lambda: 1.0  # no jitter
+    assert run_rounds(worker, 3, pause=0.05) == [2, 1, 0]
+    assert outbox_rows(settings) == [(1, "sent", 2), (2, "dead", 1)]
+    assert worker.stats()["retried"] == 1 and worker.stats()["dead"] == 1
+    assert worker.backoff(1) == 0.01 and worker.backoff(3) == 0.04
+
+
+def test_unreachable_server_retries_until_dead(tmp_path):
+    settings = settings_for(tmp_path, free_port(), outbox_max_attempts=2)
+    seed(settings, 1)
+    worker = OutboxWorker(settings)
+    run_rounds(worker, 3, pause=0.05)
+    with sqlite3.connect(settings.contact_db_path) as conn:
+        status, attempts, error = conn.execute("SELECT status, attempts, last_error FROM contact_outbox").fetchone()
+    assert (status, attempts) == ("dead", 2)
+    assert "ConnectionRefusedError" in error
+
+
+def test_dropped_connection_is_reopened(tmp_path, smtp):
+    sink, controller = smtp
+    settings = settings_for(tmp_path, controller.port)
+    seed(settings, 1)
+    worker = OutboxWorker(settings)
+
+    async def scenario():
+        await worker.start()
+        worker._stopping.set()
+        await worker._task
+        await worker.run_once()
+        worker.sender._conns[0].sock.shutdown(socket.SHUT_RDWR)  # e.g. an idle timeout
+        seed(settings, 1)
+        await worker.run_once()
+        await worker.stop()
+
+    asyncio.run(scenario())
+    assert len(sink.messages) == 2
+    assert worker.stats()["connections_opened"] == 2 and worker.stats()["retried"] == 0
+
+
+def test_contacts_posted_to_the_app_are_mailed(tmp_path, smtp):
+    sink, controller = smtp
+    app = create_app(settings_for(tmp_path, controller.port, outbox_enabled=True))
+    with TestClient(app) as client:
+        r = client.post("/api/contact", json={"name": "Eddie", "email": "eddie@b.com", "message": "Mail me"})
+        assert r.status_code == 200
+        deadline = time.monotonic() + 5
+        while app.state.outbox.stats()["sent"] < 1 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert "qa_outbox_sent 1" in client.get("/metrics").text
+    assert sink.messages[0]["Reply-To"] == "eddie@b.com"
+    assert "Mail me" in sink.messages[0].get_payload()
+
+
+def test_disabled_outbox_queues_no_rows(tmp_path):
+    seed(settings_for(tmp_path, 0), 1)  # outbox was on: trigger installed
+    with TestClient(create_app(settings_for(tmp_path, 0))) as client:
+        assert client.post("/api/contact", json={"name": "A", "email": "a@b.com", "message": "hi"}).status_code == 200
+    with sqlite3.connect(str(tmp_path / "contacts.db")) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM contacts").fetchone() == (2,)
+        assert conn.execute("SELECT COUNT(*) FROM contact_outbox").fetchone() == (1,)
@@ -0,0 +1,162 @@
+# tests/api/test_perf_results.py
+import argparse
+import csv
+import importlib
+import os
+import sys
+
+import pytest
+
+PERF_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "perf"))
+sys.path.insert(0, PERF_DIR)
+results = importlib.import_module("results")
+
+LOCUST_STATS = os.path.join(PERF_DIR, "locust", "run_stats.csv")
+LOCUST_HISTORY = os.path.join(PERF_DIR, "locust", "run_stats_history.csv")
+K6_SUMMARY = os.path.join(PERF_DIR, "k6", "soak-summary.json")
+
+STATS_HEADER = ["Type", "Name", "Request Count", "Failure Count", "Median Response Time",
+                "Average Response Time", "Min Response Time", "Max Response Time", "Average Content Size",
+                "Requests/s", "Failures/s", "50%", "66%", "75%", "80%", "90%", "95%", "98%", "99%",
+                "99.9%", "99.99%", "100%"]
+HISTORY_HEADER = ["Timestamp", "User Count", "Type", "Name", "Requests/s", "Failures/s", "50%", "66%", "75%",
+                  "80%", "90%", "95%", "98%", "99%", "99.9%", "99.99%", "100%", "Total Request Count",
+                  "Total Failure Count", "Total Median Response Time", "Total Average Response Time",
+                  "Total Min Response Time", "Total Max Response Time", "Total Average Content Size"]
+
+
+def write_stats(path, rows):
+    """rows: (name, requests, failures, rps, p95, p99)."""
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(STATS_HEADER)
+        for name, requests, failures, rps, p95, p99 in rows:
+            writer.writerow(["POST", name, requests, failures, 4, 4.0, 1, 50, 30, rps, 0,
+                             4, 4, 5, 5, 6, p95, 8, p99, 20, 30, 30])
+    return str(path)
+
+
+def write_history(path, p95s, start=1_700_000_000):
+    total = 0
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HISTORY_HEADER)
+        for i, p95 in enumerate(p95s):
+            total += 100
+            writer.writerow([start + i, 20, "", "Aggregated", 100, 0, 4, 4, 5, 5, 6, p95, 8, p95 + 2,
+                             20, 30, 30, total, 0, 4, 4.0, 1, 50, 30])
+    return str(path)
+
+
+def thresholds(**overrides):
+    args = argparse.Namespace(
+        max_rps_drop=0.10, max_latency_increase=0.20, min_ms=1.0, max_error_increase=0.005, alpha=0.05,
+    )
+    vars(args).update(overrides)
+    return args
+
+
+def test_normalize_maps_k6_names_to_locust_paths():
+    assert results.normalize("login") == "/api/login"
+    assert results.normalize("/api/contact") == "/api/contact"
+    assert results.normalize("/api/login [shed]") == "/api/login [shed]"
+    assert results.normalize("Aggregated") == "Aggregated"
+
+
+def test_ingest_locust_and_k6_into_one_store(tmp_path):
+    conn = results.connect(str(tmp_path / "perf.db"))
+    assert results.ingest(conn, "locust", LOCUST_STATS) == ("locust-stats", 3)
+    kind, samples = results.ingest(conn, "locust", LOCUST_HISTORY)
+    assert kind == "locust-history" and samples > 0
+    assert results.ingest(conn, "soak", K6_SUMMARY) == ("k6-summary", 3)
+
+    locust, k6 = results.endpoint_stats(conn, "locust"), results.endpoint_stats(conn, "soak")
+    assert set(locust) == set(k6) == {"Aggregated", "/api/login", "/api/contact"}
+    assert locust["/api/login"]["requests"] == 1370
+    assert k6["/api/login"]["requests"] == 14325 and k6["/api/login"]["failures"] == 0
+    assert k6["Aggregated"]["rps"] == k6["Aggregated"]["requests"] / (28650 / 39.67132198072163)
+    assert k6["/api/login"]["p99_ms"] is None  # summaryTrendStats had no p(99) then
+
+    # Re-ingesting a file replaces its rows instead of duplicating them.
+    results.ingest(conn, "locust", LOCUST_STATS)
+    assert conn.execute("SELECT count(*) FROM endpoint_stats WHERE run_id = 'locust'").fetchone()[0] == 3
+
+
+def test_k6_points_are_bucketed_per_endpoint(tmp_path):
+    path = tmp_path / "points.csv"
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["metric_name", "timestamp", "metric_value", "name"])
+        for second in range(30):
+            for value in range(1, 11):
+                writer.writerow(["http_req_duration", 1_700_000_000 + second, value, "login"])
+                writer.writerow(["http_req_failed", 1_700_000_000 + second, int(value == 10), "login"])
+            writer.writerow(["vus", 1_700_000_000 + second, 20, ""])
+    conn = results.connect(str(tmp_path / "perf.db"))
+    assert results.ingest(conn, "k6", str(path)) == ("k6-points", 6)
+    rows = conn.execute(
+        "SELECT requests, failures, p50_ms, p95_ms, p99_ms FROM samples WHERE endpoint = '/api/login'"
+    ).fetchall()
+    assert rows == [(100, 10, 5.0, 10.0, 10.0)] * 3
+
+
+def test_compare_flags_significant_regressions_only(tmp_path):
+    conn = results.connect(str(tmp_path / "perf.db"))
+    results.ingest(conn, "a", write_stats(tmp_path / "a_stats.csv", [
+        ("Aggregated", 10000, 10, 100.0, 10, 20), ("/api/login", 5000, 5, 50.0, 10, 20),
+    ]))
+    results.ingest(conn, "b", write_stats(tmp_path / "b_stats.csv", [
+        ("Aggregated", 10000, 200, 99.0, 11, 30), ("/api/login", 100, 1, 1.0, 10, 20),
+    ]))
+    verdicts = {(e, m): v for e, m, _, _, _, v in results.compare(conn, "a", "b", thresholds())}
+    assert verdicts[("Aggregated", "rps")] == "ok"             # -1%
+    assert verdicts[("Aggregated", "p95_ms")] == "ok"          # +10%
+    assert verdicts[("Aggregated", "p99_ms")] == "REGRESSION"  # +50%, no samples to test
+    assert verdicts[("Aggregated", "errors")] == "REGRESSION"  # 0.1% -> 2%
+    assert verdicts[("/api/login", "rps")] == "REGRESSION"
+    # 0.1% -> 1% is past the threshold, but 1 failure in 100 requests is not significant.
+    assert verdicts[("/api/login", "errors")] == "ok"
+
+
+def test_latency_change_needs_significant_samples(tmp_path):
+    conn = results.connect(str(tmp_path / "perf.db"))
+    for run in ("a", "b", "c"):
+        results.ingest(conn, run, write_stats(tmp_path / f"{run}_stats.csv", [("Aggregated", 1000, 0, 10.0, 10, 20)]))
+    conn.execute("UPDATE endpoint_stats SET p95_ms = 13 WHERE run_id IN ('b', 'c')")
+    noisy = [6, 14] * 10
+    results.ingest(conn, "a", write_history(tmp_path / "a_history.csv", noisy))
+    results.ingest(conn, "b", write_history(tmp_path / "b_history.csv", noisy[1:] + [14]))
+    results.ingest(conn, "c", write_history(tmp_path / "c_history.csv", [15] * 20))
+    p95 = {run: [d for d in results.compare(conn, "a", run, thresholds()) if d[1] == "p95_ms"][0]
+           for run in ("b", "c")}
+    assert p95["b"][5] == "ok" and p95["b"][4] > 0.05
+    assert p95["c"][5] == "REGRESSION" and p95["c"][4] < 0.05
+
+
+def test_trend_windows_show_drift(tmp_path):
+    conn = results.connect(str(tmp_path / "perf.db"))
+    results.ingest(conn, "soak", write_history(tmp_path / "soak_history.csv", [10 + i // 60 for i in range(360)]))
+    windows = results.trend(conn, "soak", "Aggregated", 60.0)
+    assert [w[0] for w in windows] == [0, 60, 120, 180, 240, 300]
+    assert [w[5] for w in windows] == [10, 11, 12, 13, 14, 15]
+    assert all(w[2] == 100.0 for w in windows)
+    assert round(results.drift(windows), 2) == 0.5
+
+
+def test_cli_exit_codes(tmp_path, capsys):
+    db = str(tmp_path / "perf.db")
+    assert results.main(["--db", db, "ingest", "a", LOCUST_STATS, LOCUST_HISTORY]) == 0
+    assert results.main(["--db", db, "compare", "a", "a"]) == 0
+    assert results.main(["--db", db, "ingest", "b", write_stats(tmp_path / "b_stats.csv", [
+        ("Aggregated", 5276, 0, 40.0, 7, 12),
+    ])]) == 0
+    assert results.main(["--db", db, "compare", "a", "b"]) == 1
+    assert "REGRESSION" in capsys.readouterr().out
+    assert results.main(["--db", db, "trend", "a", "--window", "20s"]) == 0
+    assert results.main(["--db", db, "trend", "a", "--window", "20s", "--max-drift", "-0.9"]) == 1
+
+
+def test_window_durations_are_k6_style():
+    assert results.duration_arg("1h30m") == 5400.0 and results.duration_arg("250ms") == 0.25
+    with pytest.raises(argparse.ArgumentTypeError):
+        results.duration_arg("15 minutes")
@@ -0,0 +1,139 @@
+# tests/api/test_profiler.py
+import asyncio
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.profiler import LoopLagMonitor, SlowRequestProfiler, SlowRequestProfilerMiddleware
+from app.settings import Settings
+
+
+def test_loop_lag_monitor_sees_a_blocked_loop():
+    monitor = LoopLagMonitor(interval=0.01)
+
+    async def scenario():
+        monitor.start()
+        await asyncio.sleep(0.03)
+        time.sleep(0.1)  # block the loop
+        await asyncio.sleep(0.03)
+        await monitor.stop()
+
+    asyncio.run(scenario())
+    stats = monitor.stats()
+    assert stats["ticks"] >= 2
+    assert stats["lag_max_seconds"] >= 0.08
+    assert any(line.startswith('qa_event_loop_lag_seconds_bucket{le="+Inf"}') for line in monitor.render())
+
+
+def blocking_app(profiler):
+    app = FastAPI()
+
+    def crunch():
+        time.sleep(0.15)  # blocks the event loop on purpose
+
+    @app.get("/blocking")
+    async def blocking():
+        crunch()
+        return {"ok": True}
+
+    @app.get("/waiting")
+    async def waiting():
+        await asyncio.sleep(0.15)
+        return {"ok": True}
+
+    @app.get("/fast")
+    async def fast():
+        return {"ok": True}
+
+    app.add_middleware(SlowRequestProfilerMiddleware, profiler=profiler)
+    return app
+
+
+def profiler_for(tmp_path, **overrides):
+    values = dict(profile_slow_ms=50.0, profile_sample_interval=0.005, profile_dir=str(tmp_path))
+    values.update(overrides)
+    return SlowRequestProfiler(Settings(**values))
+
+
+def folded(tmp_path):
+    return sorted(tmp_path.glob("*.folded"))
+
+
+def test_slow_requests_get_a_collapsed_stack_profile(tmp_path):
+    profiler = profiler_for(tmp_path)
+    client = TestClient(blocking_app(profiler))
+    client.get("/fast")
+    client.get("/blocking")
+    client.get("/waiting")
+    profiler.close()
+
+    files = folded(tmp_path)
+    assert len(files) == 2
+    blocking = next(f for f in files if "GET_blocking-200" in f.name)
+    waiting = next(f for f in files if "GET_waiting-200" in f.name)
+    lines = blocking.read_text().splitlines()
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0 and stack.startswith("GET /blocking;")
+    # The loop thread's real stack, down to the blocking call.
+    assert any("crunch (test_profiler.py" in line for line in lines)
+    # Suspended requests show the await chain they are parked on.
+    assert any("waiting (test_profiler.py" in line and "sleep (tasks.py" in line
+               for line in waiting.read_text().splitlines())
+    assert profiler.stats()["profiles_written"] == 2
+
+
+class CountingEvent:
+    def __init__(self, event):
+        self.event = event
+        self.sets = 0
+
+    def set(self):
+        self.sets += 1
+        self.event.set()
+
+    def __getattr__(self, name):
+        return getattr(self.event, name)
+
+
+def test_sampler_is_only_woken_when_idle(tmp_path):
+    profiler = profiler_for(tmp_path)
+    profiler._wake = wake = CountingEvent(profiler._wake)
+
+    async def scenario():
+        tracked = [profiler.track({"method": "GET", "path": f"/{i}"}) for i in range(50)]
+        for t in tracked:
+            profiler.finish(t, 200)
+
+    asyncio.run(scenario())
+    assert wake.sets == 1  # the first request; the other 49 were picked up by the timed wait
+    profiler.close()
+
+
+def test_profiles_rotate(tmp_path):
+    profiler = profiler_for(tmp_path, profile_max_files=2)
+    client = TestClient(blocking_app(profiler))
+    for _ in range(3):
+        client.get("/waiting")
+    profiler.close()
+    assert len(folded(tmp_path)) == 2
+    assert profiler.stats()["slow_requests"] == 3
+
+
+def test_main_app_turns_both_on_from_settings(tmp_path):
+    settings = Settings(loop_monitor_enabled=True, loop_monitor_interval=0.01,
+                        profile_enabled=True, profile_dir=str(tmp_path),
+                        contact_db_path=str(tmp_path / "contacts.db"))
+    app = create_app(settings)
+    with TestClient(app) as client:
+        time.sleep(0.05)
+        text = client.get("/metrics").text
+    assert "qa_event_loop_lag_seconds_count" in text
+    assert "qa_profiler_profiles_written 0" in text
+    assert app.state.loop_monitor.stats()["ticks"] > 0
+
+
+def test_off_by_default():
+    app = create_app(Settings())
+    assert app.state.loop_monitor is None and app.state.profiler is None
@@ -0,0 +1,126 @@
+# tests/api/test_readiness.py
+import asyncio
+import json
+import sqlite3
+import time
+
+from fastapi.testclient import TestClient
+
+from app.contact_queue import INSERT_SQL, ContactPipeline, open_db
+from app.main import create_app
+from app.readiness import STALE, STOPPING, Readiness
+from app.settings import Settings
+from app.shedding import LoadShedder
+
+
+def settings_for(tmp_path, **overrides):
+    return Settings(contact_db_path=str(tmp_path / "contacts.db"), log_enabled=False, **overrides)
+
+
+def run(readiness, scenario=None):
+    """Start readiness, optionally run `scenario()` + one more refresh, return (status, body)."""
+    async def main():
+        await readiness.start()
+        if scenario is not None:
+            await scenario()
+            await readiness.refresh()
+        status, body = readiness.response()
+        await readiness.stop()
+        return status, json.loads(body)
+
+    return asyncio.run(main())
+
+
+def test_ready_endpoint_serves_the_precomputed_snapshot(tmp_path):
+    app = create_app(settings_for(tmp_path, ready_interval=60.0))
+    with TestClient(app) as client:
+        r = client.get("/ready")
+        assert r.status_code == 200
+        assert r.headers["content-type"] == "application/json"
+        assert r.headers["cache-control"] == "no-store"
+        body = r.json()
+        assert body["status"] == "ready"
+        assert set(body["checks"]) == {"sqlite", "contact_queue", "event_loop"}
+        assert all(check["ok"] for check in body["checks"].values())
+        # Probes don't re-run checks: same bytes until the next refresh.
+        assert client.get("/ready").content == r.content
+        assert app.state.readiness.stats()["refreshes"] == 1
+        assert "qa_readiness_ready 1" in client.get("/metrics").text
+        assert client.get("/health").json() == {"status": "ok"}
+    assert app.state.readiness.response() == STOPPING
+
+
+def test_full_contact_queue_is_not_ready(tmp_path):
+    settings = settings_for(tmp_path, contact_queue_size=10, ready_queue_max_ratio=0.5)
+    pipeline = ContactPipeline(settings)
+    readiness = Readiness(settings, pipeline)
+
+    async def fill():
+        for i in range(5):
+            assert pipeline.submit(f"n{i}", "a@b.com", "hello")  # writer not started
+
+    status, body = run(readiness, fill)
+    assert status == 503 and body["status"] == "not_ready"
+    assert body["checks"]["contact_queue"] == {"ok": False, "depth": 5, "limit": 5}
+    assert readiness.stats()["not_ready"] == 1
+
+
+def test_locked_database_is_not_ready(tmp_path):
+    settings = settings_for(tmp_path, ready_sqlite_timeout=0.05)
+    open_db(settings.contact_db_path).close()
+    holder = sqlite3.connect(settings.contact_db_path, isolation_level=None)
+    holder.execute("BEGIN IMMEDIATE")  # e.g. a stuck writer
+    try:
+        status, body = run(Readiness(settings, ContactPipeline(settings)))
+    finally:
+        holder.execute("ROLLBACK")
+        holder.close()
+    assert status == 503
+    assert body["checks"]["sqlite"]["ok"] is False
+    assert "locked" in body["checks"]["sqlite"]["error"]
+
+
+def test_overdue_outbox_is_not_ready(tmp_path):
+    settings = settings_for(tmp_path, ready_max_outbox_delay=60.0)
+    conn = open_db(settings.contact_db_path, outbox=True)
+    with conn:
+        conn.execute(INSERT_SQL, ("a", "a@b.com", "m", time.time() - 120))
+    conn.close()
+    status, body = run(Readiness(settings, ContactPipeline(settings), outbox_enabled=True))
+    assert status == 503
+    assert body["checks"]["outbox"]["ok"] is False
+    assert body["checks"]["outbox"]["oldest_due_seconds"] >= 120
+
+
+def test_stop_interrupts_a_refresh_in_flight(tmp_path):
+    settings = settings_for(tmp_path, ready_interval=0.0)
+    readiness = Readiness(settings, ContactPipeline(settings))
+
+    async def scenario():
+        await readiness.start()
+        for _ in range(50):  # land the cancel at different points of the loop
+            await asyncio.sleep(0.001)
+        await asyncio.wait_for(readiness.stop(), 2.0)
+
+    asyncio.run(scenario())
+    assert readiness.response() == STOPPING
+
+
+def test_snapshot_goes_stale_when_refreshes_stop(tmp_path):
+    now = [0.0]
+    settings = settings_for(tmp_path, ready_interval=1.0, ready_sqlite_timeout=1.0)
+    readiness = Readiness(settings, ContactPipeline(settings), clock=lambda: now[0])
+
+    async def scenario():
+        await readiness.refresh()
+        fresh = readiness.response()[0]
+        now[0] = 3.5  # > 2 intervals + SQLite timeout without a refresh
+        return fresh, readiness.response()
+
+    fresh, stale = asyncio.run(scenario())
+    readiness._close_db()
+    assert fresh == 200 and stale == STALE
+
+
+def test_probes_bypass_load_shedding():
+    assert LoadShedder(Settings()).limiter_for("/ready") is None
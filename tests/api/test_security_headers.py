@@ -0,0 +1,49 @@
+# tests/api/test_security_headers.py
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.middleware import SECURITY_HEADERS, SecurityHeadersMiddleware
+
+demo = FastAPI()
+demo.add_middleware(SecurityHeadersMiddleware)
+
+
+@demo.get("/plain")
+async def plain():
+    return PlainTextResponse("hi")
+
+
+@demo.get("/override")
+async def override():
+    return PlainTextResponse("hi", headers={"Cache-Control": "public, max-age=60"})
+
+
+@demo.get("/stream")
+async def stream():
+    async def chunks():
+        for i in range(3):
+            yield f"chunk-{i}\n"
+
+    return StreamingResponse(chunks(), media_type="text/plain")
+
+
+client = TestClient(demo)
+
+
+def test_all_headers_added():
+    r = client.get("/plain")
+    for name, value in SECURITY_HEADERS.items():
+        assert r.headers.get(name) == value
+
+
+def test_endpoint_header_wins_setdefault():
+    r = client.get("/override")
+    assert r.headers.get_list("cache-control") == ["public, max-age=60"]
+    assert r.headers["x-content-type-options"] == "nosniff"
+
+
+def test_streaming_response_gets_headers_and_full_body():
+    r = client.get("/stream")
+    assert r.text == "chunk-0\nchunk-1\nchunk-2\n"
+    assert r.headers["cross-origin-resource-policy"] == "same-origin"
@@ -0,0 +1,77 @@
+# tests/api/test_server.py
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import pytest
+
+from app.server import uvicorn_options, worker_count
+from app.settings import Settings
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+
+def test_settings_from_env_coerces_types():
+    s = Settings.from_env({"QA_WORKERS": "3", "QA_REUSE_PORT": "true", "QA_GRACEFUL_TIMEOUT": "9", "QA_HOST": "127.0.0.1"})
+    assert (s.workers, s.reuse_port, s.graceful_timeout, s.host) == (3, True, 9, "127.0.0.1")
+
+
+def test_uvicorn_options_from_settings():
+    opts = uvicorn_options(Settings(loop="asyncio", http="h11", limit_concurrency=0, keepalive_timeout=15))
+    assert opts["loop"] == "asyncio" and opts["http"] == "h11"
+    assert opts["limit_concurrency"] is None
+    assert opts["timeout_keep_alive"] == 15
+    assert opts["factory"] is True
+
+
+def test_auto_picks_installed_accelerators():
+    opts = uvicorn_options(Settings())
+    assert opts["http"] in ("httptools", "h11")
+    assert opts["loop"] in ("uvloop", "asyncio")
+
+
+def test_worker_count_defaults_to_cpus():
+    assert worker_count(0) >= 1
+    assert worker_count(5) == 5
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@pytest.mark.skipif(not hasattr(socket, "SO_REUSEPORT"), reason="needs SO_REUSEPORT")
+def test_launcher_serves_with_two_reuseport_workers(tmp_path):
+    port = _free_port()
+    env = {
+        **os.environ,
+        "PYTHONPATH": ROOT,
+        "QA_HOST": "127.0.0.1",
+        "QA_PORT": str(port),
+        "QA_WORKERS": "2",
+        "QA_REUSE_PORT": "1",
+        "QA_CONTACT_DB_PATH": str(tmp_path / "contacts.db"),
+    }
+    proc = subprocess.Popen([sys.executable, "-m", "app"], cwd=ROOT, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    try:
+        deadline = time.monotonic() + 20
+        while True:
+            try:
+                r = httpx.get(f"http://127.0.0.1:{port}/health", timeout=1)
+                break
+            except httpx.HTTPError:
+                assert time.monotonic() < deadline, "launcher did not come up"
+                time.sleep(0.2)
+        assert r.json() == {"status": "ok"}
+        metrics = httpx.get(f"http://127.0.0.1:{port}/metrics").text
+        assert 'qa_http_requests_total{route="/health",status="2xx"}' in metrics
+    finally:
+        proc.terminate()
+        _, err = proc.communicate(timeout=30)
+    assert "with 2 worker(s)" in err
+    assert err.count("Application shutdown complete") == 2
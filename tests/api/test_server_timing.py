@@ -0,0 +1,96 @@
+# tests/api/test_server_timing.py
+import json
+import logging
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.main import create_app
+from app.settings import Settings
+from app.log_pipeline import JsonFormatter
+from app.timing import ServerTiming, ServerTimingMiddleware, TimedRoute
+
+CONTACT = {"name": "Eddie", "email": "a@b.com", "message": "Hello from QA site!"}
+
+
+class Sink:
+    def submit(self, name, email, message):
+        return True
+
+    def stats(self):
+        return {}
+
+
+def stages(response):
+    """Server-Timing header -> {name: duration ms}."""
+    out = {}
+    for part in response.headers["server-timing"].split(", "):
+        name, dur = part.split(";dur=")
+        out[name] = float(dur)
+    return out
+
+
+def timed_client(**overrides):
+    app = create_app(Settings(timing_enabled=True, **overrides), contact_pipeline=Sink())
+    return app, TestClient(app)
+
+
+def test_post_reports_every_stage_in_order():
+    _, client = timed_client()
+    r = client.post("/api/contact", json=CONTACT)
+    assert r.status_code == 200
+    timing = stages(r)
+    assert list(timing) == ["mw_in", "recv", "parse", "validate", "handler", "serialize", "mw_out", "total"]
+    assert all(v >= 0 for v in timing.values())
+    assert timing["total"] >= sum(v for k, v in timing.items() if k != "total") - 0.01
+
+
+def test_get_without_body_skips_body_stages():
+    _, client = timed_client()
+    assert list(stages(client.get("/health"))) == ["mw_in", "validate", "handler", "serialize", "mw_out", "total"]
+
+
+def test_request_id_is_echoed_or_generated():
+    _, client = timed_client()
+    assert client.get("/health", headers={"X-Request-ID": "run-42.7"}).headers["x-request-id"] == "run-42.7"
+    generated = client.get("/health", headers={"X-Request-ID": "bad id\twith spaces"}).headers["x-request-id"]
+    assert len(generated) == 32 and generated != client.get("/health").headers["x-request-id"]
+
+
+def test_invalid_json_still_gets_a_422():
+    _, client = timed_client()
+    r = client.post("/api/contact", content=b"{not json", headers={"content-type": "application/json"})
+    assert r.status_code == 422
+    assert "server-timing" in r.headers
+
+
+def test_sync_endpoints_are_timed_too():
+    app = FastAPI()
+    app.router.route_class = TimedRoute
+
+    @app.get("/sync")
+    def sync():
+        return {"ok": True}
+
+    app.add_middleware(ServerTimingMiddleware, timing=ServerTiming(Settings()))
+    assert "handler" in stages(TestClient(app).get("/sync"))
+
+
+def test_slow_requests_are_logged_with_fields(caplog):
+    app, client = timed_client(timing_slow_ms=0.0, timing_log_sample_rate=1.0)
+    with caplog.at_level(logging.WARNING, logger="app.timing"):
+        client.post("/api/login", json={"username": "a", "password": "b"}, headers={"X-Request-ID": "slow-1"})
+    record = caplog.records[-1]
+    assert record.getMessage().startswith("slow request POST /api/login 200 ")
+    assert record.event == "slow_request"
+    assert (record.request_id, record.path, record.status) == ("slow-1", "/api/login", 200)
+    assert "handler" in record.stages_ms
+    line = json.loads(JsonFormatter().format(record))  # one flat JSON object in the log pipeline
+    assert line["request_id"] == "slow-1" and line["total_ms"] == record.total_ms
+    assert app.state.server_timing.stats()["slow_logged"] == 1
+
+
+def test_off_by_default():
+    client = TestClient(create_app(Settings(), contact_pipeline=Sink()))
+    r = client.post("/api/contact", json=CONTACT)
+    assert "server-timing" not in r.headers and "x-request-id" not in r.headers
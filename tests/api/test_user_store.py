@@ -0,0 +1,127 @@
+# tests/api/test_user_store.py
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.settings import Settings
+from app.user_store import CachedUserStore, InMemoryUserStore, SQLiteUserStore, UserStore, build_user_store
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+class CountingStore(InMemoryUserStore):
+    def __init__(self, users):
+        super().__init__(users)
+        self.lookups = 0
+
+    async def get(self, username):
+        self.lookups += 1
+        return await super().get(username)
+
+
+def test_cache_hits_and_negative_caching():
+    backing = CountingStore({"eddie": "hash-1"})
+    users = CachedUserStore(backing, ttl=60, negative_ttl=60)
+
+    async def scenario():
+        assert await users.get("eddie") == "hash-1"
+        assert await users.get("eddie") == "hash-1"
+        assert await users.get("ghost") is None
+        assert await users.get("ghost") is None
+
+    run(scenario())
+    assert backing.lookups == 2
+    stats = users.stats()
+    assert (stats["cache_hits"], stats["cache_negative_hits"], stats["cache_misses"]) == (1, 1, 2)
+
+
+def test_ttl_expiry_and_lru_eviction():
+    backing = CountingStore({"a": "1", "b": "2", "c": "3"})
+    users = CachedUserStore(backing, size=2, ttl=0.05, negative_ttl=0)
+
+    async def scenario():
+        for name in ("a", "b", "a", "c"):  # "b" is least recently used when "c" arrives
+            await users.get(name)
+        assert users.stats()["cache_evictions"] == 1
+        await users.get("b")
+        assert backing.lookups == 4
+        await asyncio.sleep(0.06)
+        await users.get("b")
+        assert backing.lookups == 5
+
+    run(scenario())
+
+
+def test_writes_and_hooks_invalidate():
+    backing = CountingStore({})
+    users = CachedUserStore(backing, negative_ttl=60)
+
+    async def scenario():
+        assert await users.get("new") is None
+        users.put("new", "hash-1")  # write-through drops the negative entry
+        assert await users.get("new") == "hash-1"
+        backing.users["new"] = "hash-2"  # changed behind the cache's back
+        assert await users.get("new") == "hash-1"
+        users.invalidate("new")
+        assert await users.get("new") == "hash-2"
+        users.delete("new")
+        assert await users.get("new") is None
+
+    run(scenario())
+    assert users.stats()["cache_invalidations"] == 3
+
+
+def test_sqlite_store_roundtrip_uses_one_connection_per_thread(tmp_path):
+    store = SQLiteUserStore(str(tmp_path / "users.db"), pool_size=2)
+    store.put("eddie", "hash-1")
+    store.put("eddie", "hash-2")  # upsert
+
+    async def scenario():
+        return await asyncio.gather(*(store.get(name) for name in ["eddie", "ghost"] * 20))
+
+    results = run(scenario())
+    assert results[:2] == ["hash-2", None]
+    assert len(store._conns) <= 3  # two pool threads + this one
+    store.delete("eddie")
+    assert run(store.get("eddie")) is None
+    store.close()
+
+
+def test_build_user_store_seeds_empty_sqlite_table(tmp_path):
+    settings = Settings(user_store="sqlite", user_db_path=str(tmp_path / "users.db"))
+    users = build_user_store(settings, seed={"admin": "hash-1"})
+    users.put("admin", "hash-2")
+    users.close()
+    # Not re-seeded once it has rows.
+    users = build_user_store(settings, seed={"admin": "hash-1"})
+    assert run(users.get("admin")) == "hash-2"
+    users.close()
+
+
+def test_incomplete_backend_fails_at_construction():
+    class ReadOnlyStore(UserStore):
+        async def get(self, username):
+            return None
+
+    with pytest.raises(TypeError, match="delete, put"):
+        ReadOnlyStore()
+
+
+def test_build_user_store_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        build_user_store(Settings(user_store="redis"), seed={})
+
+
+def test_backend_login_still_401s_for_unknown_users():
+    from backend import app as backend
+
+    client = TestClient(backend.app)
+    before = backend.user_store.stats()["cache_misses"]
+    for _ in range(2):
+        r = client.post("/api/login", json={"username": "nobody", "password": "whatever"})
+        assert r.status_code == 401
+        assert r.json() == {"detail": "Invalid credentials"}
+    assert backend.user_store.stats()["cache_misses"] == before + 1
@@ -1,16 +1,43 @@
+import os, shutil, sys, tempfile
+
 import pytest
-from playwright.sync_api import sync_playwright
-import os, sys
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if ROOT not in sys.path:
     sys.path.insert(0, ROOT)
 
-@pytest.fixture(scope="function")
-def page():
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        context = browser.new_context()
-        page = context.new_page()
-        yield page
-        browser.close()
+# Browser fixtures come from pytest-playwright: `browser` is session-scoped
+# (one Chromium per pytest process, i.e. per xdist worker with -n), and every
+# test gets its own `context` + `page`, closed afterwards, so cookies and
+# storage never leak between tests. --browser / --headed pick the engine/mode.
+
+# Everything the apps write to disk, as Settings fields (QA_<NAME> env vars).
+DATA_SETTINGS = {
+    "contact_db_path": "contacts.db",
+    "user_db_path": "users.db",
+    "idempotency_db_path": "idempotency.db",
+    "profile_dir": "profiles",
+    "capture_file": os.path.join("capture", "requests.jsonl"),
+}
+
+
+def data_env(directory):
+    return {"QA_" + name.upper(): os.path.join(directory, leaf) for name, leaf in DATA_SETTINGS.items()}
+
+
+# Module-level apps (app.main.app, backend.app) are built while tests are
+# collected, before any fixture runs: point them at a per-process scratch
+# directory instead of the working tree's data/.
+_SESSION_DATA = tempfile.mkdtemp(prefix="qa-tests-")
+os.environ.update(data_env(_SESSION_DATA))
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_SESSION_DATA, ignore_errors=True)
+
+
+@pytest.fixture(autouse=True)
+def isolated_data(tmp_path, monkeypatch):
+    """Settings.from_env() inside a test writes under that test's tmp_path."""
+    for name, value in data_env(str(tmp_path / "data")).items():
+        monkeypatch.setenv(name, value)
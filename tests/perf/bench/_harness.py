@@ -0,0 +1,64 @@
+# tests/perf/bench/_harness.py
+"""
+Tiny in-process ASGI load driver shared by the micro-benchmarks.
+
+Requests go through httpx's ASGITransport (no sockets), so the numbers
+isolate framework + app overhead from network noise.
+"""
+import asyncio
+import os
+import sys
+import time
+from statistics import quantiles
+
+import httpx
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def percentile(samples, pct: float) -> float:
+    """Percentile (0-100) of a list of samples; exact enough for reporting."""
+    if len(samples) < 2:
+        return samples[0] if samples else 0.0
+    return quantiles(samples, n=100, method="inclusive")[int(pct) - 1]
+
+
+async def _drive(app, method: str, path: str, n: int, lifespan: bool = False, **kwargs) -> dict:
+    if lifespan:  # background components (pipelines, /ready) need startup to have run
+        async with app.router.lifespan_context(app):
+            return await _drive(app, method, path, n, **kwargs)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(min(50, n)):  # warm-up
+            await client.request(method, path, **kwargs)
+        latencies = []
+        start = time.perf_counter()
+        for _ in range(n):
+            t0 = time.perf_counter_ns()
+            r = await client.request(method, path, **kwargs)
+            latencies.append((time.perf_counter_ns() - t0) / 1e3)
+            assert r.status_code < 500, f"{method} {path} -> {r.status_code}"
+        elapsed = time.perf_counter() - start
+    return {
+        "rps": n / elapsed,
+        "p50_us": percentile(latencies, 50),
+        "p99_us": percentile(latencies, 99),
+    }
+
+
+def measure(app, method: str, path: str, n: int = 2000, lifespan: bool = False, **kwargs) -> dict:
+    """
+    Run `n` sequential requests against `app`; return rps and p50/p99 in µs.
+    lifespan=True runs the app's startup/shutdown around them.
+    """
+    return asyncio.run(_drive(app, method, path, n, lifespan, **kwargs))
+
+
+def print_table(title: str, rows) -> None:
+    """rows: iterable of (label, endpoint, result-dict)."""
+    print(f"\n{title}")
+    print(f"{'variant':<14}{'endpoint':<22}{'req/s':>10}{'p50 µs':>10}{'p99 µs':>10}")
+    for label, endpoint, res in rows:
+        print(f"{label:<14}{endpoint:<22}{res['rps']:>10.0f}{res['p50_us']:>10.1f}{res['p99_us']:>10.1f}")
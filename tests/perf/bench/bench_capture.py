@@ -0,0 +1,44 @@
+# tests/perf/bench/bench_capture.py
+"""
+Per-request cost of traffic capture (QA_CAPTURE_ENABLED) on /api/login and
+/api/contact: off vs on (every request recorded, redacted and written by
+the background thread). The capture goes to a temporary file.
+
+Run:
+  python tests/perf/bench/bench_capture.py [N]
+"""
+import os
+import sys
+import tempfile
+
+from _harness import measure, print_table
+
+from app.main import create_app
+from app.settings import Settings
+
+ENDPOINTS = [
+    ("POST", "/api/login", {"json": {"username": "admin", "password": "1234"}}),
+    ("POST", "/api/contact", {"json": {"name": "Eddie", "email": "a@b.com", "message": "Hello from QA site!"}}),
+]
+
+
+def main(n: int = 3000) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        base = dict(contact_db_path=os.path.join(tmp, "contacts.db"), log_enabled=False)
+        capture_file = os.path.join(tmp, "requests.jsonl")
+        rows = []
+        for method, path, kwargs in ENDPOINTS:
+            for label, settings in (
+                ("capture off", Settings(**base)),
+                ("capture on", Settings(**base, capture_enabled=True, capture_file=capture_file)),
+            ):
+                rows.append((label, f"{method} {path}", measure(create_app(settings), method, path, n,
+                                                                lifespan=True, **kwargs)))
+        with open(capture_file) as f:
+            lines = sum(1 for _ in f)
+    print_table(f"traffic capture ({n} sequential requests each)", rows)
+    print(f"captured lines: {lines}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3000)
@@ -0,0 +1,136 @@
+# tests/perf/bench/bench_contacts_query.py
+"""
+Admin contact search (app.contact_search) at N rows (default 1M).
+
+Builds a throw-away contacts database with the real schema (indexes + FTS5
+triggers), then times each query shape on its own connection:
+
+  indexed        the query GET /api/contacts runs (keyset page of 50)
+  table scan     the same result from a full scan (NOT INDEXED, LIKE '%word%'
+                 for text); deep pages use OFFSET instead of a cursor
+
+Also reports full-export throughput (NDJSON, one page at a time) and the
+peak Python memory it needed.
+
+Run:
+  python tests/perf/bench/bench_contacts_query.py [N]
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from _harness import percentile
+
+from app.contact_queue import INSERT_SQL, open_db
+from app.contact_search import ContactFilter, ContactSearch, build_query
+from app.contacts_api import _ndjson_page
+
+WORDS = ("order delivery refund invoice broken late account password login shipping payment "
+         "question thanks hello support cancel address update damaged missing warranty").split()
+RARE = "kumquat"          # in ~1 of 10,000 messages
+SPAN = 2 * 365 * 86400.0  # two years of contacts
+T0 = 1_700_000_000.0
+EMAILS = 50_000
+PAGE = 50
+
+
+def build(path: str, n: int) -> float:
+    rng = random.Random(42)
+    conn = open_db(path)
+    started = time.perf_counter()
+    step = SPAN / n
+    for chunk in range(0, n, 50_000):
+        rows = []
+        for i in range(chunk, min(n, chunk + 50_000)):
+            words = rng.choices(WORDS, k=12)
+            if rng.random() < 0.0001:
+                words[rng.randrange(12)] = RARE
+            rows.append((f"User {i}", f"user{rng.randrange(EMAILS)}@example.com", " ".join(words), T0 + i * step))
+        with conn:
+            conn.executemany(INSERT_SQL, rows)
+    conn.execute("ANALYZE")
+    conn.close()
+    return time.perf_counter() - started
+
+
+def timed(conn, sql: str, params, reps: int) -> dict:
+    latencies = []
+    for _ in range(reps):
+        t0 = time.perf_counter()
+        conn.execute(sql, params).fetchall()
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return {"p50_ms": percentile(latencies, 50), "p99_ms": percentile(latencies, 99)}
+
+
+def scenarios(conn, n: int):
+    """(label, indexed (sql, params), table-scan (sql, params))."""
+    mid = T0 + SPAN / 2
+    deep = conn.execute(
+        "SELECT id, name, email, message, created_at FROM contacts ORDER BY created_at DESC, id DESC LIMIT 1 OFFSET ?",
+        (n // 2,),
+    ).fetchone()
+    after = (deep[4], deep[0])
+    order = " ORDER BY created_at DESC, id DESC LIMIT ?"
+    cols = "SELECT id, name, email, message, created_at FROM contacts"
+    return [
+        ("newest page", build_query(ContactFilter(), None, PAGE),
+         (cols + " NOT INDEXED" + order, [PAGE])),
+        ("deep page", build_query(ContactFilter(), after, PAGE),
+         (cols + order + " OFFSET ?", [PAGE, n // 2])),
+        ("email", build_query(ContactFilter(email="user123@example.com"), None, PAGE),
+         (cols + " NOT INDEXED WHERE email = ? COLLATE NOCASE" + order, ["user123@example.com", PAGE])),
+        ("date range", build_query(ContactFilter(since=mid, until=mid + 7 * 86400), None, PAGE),
+         (cols + " NOT INDEXED WHERE created_at >= ? AND created_at < ?" + order, [mid, mid + 7 * 86400, PAGE])),
+        ("text (rare)", build_query(ContactFilter(text=RARE), None, PAGE),
+         (cols + " NOT INDEXED WHERE message LIKE ?" + order, [f"%{RARE}%", PAGE])),
+        ("text+dates", build_query(ContactFilter(text="refund damaged", since=mid, until=mid + 30 * 86400), None, PAGE),
+         (cols + " NOT INDEXED WHERE message LIKE ? AND message LIKE ? AND created_at >= ? AND created_at < ?" + order,
+          ["%refund%", "%damaged%", mid, mid + 30 * 86400, PAGE])),
+        ("text (common)", build_query(ContactFilter(text="refund damaged"), None, PAGE),
+         (cols + " NOT INDEXED WHERE message LIKE ? AND message LIKE ?" + order, ["%refund%", "%damaged%", PAGE])),
+    ]
+
+
+async def export(path: str) -> tuple:
+    search = ContactSearch(path)
+    rows = size = 0
+    started = time.perf_counter()
+    async for page in search.iter_pages(ContactFilter(), 1000):
+        rows += len(page)
+        size += len(_ndjson_page(page))
+    elapsed = time.perf_counter() - started
+    search.close()
+    return rows, size, elapsed
+
+
+def main(n: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "contacts.db")
+        print(f"building {n:,} contacts ...", flush=True)
+        seconds = build(path, n)
+        print(f"built in {seconds:.1f}s ({n / seconds:,.0f} rows/s incl. FTS), "
+              f"{os.path.getsize(path) / 2**20:.0f} MiB on disk")
+
+        conn = open_db(path)
+        print(f"\nquery latency at {n:,} rows (page of {PAGE})")
+        print(f"{'query':<16}{'indexed p50':>13}{'p99 ms':>9}{'scan p50':>12}{'p99 ms':>9}")
+        for label, (sql, params), (scan_sql, scan_params) in scenarios(conn, n):
+            fast = timed(conn, sql, params, 200)
+            slow = timed(conn, scan_sql, scan_params, 5)
+            print(f"{label:<16}{fast['p50_ms']:>13.2f}{fast['p99_ms']:>9.2f}{slow['p50_ms']:>12.1f}{slow['p99_ms']:>9.1f}")
+        conn.close()
+
+        tracemalloc.start()
+        rows, size, elapsed = asyncio.run(export(path))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"\nexport: {rows:,} rows, {size / 2**20:.0f} MiB NDJSON in {elapsed:.1f}s "
+              f"({rows / elapsed:,.0f} rows/s), peak Python memory {peak / 2**20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
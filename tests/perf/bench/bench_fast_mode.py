@@ -0,0 +1,34 @@
+# tests/perf/bench/bench_fast_mode.py
+"""
+Standard vs fast serialization mode (QA_FAST_MODE) on /api/login and
+/api/contact, each mode built with create_app(Settings(fast_mode=...)).
+
+Run:
+  python tests/perf/bench/bench_fast_mode.py [N]
+"""
+import sys
+
+from _harness import measure, print_table
+
+from app.fast_json import fast_response_class
+from app.main import create_app
+from app.settings import Settings
+
+ENDPOINTS = [
+    ("POST", "/api/login", {"json": {"username": "admin", "password": "1234"}}),
+    ("POST", "/api/contact", {"json": {"name": "Eddie", "email": "a@b.com", "message": "Hello from QA site!"}}),
+]
+
+
+def main(n: int = 3000) -> None:
+    print(f"fast mode default response class = {fast_response_class().__name__}")
+    apps = {"standard": create_app(Settings(fast_mode=False)), "fast": create_app(Settings(fast_mode=True))}
+    rows = []
+    for method, path, kwargs in ENDPOINTS:
+        for label, app in apps.items():
+            rows.append((label, f"{method} {path}", measure(app, method, path, n, **kwargs)))
+    print_table(f"serialization mode ({n} sequential requests each)", rows)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3000)
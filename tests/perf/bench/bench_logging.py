@@ -0,0 +1,111 @@
+# tests/perf/bench/bench_logging.py
+"""
+Per-call cost of logging a contact from THREADS threads at once (what the
+threadpool handlers did), LINES lines per thread, PACE seconds apart:
+
+  print()        synchronous, line-buffered write per call (the old backend)
+  log pipeline   app.log_pipeline: enqueue only; JSON + batched writes on the
+                 listener thread
+
+Output goes to an OS pipe drained by a reader thread at about DRAIN_BPS,
+standing in for stdout behind a container log driver: once the pipe is
+full, writes block. Reported: calls/s and the caller's p50/p99 per call.
+
+Run:
+  python tests/perf/bench/bench_logging.py [LINES] [THREADS]
+"""
+import logging
+import os
+import sys
+import threading
+import time
+
+from _harness import percentile
+
+from app.log_pipeline import LogPipeline
+from app.settings import Settings
+
+MESSAGE = ("Eddie", "a@b.com", "Hello from QA site!")
+DRAIN_BPS = 512 * 1024
+CHUNK = 4096
+PACE = 0.0005
+
+
+def slow_pipe():
+    """(write end as a line-buffered text file, stop()) for a slowly drained pipe."""
+    read_fd, write_fd = os.pipe()
+    stopping = threading.Event()
+
+    def drain():
+        while True:
+            data = os.read(read_fd, CHUNK)
+            if not data:
+                break
+            if not stopping.is_set():
+                time.sleep(len(data) / DRAIN_BPS)
+        os.close(read_fd)
+
+    reader = threading.Thread(target=drain, daemon=True)
+    reader.start()
+    fh = os.fdopen(write_fd, "w", buffering=1)
+
+    def stop():
+        stopping.set()
+        fh.close()
+        reader.join()
+
+    return fh, stop
+
+
+def run_threads(call, lines: int, threads: int) -> dict:
+    latencies = [[] for _ in range(threads)]
+
+    def worker(out):
+        for i in range(lines):
+            t0 = time.perf_counter_ns()
+            call(i)
+            out.append((time.perf_counter_ns() - t0) / 1e3)
+            time.sleep(PACE)  # handlers do other work between log calls
+
+    pool = [threading.Thread(target=worker, args=(latencies[t],)) for t in range(threads)]
+    started = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - started
+    samples = [x for chunk in latencies for x in chunk]
+    return {"rps": len(samples) / elapsed, "p50": percentile(samples, 50), "p99": percentile(samples, 99)}
+
+
+def main(lines: int = 5_000, threads: int = 8) -> None:
+    print(f"\n{threads} threads x {lines:,} lines, sink drained at {DRAIN_BPS / 2**20:g} MiB/s")
+    print(f"{'variant':<14}{'calls/s':>10}{'p50 µs':>10}{'p99 µs':>10}")
+
+    name, email, message = MESSAGE
+    fh, stop = slow_pipe()
+    res = run_threads(lambda i: print(f"New contact from {name} <{email}>: {message}", file=fh), lines, threads)
+    stop()
+    print(f"{'print()':<14}{res['rps']:>10.0f}{res['p50']:>10.1f}{res['p99']:>10.1f}")
+
+    fh, stop = slow_pipe()
+    pipeline = LogPipeline(Settings(), stream=fh)
+    pipeline.start()
+    log = logging.getLogger("backend.bench")
+    res = run_threads(
+        lambda i: log.info("New contact from %s <%s>", name, email,
+                           extra={"event": "contact", "contact_message": message}),
+        lines, threads,
+    )
+    pipeline.stop()
+    stop()
+    stats = pipeline.stats()
+    print(f"{'log pipeline':<14}{res['rps']:>10.0f}{res['p50']:>10.1f}{res['p99']:>10.1f}"
+          f"   (written {stats['written']:,} in {stats['batches']:,} writes, dropped {stats['dropped']:,})")
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 5_000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 8,
+    )
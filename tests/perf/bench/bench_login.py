@@ -0,0 +1,112 @@
+# tests/perf/bench/bench_login.py
+"""
+Login throughput under contention, scrypt hashes (app.passwords).
+
+Each variant floods a login endpoint with CONCURRENCY clients for a few
+seconds while one probe client keeps calling a cheap sync endpoint:
+
+  sync def       hash checked in a `def` handler (Starlette's shared pool)
+  verifier       async handler + CredentialVerifier, cache off
+  verifier+cache same, with the positive-result TTL cache on
+
+Reported: login req/s, share answered 503 (verifier back-pressure) and the
+probe's p50/p99 -- how much the flood starves everything else.
+
+Run:
+  python tests/perf/bench/bench_login.py [SECONDS] [CONCURRENCY]
+"""
+import asyncio
+import sys
+import time
+
+import httpx
+from _harness import percentile
+
+from fastapi import FastAPI, HTTPException
+
+from app.passwords import CredentialVerifier, VerifierBusy, hash_password, verify_password
+from app.settings import Settings
+
+USERS = {"admin": hash_password("1234")}
+LOGIN = {"username": "admin", "password": "1234"}
+
+
+def build_app(variant: str) -> FastAPI:
+    app = FastAPI()
+    verifier = CredentialVerifier(Settings(login_cache_ttl=30.0 if variant == "verifier+cache" else 0))
+
+    if variant == "sync def":
+        @app.post("/login")
+        def login(body: dict):
+            if not verify_password(body["password"], USERS[body["username"]]):
+                raise HTTPException(401)
+            return {"ok": True}
+    else:
+        @app.post("/login")
+        async def login(body: dict):
+            try:
+                ok = await verifier.verify(body["username"], body["password"], USERS.get(body["username"]))
+            except VerifierBusy:
+                raise HTTPException(503)
+            if not ok:
+                raise HTTPException(401)
+            return {"ok": True}
+
+    @app.get("/probe")
+    def probe():
+        return {"ok": True}
+
+    app.state.verifier = verifier
+    return app
+
+
+async def _flood(app: FastAPI, seconds: float, concurrency: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    deadline = time.perf_counter() + seconds
+    counts = {"ok": 0, "busy": 0}
+    probes = []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        async def login_client():
+            while time.perf_counter() < deadline:
+                r = await client.post("/login", json=LOGIN)
+                counts["ok" if r.status_code == 200 else "busy"] += 1
+
+        async def probe_client():
+            while time.perf_counter() < deadline:
+                t0 = time.perf_counter_ns()
+                await client.get("/probe")
+                probes.append((time.perf_counter_ns() - t0) / 1e6)
+                await asyncio.sleep(0.005)
+
+        started = time.perf_counter()
+        await asyncio.gather(probe_client(), *(login_client() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    total = counts["ok"] + counts["busy"]
+    return {
+        "rps": counts["ok"] / elapsed,
+        "busy_pct": 100 * counts["busy"] / total if total else 0.0,
+        "probe_p50_ms": percentile(probes, 50),
+        "probe_p99_ms": percentile(probes, 99),
+    }
+
+
+def main(seconds: float = 3.0, concurrency: int = 64) -> None:
+    print(f"\nlogin flood: {concurrency} clients for {seconds:g}s each, scrypt n=2^14")
+    print(f"{'variant':<16}{'login/s':>10}{'503 %':>8}{'probe p50 ms':>14}{'probe p99 ms':>14}")
+    for variant in ("sync def", "verifier", "verifier+cache"):
+        app = build_app(variant)
+        res = asyncio.run(_flood(app, seconds, concurrency))
+        app.state.verifier.close()
+        print(
+            f"{variant:<16}{res['rps']:>10.0f}{res['busy_pct']:>8.1f}"
+            f"{res['probe_p50_ms']:>14.2f}{res['probe_p99_ms']:>14.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main(
+        float(sys.argv[1]) if len(sys.argv) > 1 else 3.0,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 64,
+    )
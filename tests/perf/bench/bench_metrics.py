@@ -0,0 +1,59 @@
+# tests/perf/bench/bench_metrics.py
+"""
+Recording overhead of app.metrics.
+
+  1. Metrics.observe() + in_flight() in a tight loop (per-request cost).
+  2. GET /health through the real app with and without MetricsMiddleware.
+
+Run:
+  python tests/perf/bench/bench_metrics.py [N]
+"""
+import sys
+import tempfile
+import time
+
+from _harness import measure, print_table
+
+from fastapi import FastAPI
+
+from app.main import app as real_app
+from app.metrics import Metrics, MetricsMiddleware
+
+
+def bench_record(metrics: Metrics, n: int) -> float:
+    route = metrics.route_ids["/api/contact"]
+    observe, in_flight = metrics.observe, metrics.in_flight
+    start = time.perf_counter_ns()
+    for i in range(n):
+        in_flight(route, 1)
+        observe(route, 200, (i % 1000) / 1e5)
+        in_flight(route, -1)
+    return (time.perf_counter_ns() - start) / n / 1e3
+
+
+def main(n: int = 2000) -> None:
+    templates = [r.path for r in real_app.routes]
+    in_memory = Metrics()
+    in_memory.configure(templates)
+    with tempfile.TemporaryDirectory() as tmp:
+        shared = Metrics(multiproc_dir=tmp)
+        shared.configure(templates)
+        loops = 200_000
+        print(f"\nrecord cost per request ({loops} iterations)")
+        print(f"  in-memory array : {bench_record(in_memory, loops):.3f} µs")
+        print(f"  mmap (multiproc): {bench_record(shared, loops):.3f} µs")
+
+    bare = FastAPI(redirect_slashes=False)
+    bare.router.routes.extend(real_app.router.routes)
+    instrumented = FastAPI(redirect_slashes=False)
+    instrumented.router.routes.extend(real_app.router.routes)
+    instrumented.add_middleware(MetricsMiddleware, metrics=Metrics(), routes=instrumented.router.routes)
+    rows = [
+        ("no metrics", "GET /health", measure(bare, "GET", "/health", n)),
+        ("metrics", "GET /health", measure(instrumented, "GET", "/health", n)),
+    ]
+    print_table(f"end-to-end ({n} sequential requests)", rows)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
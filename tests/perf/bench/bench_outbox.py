@@ -0,0 +1,146 @@
+# tests/perf/bench/bench_outbox.py
+"""
+Contact e-mail outbox (app.outbox): messages/s against a local SMTP sink
+(aiosmtpd) reached through a proxy that adds RTT_MS of round-trip time,
+as a real relay would have.
+
+  per message    new connection (banner, EHLO, QUIT) for every e-mail
+  reused         one persistent connection, MAIL/RCPT/DATA one at a time
+  pipelined      one persistent connection, PIPELINING (2 round trips/e-mail)
+  pipelined x4   four persistent connections
+
+Run:
+  python tests/perf/bench/bench_outbox.py [N] [RTT_MS]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from _harness import ROOT  # noqa: F401  (puts the repo on sys.path)
+
+from aiosmtpd.controller import Controller
+
+from app.contact_queue import INSERT_SQL, open_db
+from app.outbox import OutboxWorker
+from app.settings import Settings
+
+
+class Sink:
+    def __init__(self) -> None:
+        self.pipelining = True
+        self.count = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        session.host_name = hostname
+        if self.pipelining:
+            responses.insert(-1, "250-PIPELINING")
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.count += 1
+        return "250 OK"
+
+
+class DelayProxy:
+    """TCP relay delaying every chunk by rtt/2 each way (order preserved)."""
+
+    def __init__(self, target_port: int, rtt: float) -> None:
+        self.target_port = target_port
+        self.delay = rtt / 2
+        self.port = 0
+        ready = threading.Event()
+        threading.Thread(target=self._serve, args=(ready,), daemon=True).start()
+        ready.wait()
+
+    def _serve(self, ready: threading.Event) -> None:
+        loop = asyncio.new_event_loop()
+        server = loop.run_until_complete(asyncio.start_server(self._handle, "127.0.0.1", 0))
+        self.port = server.sockets[0].getsockname()[1]
+        ready.set()
+        loop.run_forever()
+
+    async def _pipe(self, reader, writer) -> None:
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+
+        async def pump():
+            while True:
+                due, data = await queue.get()
+                if data is None:
+                    writer.close()
+                    return
+                await asyncio.sleep(max(0.0, due - loop.time()))
+                writer.write(data)
+                await writer.drain()
+
+        task = asyncio.create_task(pump())
+        while True:
+            data = await reader.read(65536)
+            queue.put_nowait((loop.time() + self.delay, data or None))
+            if not data:
+                break
+        await task
+
+    async def _handle(self, client_reader, client_writer) -> None:
+        server_reader, server_writer = await asyncio.open_connection("127.0.0.1", self.target_port)
+        await asyncio.gather(
+            self._pipe(client_reader, server_writer), self._pipe(server_reader, client_writer),
+            return_exceptions=True,
+        )
+
+
+def run(sink: Sink, port: int, n: int, pipelining: bool, **overrides) -> float:
+    sink.pipelining = pipelining
+    with tempfile.TemporaryDirectory() as tmp:
+        settings = Settings(
+            contact_db_path=os.path.join(tmp, "contacts.db"), outbox_smtp_host="127.0.0.1",
+            outbox_smtp_port=port, outbox_batch_size=200, **overrides,
+        )
+        conn = open_db(settings.contact_db_path, outbox=True)
+        with conn:
+            conn.executemany(INSERT_SQL, [(f"User {i}", f"user{i}@example.com", "Hello " * 40, time.time())
+                                          for i in range(n)])
+        conn.close()
+
+        async def drain() -> float:
+            worker = OutboxWorker(settings)
+            await worker.start()
+            worker._stopping.set()  # drive the rounds here, no polling pauses
+            await worker._task
+            started = time.perf_counter()
+            while await worker.run_once():
+                pass
+            elapsed = time.perf_counter() - started
+            assert worker.stats()["sent"] == n, worker.stats()
+            await worker.stop()
+            return elapsed
+
+        return n / asyncio.run(drain())
+
+
+def main(n: int, rtt_ms: float) -> None:
+    sink = Sink()
+    controller = Controller(sink, hostname="127.0.0.1", port=8025 + os.getpid() % 1000)
+    controller.start()
+    proxy = DelayProxy(controller.port, rtt_ms / 1000)
+    variants = [
+        ("per message", False, dict(outbox_reuse_connections=False)),
+        ("reused", False, {}),
+        ("pipelined", True, {}),
+        ("pipelined x4", True, dict(outbox_connections=4)),
+    ]
+    print(f"\noutbox delivery: {n} e-mails, RTT {rtt_ms:g} ms")
+    print(f"{'variant':<16}{'msgs/s':>10}")
+    try:
+        for label, pipelining, overrides in variants:
+            rate = run(sink, proxy.port, n, pipelining, **overrides)
+            print(f"{label:<16}{rate:>10.0f}")
+    finally:
+        controller.stop()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000, float(sys.argv[2]) if len(sys.argv) > 2 else 2.0)
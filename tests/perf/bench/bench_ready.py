@@ -0,0 +1,47 @@
+# tests/perf/bench/bench_ready.py
+"""
+GET /ready (snapshot refreshed in the background) vs the same checks run
+inline on every probe, with /health as the floor. "checks run" is how many
+times SQLite was asked for a write lock during the run -- the load the
+probes themselves put on the database.
+
+Run:
+  python tests/perf/bench/bench_ready.py [N]
+"""
+import os
+import sys
+import tempfile
+
+from _harness import measure, print_table
+
+from app.fast_json import RawJSONResponse
+from app.main import create_app
+from app.settings import Settings
+
+
+def build(tmp: str):
+    app = create_app(Settings(contact_db_path=os.path.join(tmp, "contacts.db"), log_enabled=False))
+    readiness = app.state.readiness
+
+    @app.get("/ready-inline", include_in_schema=False)
+    async def ready_inline():
+        await readiness.refresh()  # what a naive probe would do
+        status, body = readiness.response()
+        return RawJSONResponse(body, status_code=status)
+
+    return app
+
+
+def main(n: int = 3000) -> None:
+    rows, checks = [], []
+    with tempfile.TemporaryDirectory() as tmp:
+        for label, path in (("constant", "/health"), ("snapshot", "/ready"), ("inline", "/ready-inline")):
+            app = build(tmp)
+            rows.append((label, f"GET {path}", measure(app, "GET", path, n, lifespan=True)))
+            checks.append((label, app.state.readiness.refreshes))
+    print_table(f"readiness probes ({n} sequential requests each)", rows)
+    print("\nchecks run: " + ", ".join(f"{label} {count}" for label, count in checks))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3000)
@@ -0,0 +1,110 @@
+# tests/perf/bench/bench_shedding.py
+"""
+Load shedding (app.shedding) under a spike far above capacity.
+
+The endpoint simulates a dependency that serves CAPACITY requests at once,
+SERVICE_MS each. CONCURRENCY closed-loop clients hammer it for a few
+seconds while a probe polls /health (clients back off BACKOFF after a 503):
+
+  no shedding    every request waits its turn; latency = queue length
+  shedding       LoadSheddingMiddleware, in-flight cap = CAPACITY,
+                 CoDel target/interval from Settings defaults
+
+Reported: admitted req/s, share answered 503, admitted p50/p99, p99 of the
+503s (how fast the rejection is) and the /health p99.
+
+Run:
+  python tests/perf/bench/bench_shedding.py [SECONDS] [CONCURRENCY]
+"""
+import asyncio
+import sys
+import time
+
+import httpx
+from _harness import percentile
+
+from fastapi import FastAPI
+
+from app.settings import Settings
+from app.shedding import LoadShedder, LoadSheddingMiddleware
+
+CAPACITY = 8
+SERVICE_MS = 5
+BACKOFF = 0.1  # shed clients wait a little (stands in for Retry-After)
+
+
+def build_app(shedding: bool) -> FastAPI:
+    app = FastAPI()
+    backend = asyncio.Semaphore(CAPACITY)
+
+    @app.get("/api/work")
+    async def work():
+        async with backend:
+            await asyncio.sleep(SERVICE_MS / 1000)
+        return {"ok": True}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok"}
+
+    if shedding:
+        app.add_middleware(LoadSheddingMiddleware, shedder=LoadShedder(Settings(shed_api_max_in_flight=CAPACITY)))
+    return app
+
+
+async def _spike(app: FastAPI, seconds: float, concurrency: int) -> dict:
+    transport = httpx.ASGITransport(app=app)
+    deadline = time.perf_counter() + seconds
+    admitted, shed, probes = [], [], []
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        async def worker():
+            while time.perf_counter() < deadline:
+                t0 = time.perf_counter_ns()
+                r = await client.get("/api/work")
+                elapsed_ms = (time.perf_counter_ns() - t0) / 1e6
+                if r.status_code == 200:
+                    admitted.append(elapsed_ms)
+                else:
+                    shed.append(elapsed_ms)
+                    await asyncio.sleep(BACKOFF)
+
+        async def probe():
+            while time.perf_counter() < deadline:
+                t0 = time.perf_counter_ns()
+                await client.get("/health")
+                probes.append((time.perf_counter_ns() - t0) / 1e6)
+                await asyncio.sleep(0.01)
+
+        started = time.perf_counter()
+        await asyncio.gather(probe(), *(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    total = len(admitted) + len(shed)
+    return {
+        "rps": len(admitted) / elapsed,
+        "shed_pct": 100 * len(shed) / total if total else 0.0,
+        "p50": percentile(admitted, 50),
+        "p99": percentile(admitted, 99),
+        "shed_p99": percentile(shed, 99),
+        "health_p99": percentile(probes, 99),
+    }
+
+
+def main(seconds: float = 5.0, concurrency: int = 200) -> None:
+    print(f"\nspike: {concurrency} clients for {seconds:g}s, capacity {CAPACITY} x {SERVICE_MS} ms")
+    print(f"{'variant':<14}{'ok/s':>8}{'503 %':>8}{'ok p50 ms':>11}{'ok p99 ms':>11}"
+          f"{'503 p99 ms':>12}{'health p99':>12}")
+    for variant, shedding in (("no shedding", False), ("shedding", True)):
+        res = asyncio.run(_spike(build_app(shedding), seconds, concurrency))
+        print(
+            f"{variant:<14}{res['rps']:>8.0f}{res['shed_pct']:>8.1f}{res['p50']:>11.1f}{res['p99']:>11.1f}"
+            f"{res['shed_p99']:>12.1f}{res['health_p99']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main(
+        float(sys.argv[1]) if len(sys.argv) > 1 else 5.0,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 200,
+    )
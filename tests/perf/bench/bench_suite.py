@@ -0,0 +1,328 @@
+# tests/perf/bench/bench_suite.py
+"""
+Benchmark suite: every route of app.main and backend.app, in-process over
+httpx's ASGITransport (no sockets, no Docker), compared against a committed
+baseline (baseline.json next to this file).
+
+Per route: ops/s (best of --rounds), p50/p99 latency and the peak traced
+memory (tracemalloc) one request needs above what was allocated before it.
+Iteration counts are calibrated per route so each round takes about
+--target seconds; the whole suite runs in well under a minute.
+
+Baselines come from other machines, so expected ops/s are scaled by a fixed
+pure-Python reference workload timed on both. That corrects for CPU speed,
+not for the interpreter: a baseline recorded on another Python major.minor
+is refused (--any-python compares anyway). A route regresses when its
+ops/s drop, or its memory grows, by more than --tolerance; the run then
+exits with status 1. Routes without a request spec in SPECS fail the run as
+well, so new endpoints get benchmarked.
+
+Run:
+  python tests/perf/bench/bench_suite.py                    # compare, exit 1 on regression
+  python tests/perf/bench/bench_suite.py --update-baseline  # after an intended change
+  python tests/perf/bench/bench_suite.py --only "main GET /api" --tolerance 0.4 --json results.json
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from statistics import median
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+from _harness import ROOT, percentile
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+ADMIN_TOKEN = "bench-token"
+T0 = 1_700_000_000.0
+SEED_ROWS = 200
+CUTOFF = "2023-11-14T23:59:59Z"  # after the seeded rows, before anything posted during the run
+WARMUP = 20
+ALLOC_SAMPLES = 20
+ALLOC_SLACK_KIB = 2.0  # memory changes below this are noise, whatever the tolerance
+
+_AUTH = {"Authorization": f"Bearer {ADMIN_TOKEN}"}
+_CONTACT = {"name": "Eddie", "email": "a@b.com", "message": "Hello from QA site!"}
+
+# (method, path) -> httpx request kwargs (+ "status", default 200). Shared by
+# both apps; the contacts queries only see the seeded rows (until=CUTOFF), so
+# their cost doesn't depend on how many contacts earlier routes posted.
+SPECS: Dict[Tuple[str, str], dict] = {
+    ("GET", "/"): {},
+    ("GET", "/health"): {},
+    ("GET", "/ready"): {},
+    ("GET", "/metrics"): {},
+    ("GET", "/sitemap.xml"): {},
+    ("GET", "/openapi.json"): {},
+    ("GET", "/docs"): {},
+    ("GET", "/docs/oauth2-redirect"): {},
+    ("GET", "/redoc"): {},
+    ("POST", "/api/login"): {"json": {"username": "admin", "password": "1234"}},
+    ("POST", "/api/contact"): {"json": _CONTACT},
+    ("POST", "/api/contact/batch"): {
+        "content": b"".join(json.dumps(_CONTACT).encode() + b"\n" for _ in range(10)),
+        "headers": {"Content-Type": "application/x-ndjson"},
+    },
+    ("GET", "/api/contacts"): {"params": {"until": CUTOFF, "limit": 50}, "headers": _AUTH},
+    ("GET", "/api/contacts/export"): {"params": {"until": CUTOFF, "format": "ndjson"}, "headers": _AUTH},
+}
+
+
+# ---------- Setup ----------
+def configure(tmp: str) -> None:
+    """Point both apps at throw-away databases; must run before they are imported."""
+    os.environ.update({
+        "QA_CONTACT_DB_PATH": os.path.join(tmp, "contacts.db"),
+        "QA_USER_DB_PATH": os.path.join(tmp, "users.db"),
+        "QA_IDEMPOTENCY_DB_PATH": os.path.join(tmp, "idempotency.db"),
+        "QA_ADMIN_TOKEN": ADMIN_TOKEN,
+        "QA_LOG_ENABLED": "0",
+    })
+    from app.contact_queue import INSERT_SQL, open_db
+
+    conn = open_db(os.environ["QA_CONTACT_DB_PATH"])
+    with conn:
+        conn.executemany(INSERT_SQL, [(f"User {i}", f"user{i % 20}@example.com", f"seeded message {i}", T0 + i)
+                                      for i in range(SEED_ROWS)])
+    conn.close()
+
+
+def load_app(name: str):
+    """(ASGI app, its contact pipeline)."""
+    if name == "main":
+        from app.main import create_app
+
+        app = create_app()
+        return app, app.state.contact_pipeline
+    module = importlib.import_module("backend.app")
+    return module.app, module.contact_pipeline
+
+
+def routes(app) -> List[Tuple[str, str]]:
+    found = []
+    for route in app.routes:
+        for method in sorted(getattr(route, "methods", None) or ()):
+            if method != "HEAD":
+                found.append((method, route.path))
+    return found
+
+
+def reference_score(seconds: float = 1.0) -> float:
+    """
+    Ops/s of a fixed pure-Python workload; scales the baseline to this
+    machine. Best chunk over `seconds`, which also lets the CPU clock ramp up
+    before the routes are timed.
+    """
+    payload = {"name": "Eddie", "email": "a@b.com", "message": "Hello " * 20, "tags": [str(i) for i in range(20)]}
+    best = 0.0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        for _ in range(1000):
+            data = json.loads(json.dumps(payload))
+            sorted(data["tags"], key=len)
+        best = max(best, 1000 / (time.perf_counter() - started))
+    return best
+
+
+# ---------- Measurement ----------
+async def bench_route(client: httpx.AsyncClient, method: str, path: str, spec: dict,
+                      target: float, rounds: int) -> dict:
+    kwargs = {k: v for k, v in spec.items() if k != "status"}
+    expected = spec.get("status", 200)
+
+    async def once() -> None:
+        r = await client.request(method, path, **kwargs)
+        if r.status_code != expected:
+            raise SystemExit(f"{method} {path} -> {r.status_code}, expected {expected}: {r.text[:200]}")
+
+    for _ in range(WARMUP):
+        await once()
+    # Calibrate: grow the batch until it takes a measurable time, then size
+    # the rounds to `target` seconds each.
+    n = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(n):
+            await once()
+        elapsed = time.perf_counter() - started
+        if elapsed >= 0.02:
+            break
+        n *= 2
+    iterations = max(20, math.ceil(n * target / elapsed))
+
+    latencies, best_ops = [], 0.0
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            t0 = time.perf_counter_ns()
+            await once()
+            latencies.append((time.perf_counter_ns() - t0) / 1e3)
+        best_ops = max(best_ops, iterations / (time.perf_counter() - started))
+
+    peaks = []
+    tracemalloc.start()
+    for _ in range(ALLOC_SAMPLES):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        await once()
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+
+    return {
+        "ops": round(best_ops, 1),
+        "p50_us": round(percentile(latencies, 50), 1),
+        "p99_us": round(percentile(latencies, 99), 1),
+        "alloc_kib": round(median(peaks) / 1024, 1),
+        "iterations": iterations,
+    }
+
+
+async def bench_app(name: str, only: Optional[str], target: float, rounds: int, retries: int,
+                    regressed: Callable[[str, dict], bool], results: dict, missing: list) -> None:
+    """
+    Benchmark the app's routes (one lifespan). Routes that look regressed are
+    measured again after the others, up to `retries` times, keeping the best
+    run: a noisy neighbour rarely slows the same route twice.
+    """
+    app, pipeline = load_app(name)
+    selected = []
+    for method, path in routes(app):
+        key = f"{name} {method} {path}"
+        if only and only not in key:
+            continue
+        if (method, path) not in SPECS:
+            missing.append(key)
+        else:
+            selected.append((key, method, path))
+    if not selected:
+        return
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for attempt in range(retries + 1):
+                for key, method, path in selected:
+                    result = await bench_route(client, method, path, SPECS[(method, path)], target, rounds)
+                    # Let the contact writer catch up: its flushes must not be
+                    # billed to the next route.
+                    await asyncio.wait_for(pipeline.queue.join(), 30)
+                    if key not in results or result["ops"] > results[key]["ops"]:
+                        results[key] = result
+                    print(f"  {key:<36}{results[key]['ops']:>10.0f} ops/s{' (retry)' if attempt else ''}", flush=True)
+                selected = [item for item in selected if regressed(item[0], results[item[0]])]
+                if not selected:
+                    break
+
+
+# ---------- Baseline ----------
+def is_regression(res: dict, base: dict, scale: float, tolerance: float) -> bool:
+    slower = res["ops"] < base["ops"] * scale * (1 - tolerance)
+    bigger = res["alloc_kib"] > base["alloc_kib"] * (1 + tolerance) + ALLOC_SLACK_KIB
+    return slower or bigger
+
+
+def compare(results: dict, baseline: dict, scale: float, tolerance: float) -> List[Tuple[str, dict, Optional[dict], str]]:
+    """(key, result, baseline entry or None, verdict) rows; verdict is ok, new or REGRESSION."""
+    rows = []
+    for key, res in results.items():
+        base = baseline.get("results", {}).get(key)
+        if base is None:
+            rows.append((key, res, None, "new"))
+        else:
+            rows.append((key, res, base, "REGRESSION" if is_regression(res, base, scale, tolerance) else "ok"))
+    return rows
+
+
+def print_report(rows, scale: float) -> None:
+    print(f"\n{'route':<36}{'ops/s':>9}{'vs base':>9}{'p50 µs':>9}{'p99 µs':>9}{'KiB/req':>9}{'vs base':>9}  verdict")
+    for key, res, base, verdict in rows:
+        ops_delta = alloc_delta = ""
+        if base is not None:
+            ops_delta = f"{res['ops'] / (base['ops'] * scale) - 1:+.0%}"
+            alloc_delta = f"{res['alloc_kib'] - base['alloc_kib']:+.1f}"
+        print(f"{key:<36}{res['ops']:>9.0f}{ops_delta:>9}{res['p50_us']:>9.1f}{res['p99_us']:>9.1f}"
+              f"{res['alloc_kib']:>9.1f}{alloc_delta:>9}  {verdict}")
+    print(f"(baseline ops/s scaled by {scale:.2f} for this machine)")
+
+
+def python_mismatch(baseline: dict, current: str = platform.python_version()) -> Optional[str]:
+    """Why `baseline` cannot be compared on this interpreter, or None."""
+    recorded = baseline.get("python")
+    if not recorded or recorded.split(".")[:2] == current.split(".")[:2]:
+        return None
+    return (f"baseline was recorded on Python {recorded}, this is {current}: per-route costs differ "
+            f"between interpreter versions; re-record it (--update-baseline) on the CI interpreter")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--apps", default="main,backend", help="comma-separated: main, backend")
+    parser.add_argument("--only", help="only routes whose 'app METHOD /path' contains this")
+    parser.add_argument("--target", type=float, default=0.1, help="seconds per round and route")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--retries", type=int, default=2, help="re-measure routes that look regressed")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown / memory growth")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--update-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--json", help="also write the results here")
+    parser.add_argument("--any-python", action="store_true",
+                        help="compare even if the baseline comes from another Python major.minor")
+    args = parser.parse_args(argv)
+
+    baseline: dict = {}
+    if not args.update_baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    mismatch = python_mismatch(baseline)
+    if mismatch:
+        print(("warning: " if args.any_python else "error: ") + mismatch, file=sys.stderr)
+        if not args.any_python:
+            return 2
+    started = time.perf_counter()
+    reference = reference_score()
+    scale = reference / baseline["reference"] if baseline.get("reference") else 1.0
+
+    def regressed(key: str, res: dict) -> bool:
+        base = baseline.get("results", {}).get(key)
+        return base is not None and is_regression(res, base, scale, args.tolerance)
+
+    results: Dict[str, dict] = {}
+    missing: List[str] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        configure(tmp)
+        for name in args.apps.split(","):
+            print(f"{name}:", flush=True)
+            asyncio.run(bench_app(name.strip(), args.only, args.target, args.rounds, args.retries,
+                                  regressed, results, missing))
+    print(f"\n{len(results)} routes in {time.perf_counter() - started:.0f}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"reference": reference, "results": results}, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "reference": round(reference, 1), "results": results}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"baseline written to {os.path.relpath(args.baseline, ROOT)}")
+        return 0
+
+    rows = compare(results, baseline, scale, args.tolerance)
+    print_report(rows, scale)
+    failed = [key for key, _, _, verdict in rows if verdict == "REGRESSION"]
+    for key in missing:
+        print(f"no request spec for {key}: add it to SPECS")
+    if failed:
+        print(f"{len(failed)} regression(s) beyond {args.tolerance:.0%}: {', '.join(failed)}")
+    return 1 if failed or missing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
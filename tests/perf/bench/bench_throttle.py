@@ -0,0 +1,89 @@
+# tests/perf/bench/bench_throttle.py
+"""
+Login throttle (app.throttle) under a credential-stuffing flood.
+
+  1. LoginThrottle with default settings: N distinct usernames from N
+     distinct IPs each fail once (record_failure) and are checked
+     (retry_after). Reports the per-call cost and the process RSS, which
+     must stay flat however large N gets.
+  2. For comparison, the naive per-key dict of deques of timestamps with
+     min(N, NAIVE_CAP) keys.
+
+Run (10M keys takes a few minutes):
+  python tests/perf/bench/bench_throttle.py [N]
+"""
+import gc
+import sys
+import time
+from collections import defaultdict, deque
+
+import _harness  # noqa: F401  (puts the repo root on sys.path)
+
+from app.settings import Settings
+from app.throttle import LoginThrottle
+
+NAIVE_CAP = 1_000_000
+
+
+def rss_mib() -> float:
+    """Current resident set size (Linux /proc; falls back to peak RSS)."""
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench_sketch(n: int) -> None:
+    throttle = LoginThrottle(Settings())
+    base = rss_mib()
+    print(f"\nLoginThrottle, {n:,} distinct username/IP pairs "
+          f"(sketches {throttle.stats()['memory_bytes'] / 2**20:.1f} MiB)")
+    print(f"{'keys':>12}{'record µs':>12}{'check µs':>12}{'RSS MiB':>10}{'Δ RSS':>9}")
+    record, check = throttle.record_failure, throttle.retry_after
+    step = max(1, n // 5)
+    done = 0
+    while done < n:
+        batch = range(done, min(n, done + step))
+        t0 = time.perf_counter()
+        for i in batch:
+            record(f"user{i}", f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}")
+        t1 = time.perf_counter()
+        for i in batch:
+            check(f"user{i}", f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}")
+        t2 = time.perf_counter()
+        done = batch.stop
+        rss = rss_mib()
+        print(f"{done:>12,}{(t1 - t0) / len(batch) * 1e6:>12.2f}{(t2 - t1) / len(batch) * 1e6:>12.2f}"
+              f"{rss:>10.1f}{rss - base:>9.1f}")
+    stats = throttle.stats()
+    print(f"throttled {stats['throttled']:,} of {n:,} checks; {stats['saturated_checks']:,} skipped a saturated "
+          f"sketch (fill: users {stats['user_fill_ratio']:.2f}, IPs {stats['ip_fill_ratio']:.2f})")
+
+
+def bench_naive(n: int) -> None:
+    gc.collect()
+    base = rss_mib()
+    failures = defaultdict(deque)
+    t0 = time.perf_counter()
+    now = time.monotonic()
+    for i in range(n):
+        failures[f"u\0user{i}"].append(now)
+        failures[f"i\0ip{i}"].append(now)
+    elapsed = time.perf_counter() - t0
+    print(f"\nnaive dict of deques, {n:,} pairs: {elapsed / n * 1e6:.2f} µs/record, "
+          f"+{rss_mib() - base:.1f} MiB RSS (grows linearly with keys)")
+
+
+def main(n: int = 10_000_000) -> None:
+    bench_sketch(n)
+    bench_naive(min(n, NAIVE_CAP))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000)
@@ -0,0 +1,38 @@
+# tests/perf/bench/bench_timing.py
+"""
+Cost of the Server-Timing / X-Request-ID instrumentation (QA_TIMING_ENABLED)
+on /api/login, /api/contact and /health, each variant built with
+create_app(Settings(timing_enabled=...)). Off must be indistinguishable from
+an app without the feature (no middleware, plain routes).
+
+Run:
+  python tests/perf/bench/bench_timing.py [N]
+"""
+import sys
+
+from _harness import measure, print_table
+
+from app.main import create_app
+from app.settings import Settings
+
+ENDPOINTS = [
+    ("POST", "/api/login", {"json": {"username": "admin", "password": "1234"}}),
+    ("POST", "/api/contact", {"json": {"name": "Eddie", "email": "a@b.com", "message": "Hello from QA site!"}}),
+    ("GET", "/health", {}),
+]
+
+
+def main(n: int = 3000) -> None:
+    apps = {
+        "timing off": create_app(Settings(timing_enabled=False)),
+        "timing on": create_app(Settings(timing_enabled=True, timing_slow_ms=1e9)),
+    }
+    rows = []
+    for method, path, kwargs in ENDPOINTS:
+        for label, app in apps.items():
+            rows.append((label, f"{method} {path}", measure(app, method, path, n, **kwargs)))
+    print_table(f"request timing ({n} sequential requests each)", rows)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3000)
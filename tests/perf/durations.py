@@ -0,0 +1,17 @@
+# tests/perf/durations.py
+"""
+k6-style durations ("90s", "15m", "1h30m"), shared by the locust shapes and
+the results store. No third-party imports, so either side can load it.
+"""
+import re
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def parse_duration(value: str) -> float:
+    """k6-style duration -> seconds; ValueError for anything else."""
+    parts = _DURATION.findall(value)
+    if not parts or "".join(n + u for n, u in parts) != value:
+        raise ValueError(f"invalid duration {value!r} (e.g. 30s, 15m, 1h30m)")
+    return sum(float(n) * _UNITS[u] for n, u in parts)
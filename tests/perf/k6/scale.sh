@@ -0,0 +1,34 @@
+#!/usr/bin/env bash
+# Worker scaling check: run baseline.js against `python -m app` with 1, 2, 4...
+# workers and print requests/s for each. Requires k6 on PATH.
+#
+#   ./tests/perf/k6/scale.sh            # workers: 1 2 4
+#   WORKERS="1 2 4 8" VUS=200 ./tests/perf/k6/scale.sh
+set -euo pipefail
+
+PORT="${PORT:-8000}"
+WORKERS="${WORKERS:-1 2 4}"
+VUS="${VUS:-100}"
+DURATION="${DURATION:-30s}"
+HERE="$(cd "$(dirname "$0")" && pwd)"
+ROOT="$(cd "$HERE/../../.." && pwd)"
+OUT="$(mktemp -d)"
+
+for n in $WORKERS; do
+  (cd "$ROOT" && QA_WORKERS="$n" QA_PORT="$PORT" QA_CONTACT_DB_PATH="$OUT/contacts-$n.db" \
+     python -m app >"$OUT/server-$n.log" 2>&1) &
+  server=$!
+  for _ in $(seq 1 30); do curl -fsS "http://127.0.0.1:$PORT/health" >/dev/null 2>&1 && break; sleep 1; done
+
+  k6 run --quiet --summary-export "$OUT/summary-$n.json" \
+    -e BASE_URL="http://127.0.0.1:$PORT" -e VUS="$VUS" -e DURATION="$DURATION" -e PACING=0 \
+    "$HERE/baseline.js" >/dev/null || true
+
+  kill -TERM "$server"; wait "$server" || true
+  python - "$n" "$OUT/summary-$n.json" <<'PY'
+import json, sys
+m = json.load(open(sys.argv[2]))["metrics"]
+print(f"workers={sys.argv[1]:>3}  req/s={m['http_reqs']['rate']:>9.1f}  "
+      f"p95={m['http_req_duration']['p(95)']:.1f}ms")
+PY
+done
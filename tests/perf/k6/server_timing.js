@@ -0,0 +1,22 @@
+// Per-stage server timings from the Server-Timing header (QA_TIMING_ENABLED=1).
+// Each stage becomes a Trend named server_<stage> (ms), tagged like the request.
+import { Trend } from 'k6/metrics';
+
+const STAGES = ['mw', 'mw_in', 'recv', 'parse', 'validate', 'handler', 'serialize', 'mw_out', 'total'];
+const trends = {};
+for (const stage of STAGES) {
+  trends[stage] = new Trend(`server_${stage}`, true);
+}
+
+export function recordServerTiming(res, tags) {
+  const header = res.headers['Server-Timing'];
+  if (!header) {
+    return;
+  }
+  for (const part of header.split(',')) {
+    const [stage, dur] = part.trim().split(';dur=');
+    if (trends[stage] && dur !== undefined) {
+      trends[stage].add(Number(dur), tags);
+    }
+  }
+}
@@ -9,7 +9,7 @@ export const options = {
     'http_req_duration{name:contact}': ['p(95)<500'],
     'http_req_failed': ['rate<0.01'],
   },
-  summaryTrendStats: ['avg', 'min', 'med', 'p(90)', 'p(95)', 'max'],
+  summaryTrendStats: ['avg', 'min', 'med', 'p(90)', 'p(95)', 'p(99)', 'max'],
 };
 
 const BASE_URL = __ENV.BASE_URL || 'http://host.docker.internal:8000';
@@ -2,6 +2,14 @@
 // Comments in English (as requested).
 import http from 'k6/http';
 import { check, group, sleep } from 'k6';
+import { Rate, Trend } from 'k6/metrics';
+
+// The server sheds load with a fast 503 + Retry-After (app/shedding.py).
+// A shed request is not a failure; what must stay bounded is the latency
+// of the requests that were admitted.
+http.setResponseCallback(http.expectedStatuses(200, 503));
+const admitted = new Trend('admitted_duration', true);
+const shed = new Rate('shed');
 
 export const options = {
   stages: [
@@ -11,16 +19,23 @@ export const options = {
     { duration: '20s', target: 10 },   // short steady tail to observe recovery
   ],
   thresholds: {
-    'http_req_duration{name:login}': ['p(95)<500'],
-    'http_req_duration{name:contact}': ['p(95)<500'],
-    'http_req_failed': ['rate<0.01'],
+    'admitted_duration{name:login}': ['p(95)<500', 'p(99)<1000'],
+    'admitted_duration{name:contact}': ['p(95)<500', 'p(99)<1000'],
+    'http_req_failed': ['rate<0.01'],  // anything but 200/503
   },
-  summaryTrendStats: ['avg', 'min', 'med', 'p(90)', 'p(95)', 'max'],
+  summaryTrendStats: ['avg', 'min', 'med', 'p(90)', 'p(95)', 'p(99)', 'max'],
   gracefulStop: '0s', // end immediately after last stage
 };
 
 const BASE_URL = __ENV.BASE_URL || 'http://host.docker.internal:8000';
 
+function record(res, name) {
+  shed.add(res.status === 503, { name });
+  if (res.status === 200) {
+    admitted.add(res.timings.duration, { name });
+  }
+}
+
 export default function () {
   const headers = { 'Content-Type': 'application/json' };
 
@@ -30,7 +45,8 @@ export default function () {
       JSON.stringify({ username: 'admin', password: '1234' }),
       { headers, tags: { name: 'login' } }
     );
-    check(res, { 'status is 200': (r) => r.status === 200 });
+    record(res, 'login');
+    check(res, { 'status is 200 or shed': (r) => r.status === 200 || r.status === 503 });
   });
 
   group('contact', () => {
@@ -39,7 +55,8 @@ export default function () {
       JSON.stringify({ name: 'Eddie', email: 'a@b.com', message: 'Hello from QA site!' }),
       { headers, tags: { name: 'contact' } }
     );
-    check(res, { 'status is 200': (r) => r.status === 200 });
+    record(res, 'contact');
+    check(res, { 'status is 200 or shed': (r) => r.status === 200 || r.status === 503 });
   });
 
   // Short pacing so spike is mostly about concurrency.
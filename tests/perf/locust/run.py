@@ -0,0 +1,76 @@
+# tests/perf/locust/run.py
+"""
+Multi-process locust launcher: one headless master plus N local workers,
+so a single box can generate many thousands of requests/s (one locust
+process saturates one core). The master merges the workers' stats into one
+report / --csv set, exactly like a distributed run.
+
+  python tests/perf/locust/run.py --shape stress --processes 4 --host http://127.0.0.1:8000
+  python tests/perf/locust/run.py --processes 8 --csv out/run -- -u 2000 -r 200 -t 1m
+
+--shape picks a k6 profile from shapes.py (LOAD_SHAPE); without it, pass
+-u/-r/-t after "--". Anything after "--" goes to the master unchanged.
+"""
+import argparse
+import os
+import signal
+import subprocess
+import sys
+from typing import List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+LOCUSTFILE = os.path.join(HERE, "locustfile.py")
+
+
+def master_cmd(args: argparse.Namespace, extra: List[str]) -> List[str]:
+    cmd = [
+        sys.executable, "-m", "locust", "-f", LOCUSTFILE, "--master", "--headless",
+        "--expect-workers", str(args.processes), "--master-bind-host", "127.0.0.1",
+        "--master-bind-port", str(args.port), "--host", args.host,
+    ]
+    if args.csv:
+        cmd += ["--csv", args.csv, "--csv-full-history"]
+    return cmd + extra
+
+
+def worker_cmd(args: argparse.Namespace) -> List[str]:
+    return [
+        sys.executable, "-m", "locust", "-f", LOCUSTFILE, "--worker",
+        "--master-host", "127.0.0.1", "--master-port", str(args.port),
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    extra: List[str] = []
+    if "--" in argv:
+        at = argv.index("--")
+        argv, extra = argv[:at], argv[at + 1:]
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="worker processes")
+    parser.add_argument("--shape", help="baseline, stress, spike or soak (see shapes.py)")
+    parser.add_argument("--host", default=os.environ.get("BASE_URL", "http://127.0.0.1:8000"))
+    parser.add_argument("--csv", help="CSV prefix for the merged stats (e.g. tests/perf/locust/run)")
+    parser.add_argument("--port", type=int, default=5557, help="master <-> worker port")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ)
+    if args.shape:
+        env["LOAD_SHAPE"] = args.shape
+    master = subprocess.Popen(master_cmd(args, extra), env=env)
+    workers = [subprocess.Popen(worker_cmd(args), env=env) for _ in range(args.processes)]
+    try:
+        code = master.wait()
+    except KeyboardInterrupt:
+        master.send_signal(signal.SIGINT)  # master stops the workers and prints the final stats
+        code = master.wait()
+    for worker in workers:
+        try:
+            worker.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            worker.kill()
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
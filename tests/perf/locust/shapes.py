@@ -0,0 +1,99 @@
+# tests/perf/locust/shapes.py
+"""
+Locust load shapes matching the k6 profiles in tests/perf/k6/.
+
+  baseline   constant VUS (20) for DURATION (2m), PACING (1 s) between iterations
+  stress     ramp 10 -> 50 -> 100 -> 200 -> 300 -> 0 users, one minute per stage
+  spike      10 -> 100 -> 10 users in 10 s steps plus a 20 s tail; 503 = shed
+  soak       20 users for 12 hours
+
+Stages ramp linearly to their target like k6 `stages` (spawn rate = change /
+stage duration). The locustfile exposes the one picked with LOAD_SHAPE, so
+locust runs it instead of -u/-r/-t. VUS, DURATION and PACING override the
+defaults as they do for the k6 scripts.
+"""
+import os
+import sys
+from typing import Dict, List, Optional, Tuple, Type
+
+from locust import LoadTestShape
+
+PERF_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PERF_DIR not in sys.path:
+    sys.path.insert(0, PERF_DIR)
+
+from durations import parse_duration  # noqa: E402
+
+
+class StagedShape(LoadTestShape):
+    """k6 `stages`: each (seconds, target users) ramps linearly from the previous target."""
+
+    abstract = True
+    stages: List[Tuple[float, int]] = []
+    pacing = 1.0       # seconds each user waits between tasks (k6 sleep())
+    shed_ok = False    # treat 503 (load shedding) as an expected outcome
+
+    def tick(self) -> Optional[Tuple[int, float]]:
+        run_time = self.get_run_time()
+        elapsed, previous = 0.0, 0
+        for duration, target in self.stages:
+            if run_time < elapsed + duration:
+                # Flat stages (rate 0) get 1 user/s so they still settle.
+                return target, abs(target - previous) / duration or 1.0
+            elapsed += duration
+            previous = target
+        return None  # done: locust stops the run
+
+
+class ConstantShape(StagedShape):
+    """k6 `vus` + `duration`: every user started at once, held until the end."""
+
+    abstract = True
+    users = 20
+    duration = 120.0
+
+    def tick(self) -> Optional[Tuple[int, float]]:
+        if self.get_run_time() < self.duration:
+            return self.users, float(self.users)
+        return None
+
+
+class BaselineShape(ConstantShape):
+    users = int(os.environ.get("VUS", 20))
+    duration = parse_duration(os.environ.get("DURATION", "2m"))
+    pacing = float(os.environ.get("PACING", 1.0))
+
+
+class StressShape(StagedShape):
+    stages = [(60, 10), (60, 50), (60, 100), (60, 200), (60, 300), (60, 0)]
+    pacing = float(os.environ.get("PACING", 0.2))
+
+
+class SpikeShape(StagedShape):
+    stages = [(10, 10), (10, 100), (10, 10), (20, 10)]
+    pacing = float(os.environ.get("PACING", 0.2))
+    shed_ok = True
+
+
+class SoakShape(ConstantShape):
+    users = int(os.environ.get("VUS", 20))
+    duration = parse_duration(os.environ.get("DURATION", "12h"))
+    pacing = float(os.environ.get("PACING", 1.0))
+
+
+SHAPES: Dict[str, Type[StagedShape]] = {
+    "baseline": BaselineShape,
+    "stress": StressShape,
+    "spike": SpikeShape,
+    "soak": SoakShape,
+}
+
+
+def selected(name: Optional[str]) -> Optional[Type[StagedShape]]:
+    """Shape class for LOAD_SHAPE; None (empty) = plain -u/-r/-t run."""
+    if not name:
+        return None
+    try:
+        return SHAPES[name]
+    except KeyError:
+        raise SystemExit(f"unknown LOAD_SHAPE {name!r}; pick one of {', '.join(SHAPES)}") from None
@@ -0,0 +1,269 @@
+# tests/perf/replay.py
+"""
+Replays a traffic capture (QA_CAPTURE_ENABLED=1, app/capture.py) against a
+server or straight into an app, keeping the recorded inter-arrival times.
+
+  python tests/perf/replay.py data/capture/requests.jsonl --target http://127.0.0.1:8000
+  python tests/perf/replay.py capture.jsonl --target http://127.0.0.1:8000 --speed 10   # 10x faster
+  python tests/perf/replay.py capture.jsonl --app backend.app:app --speed 0            # in-process, no pauses
+  python tests/perf/replay.py capture.jsonl --target ... --fill password=1234          # refill a redacted field
+
+The file is read line by line; each request is sent when its offset from
+the first one (divided by --speed) comes up. At most --concurrency requests
+are in flight over one pooled client; when they are all busy the reader
+waits, and how late requests went out is reported as schedule lag.
+Entries whose body was withheld by the capture (truncated or not
+redactable) are not sent; they are counted as not replayable.
+Prints request count, errors (transport errors and 5xx) and latency
+percentiles per endpoint.
+"""
+import argparse
+import asyncio
+import base64
+import contextlib
+import importlib
+import inspect
+import json
+import os
+import sys
+import time
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qsl, quote_plus, urlencode
+
+import httpx
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.capture import REDACTED  # noqa: E402
+
+# Set by the client for the new connection, not copied from the capture.
+SKIP_HEADERS = frozenset({"host", "content-length", "connection", "keep-alive", "transfer-encoding", "upgrade"})
+# How a redacted value looks inside a captured form body.
+FORM_REDACTED = quote_plus(REDACTED)
+
+
+def read_entries(path: str) -> Iterator[dict]:
+    """Captured requests, one JSON object per line (blank or broken lines skipped)."""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+def percentile(ordered, pct: float) -> float:
+    """Nearest-rank percentile (0-100) of a sorted sequence."""
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, int(len(ordered) * pct / 100 + 0.5) - 1))]
+
+
+class Report:
+    """Per-endpoint latencies (ms, compact arrays), status counts and schedule lag."""
+
+    def __init__(self) -> None:
+        self.latency: Dict[str, array] = {}
+        self.errors: Dict[str, int] = {}
+        self.mismatched: Dict[str, int] = {}
+        self.unreplayable: Dict[str, int] = {}
+        self.lag = array("d")
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    def add(self, endpoint: str, ms: float, status: int, captured: Optional[int]) -> None:
+        self.latency.setdefault(endpoint, array("d")).append(ms)
+        if status == 0 or status >= 500:
+            self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+        if captured is not None and status != captured:
+            self.mismatched[endpoint] = self.mismatched.get(endpoint, 0) + 1
+
+    def skip(self, endpoint: str) -> None:
+        self.unreplayable[endpoint] = self.unreplayable.get(endpoint, 0) + 1
+
+    @property
+    def requests(self) -> int:
+        return sum(len(v) for v in self.latency.values())
+
+    def summary(self) -> dict:
+        endpoints = {}
+        for endpoint, values in sorted(self.latency.items()):
+            ordered = sorted(values)
+            endpoints[endpoint] = {
+                "requests": len(ordered),
+                "errors": self.errors.get(endpoint, 0),
+                "status_mismatch": self.mismatched.get(endpoint, 0),
+                "p50_ms": percentile(ordered, 50),
+                "p95_ms": percentile(ordered, 95),
+                "p99_ms": percentile(ordered, 99),
+                "max_ms": ordered[-1],
+            }
+        lag = sorted(self.lag)
+        return {
+            "requests": self.requests,
+            "not_replayable": sum(self.unreplayable.values()),
+            "not_replayable_by_endpoint": dict(sorted(self.unreplayable.items())),
+            "elapsed_s": self.elapsed,
+            "rps": self.requests / self.elapsed if self.elapsed else 0.0,
+            "lag_p99_ms": percentile(lag, 99),
+            "lag_max_ms": lag[-1] if lag else 0.0,
+            "endpoints": endpoints,
+        }
+
+
+def _fill(value: Any, fill: Dict[str, str]) -> Any:
+    if isinstance(value, dict):
+        return {k: fill[k] if v == REDACTED and k in fill else _fill(v, fill) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_fill(v, fill) for v in value]
+    return value
+
+
+def _fill_text(text: str, fill: Dict[str, str]) -> str:
+    """Redacted fields of a JSON or form body replaced by their --fill value."""
+    with contextlib.suppress(ValueError):
+        return json.dumps(_fill(json.loads(text), fill), separators=(",", ":"))
+    try:
+        pairs = parse_qsl(text, keep_blank_values=True, strict_parsing=True)
+    except ValueError:
+        return text
+    return urlencode([(k, fill[k] if v == REDACTED and k in fill else v) for k, v in pairs])
+
+
+def replayable(entry: dict) -> bool:
+    """False when the capture withheld (or cut) the body: sending it would not be the same request."""
+    return "body_bytes" not in entry and not entry.get("truncated")
+
+
+def build_request(entry: dict, fill: Dict[str, str]) -> Tuple[str, str, Dict[str, str], bytes]:
+    """(method, url, headers, body) for one captured entry."""
+    url = entry["path"] + ("?" + entry["query"] if entry.get("query") else "")
+    headers = {k: v for k, v in entry.get("headers", {}).items() if k not in SKIP_HEADERS}
+    if "body_b64" in entry:
+        return entry["method"], url, headers, base64.b64decode(entry["body_b64"])
+    text = entry.get("body", "")
+    if fill and (REDACTED in text or FORM_REDACTED in text):
+        text = _fill_text(text, fill)
+    body = text.encode("utf-8")
+    return entry["method"], url, headers, body
+
+
+async def replay(
+    entries: Iterator[dict],
+    client: httpx.AsyncClient,
+    speed: float = 1.0,
+    concurrency: int = 256,
+    fill: Optional[Dict[str, str]] = None,
+) -> Report:
+    """
+    Send every entry at its recorded offset / speed (speed <= 0: no pauses).
+    The reader stops pulling entries while `concurrency` requests are in flight.
+    """
+    fill = fill or {}
+    report = Report()
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(concurrency)
+    pending: set = set()
+    start = loop.time()
+    first: Optional[float] = None
+
+    async def send(entry: dict) -> None:
+        method, url, headers, body = build_request(entry, fill)
+        endpoint = f"{method} {entry['path']}"
+        t0 = time.perf_counter()
+        try:
+            response = await client.request(method, url, headers=headers, content=body)
+            status = response.status_code
+        except httpx.HTTPError:
+            status = 0
+        finally:
+            slots.release()
+        report.add(endpoint, (time.perf_counter() - t0) * 1000, status, entry.get("status"))
+
+    for entry in entries:
+        if first is None:
+            first = entry["ts"]
+        if not replayable(entry):
+            report.skip(f"{entry['method']} {entry['path']}")
+            continue
+        due = start + (entry["ts"] - first) / speed if speed > 0 else loop.time()
+        delay = due - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await slots.acquire()
+        report.lag.append(max(0.0, loop.time() - due) * 1000)
+        task = loop.create_task(send(entry))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+    if pending:
+        await asyncio.gather(*pending)
+    report.elapsed = time.perf_counter() - report.started
+    return report
+
+
+def load_app(target: str):
+    """Import "module:attr"; a function (factory) is called to build the app."""
+    module, _, attr = target.partition(":")
+    obj = getattr(importlib.import_module(module), attr or "app")
+    return obj() if inspect.isfunction(obj) else obj
+
+
+async def run(args: argparse.Namespace) -> Report:
+    fill = dict(item.split("=", 1) for item in args.fill)
+    entries = read_entries(args.file)
+    if args.app:
+        app = load_app(args.app)
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://replay") as client:
+                return await replay(entries, client, args.speed, args.concurrency, fill)
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.target, limits=limits, timeout=args.timeout) as client:
+        return await replay(entries, client, args.speed, args.concurrency, fill)
+
+
+def print_report(summary: dict) -> None:
+    print(f"{summary['requests']} requests in {summary['elapsed_s']:.1f} s ({summary['rps']:.0f}/s), "
+          f"schedule lag p99 {summary['lag_p99_ms']:.1f} ms, max {summary['lag_max_ms']:.1f} ms")
+    if summary["not_replayable"]:
+        skipped = ", ".join(f"{k} {v}" for k, v in summary["not_replayable_by_endpoint"].items())
+        print(f"{summary['not_replayable']} not replayable (body withheld by the capture): {skipped}")
+    print(f"{'endpoint':<36} {'reqs':>8} {'errors':>7} {'status≠':>8} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'max ms':>8}")
+    for endpoint, s in summary["endpoints"].items():
+        print(f"{endpoint:<36} {s['requests']:>8} {s['errors']:>7} {s['status_mismatch']:>8} {s['p50_ms']:>8.2f} "
+              f"{s['p95_ms']:>8.2f} {s['p99_ms']:>8.2f} {s['max_ms']:>8.2f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("file", help="capture file (QA_CAPTURE_FILE)")
+    where = parser.add_mutually_exclusive_group(required=True)
+    where.add_argument("--target", help="base URL, e.g. http://127.0.0.1:8000")
+    where.add_argument("--app", help='"module:attr" served in-process, e.g. app.main:create_app')
+    parser.add_argument("--speed", type=float, default=1.0, help="time scale: 2 = twice as fast, 0 = no pauses")
+    parser.add_argument("--concurrency", type=int, default=256, help="max requests in flight")
+    parser.add_argument("--timeout", type=float, default=30.0, help="per-request timeout (--target)")
+    parser.add_argument("--fill", action="append", default=[], metavar="FIELD=VALUE",
+                        help="value for a redacted JSON or form field (repeatable)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+    if any("=" not in item for item in args.fill):
+        parser.error("--fill takes FIELD=VALUE")
+
+    summary = asyncio.run(run(args)).summary()
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_report(summary)
+    return 0 if summary["requests"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,562 @@
+# tests/perf/results.py
+"""
+Load-test results store: locust and k6 output in one SQLite file, compared
+run to run.
+
+  python tests/perf/results.py ingest stress-0817 tests/perf/locust/run_stats.csv tests/perf/locust/run_stats_history.csv
+  python tests/perf/results.py ingest soak-0817 tests/perf/k6/soak-summary.json soak-points.csv
+  python tests/perf/results.py runs
+  python tests/perf/results.py compare stress-0810 stress-0817       # exit 1 on a regression
+  python tests/perf/results.py trend soak-0817 --window 30m          # windowed percentiles + drift
+
+Accepted files (detected from the header / extension):
+  locust  --csv X        X_stats.csv (totals) and X_stats_history.csv (--csv-full-history)
+  k6      --summary-export / handleSummary JSON (totals)
+  k6      --out csv=FILE raw points, folded into 10 s samples like locust's history
+
+Files are read row by row and inserted through generators, so a 12 h soak
+history costs no more memory than a 2 min run. Endpoint names are normalized
+("login" from a k6 name tag == "/api/login" from locust); totals are kept as
+"Aggregated".
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import re
+import sqlite3
+import sys
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from durations import parse_duration  # tests/perf/durations.py, next to this file
+
+DEFAULT_DB = os.path.join("data", "perf-results.db")
+AGGREGATED = "Aggregated"
+SAMPLE_SECONDS = 10.0  # k6 raw points -> one sample per endpoint per 10 s (locust's percentile window)
+
+# k6 scripts tag requests with short names; locust reports the path.
+ENDPOINT_ALIASES = {
+    "login": "/api/login",
+    "contact": "/api/contact",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id      TEXT PRIMARY KEY,
+    tool        TEXT NOT NULL,
+    ingested_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS endpoint_stats (
+    run_id   TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    requests INTEGER NOT NULL,
+    failures INTEGER NOT NULL,
+    rps      REAL,
+    avg_ms   REAL,
+    p50_ms   REAL,
+    p95_ms   REAL,
+    p99_ms   REAL,
+    max_ms   REAL,
+    PRIMARY KEY (run_id, endpoint)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS samples (
+    run_id   TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    ts       REAL NOT NULL,
+    users    INTEGER,
+    requests INTEGER NOT NULL,
+    failures INTEGER NOT NULL,
+    p50_ms   REAL,
+    p95_ms   REAL,
+    p99_ms   REAL,
+    PRIMARY KEY (run_id, endpoint, ts)
+) WITHOUT ROWID;
+"""
+
+StatsRow = Tuple[str, int, int, Optional[float], Optional[float], Optional[float],
+                 Optional[float], Optional[float], Optional[float]]
+SampleRow = Tuple[str, float, Optional[int], int, int, Optional[float], Optional[float], Optional[float]]
+
+
+def normalize(name: str) -> str:
+    """Endpoint key shared by both tools: "login" -> "/api/login"; "Aggregated" stays."""
+    name = name.strip()
+    base, sep, suffix = name.partition(" [")  # "/api/login [shed]", "/api/login [handler]"
+    return ENDPOINT_ALIASES.get(base, base) + sep + suffix
+
+
+def _num(value: Optional[str]) -> Optional[float]:
+    if value in (None, "", "N/A"):
+        return None
+    return float(value)
+
+
+def duration_arg(value: str) -> float:
+    """argparse type for parse_duration()."""
+    try:
+        return parse_duration(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc)) from None
+
+
+# ---------- parsers ----------
+def locust_stats(reader: Iterable[Dict[str, str]]) -> Iterator[StatsRow]:
+    for row in reader:
+        yield (
+            normalize(row["Name"]), int(row["Request Count"]), int(row["Failure Count"]),
+            _num(row["Requests/s"]), _num(row["Average Response Time"]), _num(row["50%"]),
+            _num(row["95%"]), _num(row["99%"]), _num(row["Max Response Time"]),
+        )
+
+
+def locust_history(reader: Iterable[Dict[str, str]]) -> Iterator[SampleRow]:
+    """
+    One row per endpoint per second; percentiles cover locust's sliding window.
+    Cumulative totals become per-row deltas.
+    """
+    totals: Dict[str, Tuple[int, int]] = {}
+    for row in reader:
+        endpoint = normalize(row["Name"])
+        requests, failures = int(row["Total Request Count"]), int(row["Total Failure Count"])
+        before_requests, before_failures = totals.get(endpoint, (0, 0))
+        totals[endpoint] = (requests, failures)
+        if row["95%"] in ("", "N/A"):
+            continue  # nothing measured yet
+        yield (
+            endpoint, float(row["Timestamp"]), int(row["User Count"]),
+            max(requests - before_requests, 0), max(failures - before_failures, 0),
+            _num(row["50%"]), _num(row["95%"]), _num(row["99%"]),
+        )
+
+
+def percentile(ordered: Sequence[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted sequence."""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))]
+
+
+def k6_points(reader: Iterable[Dict[str, str]], bucket: float = SAMPLE_SECONDS) -> Iterator[SampleRow]:
+    """
+    k6 --out csv: one line per metric point. http_req_duration / http_req_failed
+    are bucketed per endpoint; a bucket is emitted once the stream is two
+    buckets past it, so only the open buckets are held in memory.
+    """
+    open_buckets: Dict[Tuple[float, str], Tuple[List[float], List[int]]] = {}
+
+    def flush(before: float) -> Iterator[SampleRow]:
+        for key in sorted(k for k in open_buckets if k[0] < before):
+            durations, failed = open_buckets.pop(key)
+            durations.sort()
+            yield (
+                key[1], key[0], None, len(durations) or len(failed), sum(failed),
+                percentile(durations, 0.50), percentile(durations, 0.95), percentile(durations, 0.99),
+            )
+
+    newest = -math.inf
+    for row in reader:
+        metric = row["metric_name"]
+        if metric not in ("http_req_duration", "http_req_failed"):
+            continue
+        start = float(row["timestamp"]) // bucket * bucket
+        if start > newest:
+            newest = start
+            yield from flush(newest - bucket)
+        for endpoint in (AGGREGATED, normalize(row.get("name") or row.get("url") or "")):
+            durations, failed = open_buckets.setdefault((start, endpoint), ([], []))
+            if metric == "http_req_duration":
+                durations.append(float(row["metric_value"]))
+            else:
+                failed.append(int(float(row["metric_value"])))
+    yield from flush(math.inf)
+
+
+def _k6_metric(metrics: Dict[str, dict], key: str) -> Optional[dict]:
+    metric = metrics.get(key)
+    if metric is None:
+        return None
+    return metric.get("values", metric)  # handleSummary nests the numbers under "values"
+
+
+def _k6_group_checks(group: dict) -> Iterator[Tuple[str, int, int]]:
+    """(group name, checks passed, checks failed) for every nested group."""
+    groups = group.get("groups", {})
+    # --summary-export keys groups by name; handleSummary lists them.
+    for sub in groups.values() if isinstance(groups, dict) else groups:
+        name = sub["name"]
+        checks = sub.get("checks", {})
+        if isinstance(checks, dict):
+            checks = list(checks.values())
+        yield name, sum(c["passes"] for c in checks), sum(c["fails"] for c in checks)
+        yield from _k6_group_checks(sub)
+
+
+def k6_summary(summary: dict) -> Iterator[StatsRow]:
+    """
+    Totals from http_reqs / http_req_failed / http_req_duration; per endpoint
+    from http_req_duration{name:X}. Per-endpoint counts come from
+    http_reqs{name:X} when the script declares it, else from the checks of the
+    group with the same name (one checked request per group in our scripts).
+    p99 is only there if summaryTrendStats lists p(99).
+    """
+    metrics = summary["metrics"]
+    reqs = _k6_metric(metrics, "http_reqs") or {}
+    total, rate = int(reqs.get("count", 0)), reqs.get("rate") or 0.0
+    duration = total / rate if rate else None
+    groups = {name: (passes + fails, fails) for name, passes, fails in _k6_group_checks(summary.get("root_group", {}))}
+
+    def row(endpoint: str, trend: dict, requests: int, failures: int) -> StatsRow:
+        return (
+            endpoint, requests, failures, requests / duration if duration else None,
+            trend.get("avg"), trend.get("med"), trend.get("p(95)"), trend.get("p(99)"), trend.get("max"),
+        )
+
+    failed = _k6_metric(metrics, "http_req_failed") or {}
+    yield row(AGGREGATED, _k6_metric(metrics, "http_req_duration") or {}, total,
+              round(failed.get("value", failed.get("rate", 0.0)) * total))
+    for key in metrics:
+        match = re.fullmatch(r"http_req_duration\{name:(.+)\}", key)
+        if not match:
+            continue
+        name = match.group(1)
+        counted = _k6_metric(metrics, f"http_reqs{{name:{name}}}")
+        if counted is not None:
+            requests = int(counted["count"])
+            rate_failed = (_k6_metric(metrics, f"http_req_failed{{name:{name}}}") or {}).get("value", 0.0)
+            failures = round(rate_failed * requests)
+        else:
+            requests, failures = groups.get(name, (0, 0))
+        yield row(normalize(name), _k6_metric(metrics, key), requests, failures)
+
+
+# ---------- store ----------
+def connect(path: str) -> sqlite3.Connection:
+    if os.path.dirname(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def detect(path: str) -> str:
+    """locust-stats, locust-history, k6-summary or k6-points."""
+    if path.endswith(".json"):
+        return "k6-summary"
+    with open(path, newline="") as f:
+        header = f.readline()
+    if header.startswith("Type,Name,"):
+        return "locust-stats"
+    if header.startswith("Timestamp,User Count,"):
+        return "locust-history"
+    if header.startswith("metric_name,timestamp,"):
+        return "k6-points"
+    raise SystemExit(f"{path}: not a locust stats/history CSV, k6 summary JSON or k6 --out csv file")
+
+
+def ingest(conn: sqlite3.Connection, run_id: str, path: str) -> Tuple[str, int]:
+    """Load one file into run_id (replacing what that kind of file loaded before)."""
+    kind = detect(path)
+    with open(path, newline="") as f, conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO runs (run_id, tool, ingested_at) VALUES (?, ?, ?)",
+            (run_id, kind.split("-")[0], time.time()),
+        )
+        if kind in ("locust-stats", "k6-summary"):
+            rows = locust_stats(csv.DictReader(f)) if kind == "locust-stats" else k6_summary(json.load(f))
+            conn.execute("DELETE FROM endpoint_stats WHERE run_id = ?", (run_id,))
+            cur = conn.executemany(
+                "INSERT OR REPLACE INTO endpoint_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                ((run_id,) + r for r in rows),
+            )
+        else:
+            rows = locust_history(csv.DictReader(f)) if kind == "locust-history" else k6_points(csv.DictReader(f))
+            conn.execute("DELETE FROM samples WHERE run_id = ?", (run_id,))
+            cur = conn.executemany(
+                "INSERT OR REPLACE INTO samples VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                ((run_id,) + r for r in rows),
+            )
+    return kind, cur.rowcount
+
+
+def endpoint_stats(conn: sqlite3.Connection, run_id: str) -> Dict[str, sqlite3.Row]:
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute("SELECT * FROM endpoint_stats WHERE run_id = ?", (run_id,)).fetchall()
+    if not rows:
+        raise SystemExit(f"run {run_id!r} has no totals (ingest its *_stats.csv or k6 summary)")
+    return {row["endpoint"]: row for row in rows}
+
+
+def sample_series(conn: sqlite3.Connection, run_id: str, endpoint: str, column: str) -> List[float]:
+    return [value for (value,) in conn.execute(
+        f"SELECT {column} FROM samples WHERE run_id = ? AND endpoint = ? AND requests > 0 AND {column} IS NOT NULL",
+        (run_id, endpoint),
+    )]
+
+
+# ---------- significance ----------
+def _upper_tail(z: float) -> float:
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def _log_choose(n: int, k: int) -> float:
+    return math.lgamma(n + 1) - math.lgamma(k + 1) - math.lgamma(n - k + 1)
+
+
+def proportion_p(fail_a: int, n_a: int, fail_b: int, n_b: int) -> Optional[float]:
+    """
+    One-sided test that b's error rate is above a's: two-proportion z-test, or
+    Fisher's exact test while either run expects fewer than 5 failures (the
+    normal approximation calls 1 failure in 100 requests significant).
+    """
+    if not n_a or not n_b:
+        return None
+    failures, total = fail_a + fail_b, n_a + n_b
+    if min(n_a, n_b) * failures / total < 5:
+        # P(b sees >= fail_b of the failures) with the margins fixed (hypergeometric tail).
+        denominator = _log_choose(total, n_b)
+        return min(1.0, sum(
+            math.exp(_log_choose(failures, x) + _log_choose(total - failures, n_b - x) - denominator)
+            for x in range(fail_b, min(failures, n_b) + 1)
+        ))
+    pooled = failures / total
+    se = math.sqrt(pooled * (1 - pooled) * (1 / n_a + 1 / n_b))
+    if se == 0:
+        return None
+    return _upper_tail((fail_b / n_b - fail_a / n_a) / se)
+
+
+def rate_drop_p(rps_a: float, n_a: int, rps_b: float, n_b: int) -> Optional[float]:
+    """One-sided test that b's request rate is below a's (Poisson counts over each run's duration)."""
+    if not n_a or not n_b:
+        return None
+    se = math.sqrt(rps_a * rps_a / n_a + rps_b * rps_b / n_b)
+    return _upper_tail((rps_a - rps_b) / se) if se else None
+
+
+def mann_whitney_p(a: Sequence[float], b: Sequence[float]) -> Optional[float]:
+    """
+    One-sided Mann-Whitney U (normal approximation, tie-corrected): P(b is
+    not stochastically larger than a). Used on the per-sample percentiles.
+    """
+    n_a, n_b = len(a), len(b)
+    if n_a < 5 or n_b < 5:
+        return None
+    ranked = sorted([(v, 0) for v in a] + [(v, 1) for v in b])
+    n = n_a + n_b
+    rank_sum_b, ties, i = 0.0, 0.0, 0
+    while i < n:
+        j = i
+        while j + 1 < n and ranked[j + 1][0] == ranked[i][0]:
+            j += 1
+        rank = (i + j) / 2 + 1
+        rank_sum_b += rank * sum(1 for k in range(i, j + 1) if ranked[k][1])
+        size = j - i + 1
+        ties += size ** 3 - size
+        i = j + 1
+    u_b = rank_sum_b - n_b * (n_b + 1) / 2
+    sigma = math.sqrt(n_a * n_b / 12 * ((n + 1) - ties / (n * (n - 1))))
+    return _upper_tail((u_b - n_a * n_b / 2) / sigma) if sigma else None
+
+
+# ---------- compare ----------
+Delta = Tuple[str, str, Optional[float], Optional[float], Optional[float], str]
+
+
+def _relative(before: Optional[float], after: Optional[float]) -> Optional[float]:
+    if before is None or after is None or before == 0:
+        return None
+    return (after - before) / before
+
+
+def compare(conn: sqlite3.Connection, base: str, new: str, args: argparse.Namespace) -> List[Delta]:
+    """
+    (endpoint, metric, base, new, p-value, verdict) for every endpoint in both
+    runs. A change is a REGRESSION when it is past the threshold in the bad
+    direction and, where a test applies, significant at --alpha. Latency
+    tests need history samples in both runs; without them the threshold
+    (and --min-ms) decides alone.
+    """
+    before, after = endpoint_stats(conn, base), endpoint_stats(conn, new)
+    deltas: List[Delta] = []
+    for endpoint in sorted(set(before) & set(after), key=lambda e: (e != AGGREGATED, e)):
+        a, b = before[endpoint], after[endpoint]
+        change = _relative(a["rps"], b["rps"])
+        p = rate_drop_p(a["rps"], a["requests"], b["rps"], b["requests"]) if change is not None else None
+        bad = change is not None and -change > args.max_rps_drop and (p is None or p < args.alpha)
+        deltas.append((endpoint, "rps", a["rps"], b["rps"], p, "REGRESSION" if bad else "ok"))
+
+        for metric in ("p95_ms", "p99_ms"):
+            if a[metric] is None or b[metric] is None:
+                deltas.append((endpoint, metric, a[metric], b[metric], None, "n/a"))
+                continue
+            change = _relative(a[metric], b[metric])
+            p = mann_whitney_p(sample_series(conn, base, endpoint, metric), sample_series(conn, new, endpoint, metric))
+            bad = (change is not None and change > args.max_latency_increase
+                   and b[metric] - a[metric] >= args.min_ms and (p is None or p < args.alpha))
+            deltas.append((endpoint, metric, a[metric], b[metric], p, "REGRESSION" if bad else "ok"))
+
+        rate_a = a["failures"] / a["requests"] if a["requests"] else 0.0
+        rate_b = b["failures"] / b["requests"] if b["requests"] else 0.0
+        p = proportion_p(a["failures"], a["requests"], b["failures"], b["requests"])
+        bad = rate_b - rate_a > args.max_error_increase and (p is None or p < args.alpha)
+        deltas.append((endpoint, "errors", rate_a, rate_b, p, "REGRESSION" if bad else "ok"))
+    return deltas
+
+
+def _fmt(metric: str, value: Optional[float]) -> str:
+    if value is None:
+        return "-"
+    return f"{value:.2%}" if metric == "errors" else f"{value:.1f}"
+
+
+def print_compare(base: str, new: str, deltas: List[Delta]) -> None:
+    print(f"{base} -> {new}")
+    print(f"{'endpoint':<28} {'metric':<7} {'base':>10} {'new':>10} {'change':>8} {'p':>7}  verdict")
+    for endpoint, metric, a, b, p, verdict in deltas:
+        change = b - a if metric == "errors" and a is not None and b is not None else _relative(a, b)
+        shown = "-" if change is None else (f"{change * 100:+.2f}pt" if metric == "errors" else f"{change:+.1%}")
+        print(f"{endpoint:<28} {metric:<7} {_fmt(metric, a):>10} {_fmt(metric, b):>10} {shown:>8} "
+              f"{'-' if p is None else f'{p:.3f}':>7}  {verdict}")
+
+
+# ---------- trend ----------
+Window = Tuple[float, int, float, Optional[float], Optional[float], Optional[float], Optional[float], Optional[float]]
+
+
+def trend(conn: sqlite3.Connection, run_id: str, endpoint: str, window: float) -> List[Window]:
+    """
+    (offset s, requests, rps, error rate, p50, p95, p99, worst p99) per window.
+    Window percentiles are the request-weighted mean of the sample
+    percentiles (approximate, but steady drift shows up the same way);
+    "worst" is the highest sample p99 in the window. Streams the samples.
+    """
+    rows = conn.execute(
+        "SELECT ts, requests, failures, p50_ms, p95_ms, p99_ms FROM samples "
+        "WHERE run_id = ? AND endpoint = ? ORDER BY ts",
+        (run_id, endpoint),
+    )
+    windows: List[Window] = []
+    start: Optional[float] = None
+    current: Optional[int] = None
+    last, step = 0.0, 0.0
+    acc = [0, 0, 0.0, 0.0, 0.0, 0, None]  # requests, failures, weighted p50/p95/p99, weight, worst p99
+
+    def close(index: int) -> None:
+        requests, failures, w50, w95, w99, weight, worst = acc
+        # The last window may be partial: rate over what it covers.
+        covered = min(window, last - (start + index * window) + step) or window
+        windows.append((
+            index * window, requests, requests / covered, failures / requests if requests else None,
+            w50 / weight if weight else None, w95 / weight if weight else None,
+            w99 / weight if weight else None, worst,
+        ))
+
+    for ts, requests, failures, p50, p95, p99 in rows:
+        if start is None:
+            start = ts
+        step, last = ts - last if current is not None else step, ts
+        index = int((ts - start) // window)
+        if current is not None and index != current:
+            close(current)
+            acc[:] = [0, 0, 0.0, 0.0, 0.0, 0, None]
+        current = index
+        acc[0] += requests
+        acc[1] += failures
+        if requests and p95 is not None:
+            acc[2] += requests * (p50 or 0.0)
+            acc[3] += requests * p95
+            acc[4] += requests * (p99 if p99 is not None else p95)
+            acc[5] += requests
+            if p99 is not None and (acc[6] is None or p99 > acc[6]):
+                acc[6] = p99
+    if current is not None:
+        close(current)
+    return windows
+
+
+def drift(windows: List[Window]) -> Optional[float]:
+    """Relative p95 change over the run along a least-squares line (0.2 = +20%)."""
+    points = [(w[0], w[5]) for w in windows if w[5] is not None]
+    if len(points) < 2:
+        return None
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    sxx = sum((x - mean_x) ** 2 for x, _ in points)
+    slope = sum((x - mean_x) * (y - mean_y) for x, y in points) / sxx
+    first = mean_y + slope * (points[0][0] - mean_x)
+    last = mean_y + slope * (points[-1][0] - mean_x)
+    return (last - first) / first if first > 0 else None
+
+
+def print_trend(run_id: str, endpoint: str, windows: List[Window], change: Optional[float]) -> None:
+    print(f"{run_id} {endpoint}")
+    print(f"{'offset':>8} {'reqs':>9} {'rps':>8} {'errors':>7} {'p50':>7} {'p95':>7} {'p99':>7} {'worst':>7}")
+    for offset, requests, rps, errors, p50, p95, p99, worst in windows:
+        hours, rest = divmod(int(offset), 3600)
+        print(f"{hours:>2}:{rest // 60:02}:{rest % 60:02} {requests:>9} {rps:>8.1f} {_fmt('errors', errors):>7} "
+              f"{_fmt('', p50):>7} {_fmt('', p95):>7} {_fmt('', p99):>7} {_fmt('', worst):>7}")
+    print(f"p95 drift over the run: {'-' if change is None else f'{change:+.1%}'}")
+
+
+# ---------- CLI ----------
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--db", default=os.environ.get("PERF_RESULTS_DB", DEFAULT_DB))
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("ingest", help="load result files into a run")
+    p.add_argument("run")
+    p.add_argument("files", nargs="+")
+
+    sub.add_parser("runs", help="list stored runs")
+
+    p = sub.add_parser("compare", help="per-endpoint deltas between two runs; exit 1 on a regression")
+    p.add_argument("base")
+    p.add_argument("new")
+    p.add_argument("--max-rps-drop", type=float, default=0.10, help="relative (0.10 = -10%%)")
+    p.add_argument("--max-latency-increase", type=float, default=0.20, help="relative, p95 and p99")
+    p.add_argument("--min-ms", type=float, default=1.0, help="ignore latency changes smaller than this")
+    p.add_argument("--max-error-increase", type=float, default=0.005, help="absolute (0.005 = +0.5 points)")
+    p.add_argument("--alpha", type=float, default=0.05, help="significance level")
+
+    p = sub.add_parser("trend", help="windowed percentiles of a long run; exit 1 past --max-drift")
+    p.add_argument("run")
+    p.add_argument("--endpoint", default=AGGREGATED)
+    p.add_argument("--window", type=duration_arg, default=parse_duration("15m"))
+    p.add_argument("--max-drift", type=float, help="fail if p95 drifts up more than this (0.2 = +20%%)")
+    args = parser.parse_args(argv)
+
+    conn = connect(args.db)
+    if args.command == "ingest":
+        for path in args.files:
+            kind, count = ingest(conn, args.run, path)
+            print(f"{args.run}: {path} ({kind}) -> {count} rows")
+        return 0
+    if args.command == "runs":
+        for run_id, tool, ingested_at, endpoints, samples in conn.execute(
+            "SELECT r.run_id, r.tool, r.ingested_at,"
+            " (SELECT count(*) FROM endpoint_stats e WHERE e.run_id = r.run_id),"
+            " (SELECT count(*) FROM samples s WHERE s.run_id = r.run_id)"
+            " FROM runs r ORDER BY r.ingested_at"
+        ):
+            stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(ingested_at))
+            print(f"{run_id:<24} {tool:<7} {stamp}  {endpoints} endpoints, {samples} samples")
+        return 0
+    if args.command == "compare":
+        deltas = compare(conn, args.base, args.new, args)
+        print_compare(args.base, args.new, deltas)
+        return 1 if any(d[5] == "REGRESSION" for d in deltas) else 0
+
+    windows = trend(conn, args.run, normalize(args.endpoint), args.window)
+    if not windows:
+        raise SystemExit(f"run {args.run!r} has no samples for {args.endpoint} (ingest a history / k6 points file)")
+    change = drift(windows)
+    print_trend(args.run, normalize(args.endpoint), windows, change)
+    return 1 if args.max_drift is not None and change is not None and change > args.max_drift else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())